@@ -10,6 +10,7 @@ type ProjectConfig = { id: string; name: string };
 type ProjectId = 'sk' | 'mt' | 'ss' | 'cosmetic' | string;
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+const JOB_POLL_INTERVAL_MS = 2000;
 
 const PROJECT_NAME_MAP = Object.fromEntries(
     (projectsConfig.projects as ProjectConfig[]).map((project) => [project.id, project.name])
@@ -239,7 +240,8 @@ export default function ScriptRunnerMenu({ projectId = 'default' }: ScriptRunner
         setStatus({ type: 'running', message: `Запуск ${fn}...` });
 
         try {
-            const response = await fetch(`${API_BASE_URL}/api/scripts/run`, {
+            // Long EcosystemLib runs go through the job queue: submit, then poll the status
+            const response = await fetch(`${API_BASE_URL}/api/scripts/jobs`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -249,12 +251,29 @@ export default function ScriptRunnerMenu({ projectId = 'default' }: ScriptRunner
             });
 
             const data = await response.json();
-            if (!response.ok || data.status !== 'success') {
+            if (!response.ok || data.status !== 'queued') {
                 const errorMessage = data.detail || data.message || 'Ошибка выполнения';
                 throw new Error(errorMessage);
             }
 
-            setStatus({ type: 'success', message: data.message || 'Готово' });
+            let job = data.job;
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+                const jobResponse = await fetch(`${API_BASE_URL}/api/scripts/jobs/${data.job_id}`);
+                if (!jobResponse.ok) {
+                    throw new Error('Не удалось получить статус задачи');
+                }
+                job = await jobResponse.json();
+                if (job.status === 'running') {
+                    setStatus({ type: 'running', message: `Выполняется ${fn}...` });
+                }
+            }
+
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Ошибка выполнения');
+            }
+
+            setStatus({ type: 'success', message: 'Готово' });
         } catch (error) {
             const message = error instanceof Error ? error.message : 'Неизвестная ошибка';
             setStatus({ type: 'error', message });
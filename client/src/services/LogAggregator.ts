@@ -255,19 +255,22 @@ export class WebSocketLogSource extends LogSource {
             return;
           }
 
-          // Handle log entry
-          const logEntry: LogEntry = {
-            timestamp: data.timestamp || new Date().toISOString(),
-            level: data.level || 'INFO',
-            message: data.message || '',
-            function: data.function,
-            details: data.details,
-            emoji: data.emoji || this.getEmojiForLog(data),
-            source: 'websocket'
-          };
-
-          // Add to buffer
-          this.logs.push(logEntry);
+          // Handle a batch of log entries or a single log entry
+          const entries = data.type === 'logs' && Array.isArray(data.logs) ? data.logs : [data];
+          for (const item of entries) {
+            const logEntry: LogEntry = {
+              timestamp: item.timestamp || new Date().toISOString(),
+              level: item.level || 'INFO',
+              message: item.message || '',
+              function: item.function,
+              details: item.details,
+              emoji: item.emoji || this.getEmojiForLog(item),
+              source: 'websocket'
+            };
+
+            // Add to buffer
+            this.logs.push(logEntry);
+          }
 
           // Keep only last 100 logs
           if (this.logs.length > 100) {
@@ -0,0 +1,65 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from services.google_service import google_service
+from services.executor import get_executor_stats
+from services.cache import caches, get_cache_stats, flush_caches
+from services.log_follower import log_follower
+from services.log_index import log_index
+from services.connection_manager import manager
+from services.write_buffer import write_buffer
+from services.rate_limiter import rate_limiter
+from services.script_jobs import script_jobs
+from services.script_runs import inflight_runs
+from services.drive_index import drive_index
+from services.drive_changes import drive_changes
+from services.sheet_mirror import sheet_mirror
+from api.logs import sheet_log_tail
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/stats")
+async def get_stats():
+    """
+    Runtime counters for the Google API client pool, backend executors and caches.
+    """
+    return {
+        "google_clients": google_service.get_client_stats(),
+        "executors": get_executor_stats(),
+        "coalesced_reads": google_service.inflight_reads.stats(),
+        "coalesced_script_runs": inflight_runs.stats(),
+        "circuit_breakers": google_service.get_breaker_stats(),
+        "caches": get_cache_stats(),
+        "log_follower": log_follower.stats(),
+        "log_index": log_index.stats(),
+        "websocket": manager.stats(),
+        "sheet_logs": sheet_log_tail.stats(),
+        "write_buffer": write_buffer.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "script_jobs": script_jobs.stats(),
+        "drive_index": drive_index.stats(),
+        "drive_changes": drive_changes.stats(),
+        "sheet_mirror": sheet_mirror.stats()
+    }
+
+
+@router.get("/cache")
+async def get_cache():
+    """
+    Hit rates and sizes of all read caches.
+    """
+    return get_cache_stats()
+
+
+@router.delete("/cache")
+async def flush_cache(
+    name: Optional[str] = Query(None, description="Cache name (all caches if omitted)"),
+    spreadsheet_id: Optional[str] = Query(None, description="Only drop entries for this spreadsheet")
+):
+    """
+    Flush cache entries, either everything or only one spreadsheet's entries.
+    """
+    if name and name not in caches:
+        raise HTTPException(status_code=404, detail=f"Unknown cache: {name}")
+    removed = flush_caches(name, spreadsheet_id)
+    return {"status": "success", "removed": removed}
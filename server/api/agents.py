@@ -1,9 +1,15 @@
 from fastapi import APIRouter, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import os
-import requests
 import json
-from services.google_service import google_service
+from services.async_google import async_google_service
+from services.agent_actions import execute_actions, normalize_actions
+from services.gemini_client import gemini_client
+from services.plan_cache import plan_cache
+from services.executor import run_blocking
+from services.cache import MISSING
+from services.google_service import SHEET_CHUNK_ROWS
+from services.sheet_summary import AGENT_CONTEXT_MAX_ROWS, SheetSummary, sheet_summary_cache
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
 
@@ -13,8 +19,133 @@ class AgentTask(BaseModel):
     sheet_name: str
     context: dict = {}
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent?key={GEMINI_API_KEY}"
+
+async def _load_sheet_summary(spreadsheet_id: str, sheet_name: str) -> SheetSummary:
+    """
+    Reads up to AGENT_CONTEXT_MAX_ROWS data rows in chunks, adding each chunk
+    to the summary as it arrives. Cached until the TTL or our next write.
+    """
+    key = (spreadsheet_id, sheet_name)
+    summary = sheet_summary_cache.get(key)
+    if summary is not MISSING:
+        return summary
+    generation = sheet_summary_cache.generation
+    summary = SheetSummary(AGENT_CONTEXT_MAX_ROWS)
+    chunk_rows = min(SHEET_CHUNK_ROWS, AGENT_CONTEXT_MAX_ROWS + 1)
+    rows = async_google_service.iter_sheet_rows(
+        spreadsheet_id, sheet_name, chunk_rows=chunk_rows, value_render_option='UNFORMATTED_VALUE'
+    )
+    async for first_row, chunk in rows:
+        await run_blocking('compute', summary.add_rows, chunk, first_row)
+        if summary.full:
+            break
+    # A write while we were reading bumps the generation and skips this
+    sheet_summary_cache.set(key, summary, generation)
+    return summary
+
+
+async def _build_sheet_context(task: AgentTask) -> str:
+    """
+    Reads the sheet and renders it as prompt context.
+    """
+    # 1. Summarize current sheet data (header + a bounded number of rows) with raw numbers
+    summary = SheetSummary()
+    try:
+        summary = await _load_sheet_summary(task.spreadsheet_id, task.sheet_name)
+    except Exception as e:
+        print(f"Warning: Could not read sheet data: {e}")
+
+    # Pick rows relevant to the prompt within the token budget
+    sheet_context = await run_blocking('compute', summary.render, task.prompt)
+    return sheet_context
+
+
+def _build_payload(task: AgentTask, sheet_context: str) -> dict:
+    """
+    Builds the Gemini request for the task.
+    """
+    # 2. Intent Recognition with Gemini
+    system_prompt = f"""
+    You are an AI Action Agent for Google Sheets.
+    Your goal is to understand the user's request and output a JSON object with the list of actions to take.
+
+    Context:
+    - Spreadsheet ID: {task.spreadsheet_id}
+    - Active Sheet: {task.sheet_name}
+    {sheet_context}
+
+    Supported Actions:
+    1. ADD_ROW: Append data to the sheet.
+       Params: "values" (list of strings/numbers)
+    2. UPDATE_CELL: Change a specific cell.
+       Params: "cell" (e.g., "G2"), "value" (string/number)
+    3. UPDATE_RANGE: Change a block of cells at once.
+       Params: "range" (e.g., "G2:G50"), "values" (list of rows, each a list of strings/numbers)
+    4. ANSWER: Answer a question using the sheet data or acknowledge.
+       Params: "text" (your response with specific data from the sheet)
+
+    User Request: "{task.prompt}"
+
+    Important:
+    - For questions about data, use ANSWER action and include specific information from the sheet
+    - For UPDATE_CELL, use exact cell reference like "G2" for column G row 2
+    - If the request needs several changes, return several actions in order
+    - To fill many cells (e.g., column G for rows 2-50), prefer one UPDATE_RANGE over many UPDATE_CELL
+    - Answer in Russian language
+
+    Output Format (JSON ONLY):
+    {{
+        "actions": [
+            {{
+                "action": "ADD_ROW" | "UPDATE_CELL" | "UPDATE_RANGE" | "ANSWER",
+                "params": {{ ... }}
+            }}
+        ],
+        "response_text": "A short, friendly confirmation message for the user in Russian."
+    }}
+    """
+    
+    payload = {
+        "contents": [{"parts": [{"text": system_prompt}]}],
+        "generationConfig": {"response_mime_type": "application/json"}
+    }
+    return payload
+
+
+async def _execute_plan(task: AgentTask, action_plan: dict) -> dict:
+    """
+    Executes the actions chosen by the model and builds the API response.
+    Consecutive writes are batched into single Sheets API calls.
+    """
+    actions = normalize_actions(action_plan)
+    response_text = action_plan.get("response_text", "Done.")
+
+    results, api_calls = await execute_actions(task.spreadsheet_id, task.sheet_name, actions)
+
+    errors = [result["error"] for result in results if result["status"] == "error"]
+    if len(actions) == 1:
+        action_taken = actions[0]["action"]
+    else:
+        action_taken = "MULTI" if actions else None
+
+    # Return Response
+    return {
+        "status": "error" if errors else "success",
+        "message": f"I encountered an error: {errors[0]}" if errors else response_text,
+        "action_taken": action_taken,
+        "actions": results,
+        "api_calls": api_calls
+    }
+
+
+def _error_response(e: Exception) -> dict:
+    print(f"Agent Error: {e}")
+    return {
+        "status": "error", 
+        "message": f"I encountered an error: {str(e)}",
+        "action_taken": "ERROR"
+    }
+
 
 @router.post("/chat")
 async def chat_agent(task: AgentTask):
@@ -26,101 +157,54 @@ async def chat_agent(task: AgentTask):
     4. Returns a natural language response.
     """
     try:
-        # 1. Read current sheet data to provide context
-        sheet_data = []
-        try:
-            sheet_data = google_service.read_sheet(task.spreadsheet_id, task.sheet_name)
-        except Exception as e:
-            print(f"Warning: Could not read sheet data: {e}")
-
-        # Convert sheet data to readable format
-        sheet_context = ""
-        if sheet_data and len(sheet_data) > 0:
-            # Get headers (first row)
-            headers = sheet_data[0] if len(sheet_data) > 0 else []
-            # Get first 20 rows of data
-            data_rows = sheet_data[1:21] if len(sheet_data) > 1 else []
-
-            sheet_context = f"\nSheet Data (first 20 rows):\n"
-            sheet_context += f"Headers: {', '.join(headers)}\n"
-            for idx, row in enumerate(data_rows, start=2):
-                # Pad row to match headers length
-                padded_row = row + [''] * (len(headers) - len(row))
-                sheet_context += f"Row {idx}: {padded_row}\n"
-
-        # 2. Intent Recognition with Gemini
-        system_prompt = f"""
-        You are an AI Action Agent for Google Sheets.
-        Your goal is to understand the user's request and output a JSON object representing the action to take.
-
-        Context:
-        - Spreadsheet ID: {task.spreadsheet_id}
-        - Active Sheet: {task.sheet_name}
-        {sheet_context}
-
-        Supported Actions:
-        1. ADD_ROW: Append data to the sheet.
-           Params: "values" (list of strings/numbers)
-        2. UPDATE_CELL: Change a specific cell.
-           Params: "cell" (e.g., "G2"), "value" (string/number)
-        3. ANSWER: Answer a question using the sheet data or acknowledge.
-           Params: "text" (your response with specific data from the sheet)
-
-        User Request: "{task.prompt}"
-
-        Important:
-        - For questions about data, use ANSWER action and include specific information from the sheet
-        - For UPDATE_CELL, use exact cell reference like "G2" for column G row 2
-        - Answer in Russian language
-
-        Output Format (JSON ONLY):
-        {{
-            "action": "ADD_ROW" | "UPDATE_CELL" | "ANSWER",
-            "params": {{ ... }},
-            "response_text": "A short, friendly confirmation message for the user in Russian."
-        }}
-        """
-        
-        payload = {
-            "contents": [{"parts": [{"text": system_prompt}]}],
-            "generationConfig": {"response_mime_type": "application/json"}
-        }
-        
-        response = requests.post(GEMINI_URL, json=payload)
-        response.raise_for_status()
-        
-        generated_text = response.json()['candidates'][0]['content']['parts'][0]['text']
-        action_plan = json.loads(generated_text)
-        
-        action = action_plan.get("action")
-        params = action_plan.get("params", {})
-        response_text = action_plan.get("response_text", "Done.")
+        sheet_context = await _build_sheet_context(task)
+
+        # Same question about the same data: reuse the previous answer plan
+        cache_key = plan_cache.make_key(task.prompt, task.spreadsheet_id, task.sheet_name, sheet_context)
+        action_plan = plan_cache.get(cache_key)
+        if action_plan is None:
+            response = await gemini_client.generate(_build_payload(task, sheet_context))
+            
+            generated_text = response['candidates'][0]['content']['parts'][0]['text']
+            action_plan = json.loads(generated_text)
+            plan_cache.put(cache_key, action_plan)
         
-        # 2. Execute Action
-        if action == "ADD_ROW":
-            values = params.get("values", [])
-            if values:
-                google_service.append_row(task.spreadsheet_id, task.sheet_name, values)
-                
-        elif action == "UPDATE_CELL":
-            cell = params.get("cell")
-            value = params.get("value")
-            if cell and value is not None:
-                # Construct range (e.g., "Sheet1!A1")
-                range_name = f"{task.sheet_name}!{cell}"
-                google_service.update_cell(task.spreadsheet_id, range_name, value)
-                
-        # 3. Return Response
-        return {
-            "status": "success",
-            "message": response_text,
-            "action_taken": action
-        }
+        return await _execute_plan(task, action_plan)
         
     except Exception as e:
-        print(f"Agent Error: {e}")
-        return {
-            "status": "error", 
-            "message": f"I encountered an error: {str(e)}",
-            "action_taken": "ERROR"
-        }
+        return _error_response(e)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_agent_stream(task: AgentTask):
+    """
+    Server-Sent Events variant of /chat.
+    Streams the model output as `token` events while it is generated,
+    then executes the action and sends the /chat response as a `result` event.
+    """
+    async def events():
+        try:
+            sheet_context = await _build_sheet_context(task)
+            cache_key = plan_cache.make_key(task.prompt, task.spreadsheet_id, task.sheet_name, sheet_context)
+            action_plan = plan_cache.get(cache_key)
+            if action_plan is None:
+                chunks = []
+                async for text in gemini_client.stream_generate(_build_payload(task, sheet_context)):
+                    chunks.append(text)
+                    yield _sse("token", {"text": text})
+                action_plan = json.loads(''.join(chunks))
+                plan_cache.put(cache_key, action_plan)
+            result = await _execute_plan(task, action_plan)
+        except Exception as e:
+            result = _error_response(e)
+        yield _sse("result", result)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
-from services.google_service import google_service
+from services.async_google import async_google_service
+from services.drive_index import drive_index
+from api.responses import stale_response
 from typing import Optional
 
 router = APIRouter(prefix="/api/drive", tags=["drive"])
@@ -8,23 +10,62 @@ router = APIRouter(prefix="/api/drive", tags=["drive"])
 async def list_files(
     folder_id: Optional[str] = None, 
     page_size: int = 20, 
-    page_token: Optional[str] = None
+    page_token: Optional[str] = None,
+    crawl: bool = Query(False, description="Answer from the Drive index: the whole folder at once, crawling its tree on first use")
 ):
+    if crawl:
+        return await list_indexed_files(folder_id or 'root')
     try:
-        service = google_service.get_drive_service()
-        
-        # Default query: Not in trash
-        q = "trashed = false"
-        if folder_id:
-            q += f" and '{folder_id}' in parents"
-            
-        results = service.files().list(
-            q=q,
-            pageSize=page_size,
-            pageToken=page_token,
-            fields="nextPageToken, files(id, name, mimeType, iconLink, webViewLink)"
-        ).execute()
-        
+        results, stale_age = await async_google_service.read_or_stale(
+            (folder_id or 'root', 'files', page_size, page_token),
+            async_google_service.list_files, folder_id, page_size, page_token
+        )
+        if stale_age is not None:
+            return stale_response(results, stale_age)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def list_indexed_files(folder_id: str):
+    try:
+        await drive_index.ensure(folder_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    files = drive_index.list_folder(folder_id)
+    return {"files": files, "count": len(files), "source": "index"}
+
+
+@router.get("/search")
+async def search_files(
+    q: str = Query(..., min_length=1, description="Name prefix (case-insensitive)"),
+    folder_id: Optional[str] = Query(None, description="Only files below this folder (crawled on first use)"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Name-prefix search over the Drive index, answered without Drive calls.
+    """
+    if folder_id:
+        try:
+            await drive_index.ensure(folder_id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    files = drive_index.search(q, folder_id, limit)
+    return {"files": files, "count": len(files), "source": "index"}
+
+
+@router.post("/index/refresh")
+async def refresh_index(
+    folder_id: str = Query("root", description="Root of the tree to refresh"),
+    full: bool = Query(False, description="Re-crawl the whole tree instead of fetching changes")
+):
+    """
+    Updates the Drive index for a folder tree: only files modified since the
+    last pass, or a full crawl the first time (or with full=true).
+    """
+    try:
+        if full:
+            return await drive_index.crawl(folder_id)
+        return await drive_index.refresh(folder_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
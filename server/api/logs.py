@@ -1,25 +1,35 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 import os
-from datetime import datetime
 
-from services.google_service import google_service
+from services.async_google import async_google_service
+from services.executor import run_blocking
+from services.log_files import LOG_MAX_TAIL, get_log_dir, tail_lines
+from services.log_index import log_index
+from services.log_parser import extract_emoji, parse_file_lines
+from services.sheet_log_tail import SheetLogTail
+from api.responses import stale_response
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
 
 @router.get("/server")
 async def get_server_logs(
-    tail: int = Query(100, description="Number of last lines to return"),
-    log_file: Optional[str] = Query(None, description="Specific log file name")
+    tail: int = Query(100, ge=0, le=LOG_MAX_TAIL, description="Number of last lines to return"),
+    log_file: Optional[str] = Query(None, description="Specific log file name"),
+    since_offset: Optional[int] = Query(None, ge=0, description="Byte offset from a previous response's next_offset"),
+    since_inode: Optional[int] = Query(None, description="File id from the same previous response's inode")
 ):
     """
     Get logs from server log files.
-    Returns the last N lines from the log file.
+    Returns the last N lines from the log file, or with `since_offset`
+    (and `since_inode`) only the lines appended since the previous poll.
+    `reset` means the file was rotated or truncated and is read from the
+    start; `truncated` means more than `tail` lines were there and the
+    older ones were skipped.
     """
     try:
-        # Default log directory (can be configured via environment variable)
-        log_dir = os.getenv('LOG_DIR', '/var/log/businessos/')
+        log_dir = get_log_dir()
 
         # If no specific file requested, use default
         if not log_file:
@@ -37,20 +47,27 @@ async def get_server_logs(
                 "source": "server-files"
             }
 
-        # Read last N lines
-        with open(log_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            last_lines = lines[-tail:] if len(lines) > tail else lines
+        # Read last N lines backwards from the end of the file
+        result = await run_blocking(
+            'files', tail_lines, log_path, tail, since_offset or 0,
+            include_partial=since_offset is None,
+            inode=since_inode if since_offset is not None else None
+        )
 
         # Parse log lines into structured format
-        parsed_logs = []
-        for line in last_lines:
-            parsed_logs.append(parse_log_line(line.strip()))
+        parsed_logs = await run_blocking(
+            'files', parse_file_lines, log_path, [line.strip() for line in result['lines']]
+        )
 
         return {
             "status": "success",
             "logs": parsed_logs,
             "count": len(parsed_logs),
+            "next_offset": result['next_offset'],
+            "inode": result['inode'],
+            "file_size": result['file_size'],
+            "reset": result['reset'],
+            "truncated": result['truncated'],
             "source": "server-files"
         }
 
@@ -58,141 +75,95 @@ async def get_server_logs(
         raise HTTPException(status_code=500, detail=f"Failed to read server logs: {str(e)}")
 
 
+@router.get("/search")
+async def search_server_logs(
+    q: Optional[str] = Query(None, description="Words that must all appear in the line (word* for a prefix)"),
+    level: Optional[str] = Query(None, description="Log level, e.g. ERROR"),
+    emoji: Optional[str] = Query(None, description="Emoji marker, e.g. ❌"),
+    since: Optional[str] = Query(None, description="From this time, e.g. 2024-12-08 or 2024-12-08T14:30"),
+    until: Optional[str] = Query(None, description="Up to this time (a date includes the whole day)"),
+    log_file: Optional[str] = Query(None, description="Only this file, e.g. app.log.1"),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Searches all LOG_DIR files, rotated and gzipped ones included, newest first.
+    Uses the log index; only the matching lines are read from disk.
+    """
+    try:
+        result = await log_index.search(q, level, emoji, since, until, log_file, limit, offset)
+        return {
+            "status": "success",
+            "logs": result["logs"],
+            "count": len(result["logs"]),
+            "limit": limit,
+            "offset": offset,
+            "has_more": result["has_more"],
+            "took_ms": result["took_ms"],
+            "source": "server-files"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search server logs: {str(e)}")
+
+
 @router.get("/sheets/{spreadsheet_id}")
 async def get_sheets_logs(
     spreadsheet_id: str,
     sheet: str = Query("Журнал синхро", description="Name of the log sheet"),
-    tail: int = Query(100, description="Number of last rows to return")
+    tail: int = Query(100, ge=0, le=LOG_MAX_TAIL, description="Number of last rows to return"),
+    after_row: Optional[int] = Query(None, ge=1, description="Only rows after this row number (last_row from a previous response)")
 ):
     """
     Get logs from a Google Sheets log sheet (e.g., "Журнал синхро").
-    Returns the last N rows.
+    Returns the last N rows; polls only fetch rows appended since the previous one.
     """
     try:
-        service = google_service.get_sheets_service()
-
-        # Read all data from the sheet
-        range_name = f"'{sheet}'!A:E"  # Assuming columns: timestamp, level, message, function, details
-        result = service.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range=range_name
-        ).execute()
-
-        values = result.get('values', [])
+        parsed_logs, last_row, stale_age = await sheet_log_tail.read(spreadsheet_id, sheet, tail, after_row)
 
-        if not values:
-            return {
+        if last_row < 2 and not parsed_logs:
+            result = {
                 "status": "success",
                 "logs": [],
                 "message": f"No logs found in sheet '{sheet}'",
+                "last_row": last_row,
                 "source": "google-sheets"
             }
+        else:
+            result = {
+                "status": "success",
+                "logs": parsed_logs,
+                "count": len(parsed_logs),
+                "last_row": last_row,
+                "source": "google-sheets",
+                "sheet": sheet
+            }
 
-        # Skip header row and get last N rows
-        data_rows = values[1:] if len(values) > 1 else []
-        last_rows = data_rows[-tail:] if len(data_rows) > tail else data_rows
-
-        # Parse into structured format
-        parsed_logs = []
-        for row in last_rows:
-            # Ensure row has at least 3 columns
-            while len(row) < 5:
-                row.append('')
-
-            parsed_logs.append({
-                "timestamp": row[0] if len(row) > 0 else '',
-                "level": row[1] if len(row) > 1 else 'INFO',
-                "message": row[2] if len(row) > 2 else '',
-                "function": row[3] if len(row) > 3 else '',
-                "details": row[4] if len(row) > 4 else '',
-                "emoji": extract_emoji(row[2] if len(row) > 2 else ''),
-                "source": "google-sheets"
-            })
-
-        return {
-            "status": "success",
-            "logs": parsed_logs,
-            "count": len(parsed_logs),
-            "source": "google-sheets",
-            "sheet": sheet
-        }
+        if stale_age is not None:
+            return stale_response(result, stale_age)
+        return result
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read Google Sheets logs: {str(e)}")
 
 
-def parse_log_line(line: str) -> dict:
+def parse_sheet_log_row(row: list, row_number: int) -> dict:
     """
-    Parse a single log line into structured format.
-    Attempts to extract: timestamp, level, message
+    Parse a log sheet row (timestamp, level, message, function, details).
     """
-    # Try to parse common formats:
-    # [2024-12-08 14:30:45] INFO: Message
-    # 2024-12-08 14:30:45 - INFO - Message
-
-    import re
+    # Ensure row has at least 5 columns (rows are shared between callers, pad a copy)
+    row = row + [''] * (5 - len(row))
 
-    # Pattern 1: [timestamp] LEVEL: message
-    pattern1 = r'\[([^\]]+)\]\s*(\w+):\s*(.+)'
-    match = re.match(pattern1, line)
-    if match:
-        return {
-            "timestamp": match.group(1),
-            "level": match.group(2),
-            "message": match.group(3),
-            "emoji": extract_emoji(match.group(3)),
-            "source": "server-files"
-        }
-
-    # Pattern 2: timestamp - LEVEL - message
-    pattern2 = r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})\s*-\s*(\w+)\s*-\s*(.+)'
-    match = re.match(pattern2, line)
-    if match:
-        return {
-            "timestamp": match.group(1),
-            "level": match.group(2),
-            "message": match.group(3),
-            "emoji": extract_emoji(match.group(3)),
-            "source": "server-files"
-        }
-
-    # Fallback: return as-is
     return {
-        "timestamp": datetime.now().isoformat(),
-        "level": "INFO",
-        "message": line,
-        "emoji": extract_emoji(line),
-        "source": "server-files"
+        "row": row_number,
+        "timestamp": row[0],
+        "level": row[1],
+        "message": row[2],
+        "function": row[3],
+        "details": row[4],
+        "emoji": extract_emoji(row[2]),
+        "source": "google-sheets"
     }
 
 
-def extract_emoji(text: str) -> str:
-    """
-    Extract the first emoji from a text string.
-    """
-    import re
-
-    # Common emoji patterns used in logs
-    emojis = ['🚀', '⏳', '📥', '✅', '✏️', '⚠️', '❌', '🏁', '🐛', '🔄', '📤', '🗑️', '➕']
-
-    for emoji in emojis:
-        if emoji in text:
-            return emoji
-
-    # Try to find any emoji using regex
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F1E0-\U0001F1FF"  # flags
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251"
-        "]+", flags=re.UNICODE
-    )
-
-    match = emoji_pattern.search(text)
-    if match:
-        return match.group()
-
-    return ''
+# Assuming columns: timestamp, level, message, function, details
+sheet_log_tail = SheetLogTail(parse_sheet_log_row, columns='A:E')
@@ -0,0 +1,17 @@
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+
+
+def stale_response(content, stale_age: float):
+    """
+    Wraps a last known good response served while its backend is down.
+    Dict bodies get "stale" / "stale_age" fields; every body gets the
+    standard Warning header and X-Stale-Age (seconds).
+    """
+    age = int(stale_age)
+    if isinstance(content, dict):
+        content = {**content, "stale": True, "stale_age": age}
+    return JSONResponse(
+        content=jsonable_encoder(content),
+        headers={"Warning": '110 - "Response is Stale"', "X-Stale-Age": str(age)}
+    )
@@ -1,8 +1,10 @@
 from typing import Union, Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
-from services.google_service import google_service
+from services.async_google import async_google_service
+from services.script_jobs import script_jobs
+from services.script_runs import execute_script, invalidate_after_run
 from config.projects import PROJECT_SCRIPT_IDS, DEFAULT_SCRIPT_ID
 
 router = APIRouter(prefix="/api/scripts", tags=["scripts"])
@@ -12,6 +14,8 @@ class ScriptRunRequest(BaseModel):
     project_id: str
     function_name: str
     parameters: Optional[Union[list, dict]] = None
+    # Spreadsheet touched by the function, if not one of the project's own
+    spreadsheet_id: Optional[str] = None
 
 
 @router.post("/run")
@@ -32,14 +36,66 @@ async def run_script(request: ScriptRunRequest):
         raise HTTPException(status_code=404, detail="Script not configured for this project")
 
     try:
-        result = google_service.run_script_function(script_id, request.function_name, request.parameters)
-        print(f"✅ Script executed successfully: {result}")
-        return {"status": "success", "result": result, "message": "Function executed"}
+        result, source = await execute_script(script_id, request.function_name, request.parameters)
+        print(f"✅ Script executed successfully ({source}): {result}")
+        messages = {
+            "executed": "Function executed",
+            "shared": "Function executed (joined an identical run in progress)",
+            "cached": "Function result from cache",
+        }
+        return {"status": "success", "result": result, "message": messages[source], "source": source}
     except Exception as e:
         print(f"❌ Script execution error: {type(e).__name__}: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Script execution failed: {str(e)}")
+    finally:
+        invalidate_after_run(project_key, script_id, request.function_name, request.spreadsheet_id)
+
+
+@router.post("/jobs", status_code=202)
+async def submit_script_job(request: ScriptRunRequest):
+    """
+    Queue a Google Apps Script function run and return its job id right away.
+    Progress is pushed over /ws/logs and can be polled at /api/scripts/jobs/{job_id}.
+    """
+    project_key = request.project_id.lower()
+    script_id = PROJECT_SCRIPT_IDS.get(project_key, DEFAULT_SCRIPT_ID)
+    if not script_id:
+        raise HTTPException(status_code=404, detail="Script not configured for this project")
+
+    try:
+        job = await script_jobs.submit(
+            project_key, script_id, request.function_name, request.parameters, request.spreadsheet_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue script job: {str(e)}")
+    print(f"🕒 Script job {job['id']} queued: {project_key}/{request.function_name}")
+    return {"status": "queued", "job_id": job['id'], "job": job}
+
+
+@router.get("/jobs")
+async def list_script_jobs(
+    status: Optional[str] = Query(None, description="queued | running | succeeded | failed"),
+    project_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Recent script jobs, newest first.
+    """
+    jobs = await script_jobs.list(status, project_id.lower() if project_id else None, limit)
+    return {"status": "success", "jobs": jobs, "count": len(jobs)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_script_job(job_id: str):
+    """
+    Status of a script job, with its result or error once finished.
+    """
+    job = await script_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
 
 
 @router.get("/sheets/{spreadsheet_id}/sheet-name")
@@ -49,7 +105,7 @@ async def get_sheet_name(spreadsheet_id: str, sheet_id: int = 0):
     Used for context detection in iframes.
     """
     try:
-        metadata = google_service.get_spreadsheet_metadata(spreadsheet_id)
+        metadata = await async_google_service.get_spreadsheet_metadata(spreadsheet_id)
 
         # Find the sheet with matching sheetId
         for sheet in metadata.get('sheets', []):
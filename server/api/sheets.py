@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.google_service import google_service
+from services.async_google import async_google_service
+from services.sheet_mirror import sheet_mirror, MirrorQueryError
+from services.sheet_export import export_sheet, ExportError, EXPORT_FORMATS
+from api.responses import stale_response
 
 router = APIRouter(prefix="/api/sheets", tags=["sheets"])
 
@@ -10,7 +16,11 @@ class SheetRequest(BaseModel):
 @router.get("/{spreadsheet_id}/metadata")
 async def get_spreadsheet_metadata(spreadsheet_id: str):
     try:
-        data = google_service.get_spreadsheet_metadata(spreadsheet_id)
+        data, stale_age = await async_google_service.read_or_stale(
+            (spreadsheet_id, 'metadata'), async_google_service.get_spreadsheet_metadata, spreadsheet_id
+        )
+        if stale_age is not None:
+            return stale_response(data, stale_age)
         return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -18,7 +28,62 @@ async def get_spreadsheet_metadata(spreadsheet_id: str):
 @router.get("/{spreadsheet_id}/headers")
 async def get_sheet_headers(spreadsheet_id: str, sheet_name: str):
     try:
-        headers = google_service.get_sheet_headers(spreadsheet_id, sheet_name)
+        headers, stale_age = await async_google_service.read_or_stale(
+            (spreadsheet_id, 'headers', sheet_name), async_google_service.get_sheet_headers, spreadsheet_id, sheet_name
+        )
+        if stale_age is not None:
+            return stale_response(headers, stale_age)
         return headers
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{spreadsheet_id}/query")
+async def query_sheet(
+    spreadsheet_id: str,
+    sheet: str = Query(..., description="Mirrored sheet name (MIRRORED_SHEETS in config/projects.py)"),
+    where: List[str] = Query([], description="Filters column:op:value, op one of eq, ne, gt, gte, lt, lte, contains"),
+    sort: List[str] = Query([], description="Columns to sort by, prefix with - for descending"),
+    group_by: Optional[str] = Query(None, description="Column to group by"),
+    agg: List[str] = Query([], description="Aggregates: count, sum:column, avg:column, min:column, max:column"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Queries the local mirror of a sheet: no Google API calls once it is synced.
+    Columns are referenced by header name or column letter.
+    """
+    if not sheet_mirror.is_mirrored(spreadsheet_id, sheet):
+        raise HTTPException(status_code=404, detail=f"Sheet '{sheet}' of {spreadsheet_id} is not mirrored")
+    try:
+        return await sheet_mirror.query(spreadsheet_id, sheet, where, sort, group_by, agg, limit, offset)
+    except MirrorQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{spreadsheet_id}/export")
+async def export_sheet_rows(
+    spreadsheet_id: str,
+    sheet: str = Query(..., description="Sheet name"),
+    format: str = Query("csv", description="csv, ndjson, arrow or parquet (arrow/parquet need pyarrow)"),
+    unformatted: bool = Query(False, description="Raw values (numbers as numbers) instead of displayed text")
+):
+    """
+    Streams a whole sheet, read in row chunks, so memory stays bounded whatever its size.
+    """
+    try:
+        body = await export_sheet(spreadsheet_id, sheet, format,
+                                  'UNFORMATTED_VALUE' if unformatted else 'FORMATTED_VALUE')
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(sheet)}.{extension}",
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark for the log line parser.
+
+Compares the previous per-line implementation (patterns compiled on every
+call, 13 substring checks for emoji) with services.log_parser.
+
+Run from server/:
+    python -m benchmarks.bench_log_parser [lines]
+"""
+import re
+import sys
+import time
+from datetime import datetime
+
+from services.log_parser import parse_lines
+
+SAMPLE_LINES = [
+    "[2024-12-08 14:30:45] INFO: 🚀 Script started",
+    "[2024-12-08 14:30:46] INFO: ⏳ Loading rows from База SK",
+    "[2024-12-08 14:30:47] INFO: Synced 120 rows",
+    "[2024-12-08 14:30:48] WARNING: ⚠️ Empty article in row 42",
+    "[2024-12-08 14:30:49] ERROR: ❌ Script execution failed: timeout",
+    "[2024-12-08 14:30:50] INFO: 🏁 Done in 4.2s",
+]
+
+
+def legacy_extract_emoji(text: str) -> str:
+    emojis = ['🚀', '⏳', '📥', '✅', '✏️', '⚠️', '❌', '🏁', '🐛', '🔄', '📤', '🗑️', '➕']
+    for emoji in emojis:
+        if emoji in text:
+            return emoji
+    emoji_pattern = re.compile(
+        "["
+        "\U0001F600-\U0001F64F"
+        "\U0001F300-\U0001F5FF"
+        "\U0001F680-\U0001F6FF"
+        "\U0001F1E0-\U0001F1FF"
+        "\U00002702-\U000027B0"
+        "\U000024C2-\U0001F251"
+        "]+", flags=re.UNICODE
+    )
+    match = emoji_pattern.search(text)
+    return match.group() if match else ''
+
+
+def legacy_parse_log_line(line: str) -> dict:
+    match = re.match(r'\[([^\]]+)\]\s*(\w+):\s*(.+)', line)
+    if match:
+        return {"timestamp": match.group(1), "level": match.group(2), "message": match.group(3),
+                "emoji": legacy_extract_emoji(match.group(3)), "source": "server-files"}
+    match = re.match(r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})\s*-\s*(\w+)\s*-\s*(.+)', line)
+    if match:
+        return {"timestamp": match.group(1), "level": match.group(2), "message": match.group(3),
+                "emoji": legacy_extract_emoji(match.group(3)), "source": "server-files"}
+    return {"timestamp": datetime.now().isoformat(), "level": "INFO", "message": line,
+            "emoji": legacy_extract_emoji(line), "source": "server-files"}
+
+
+def measure(label: str, fn, lines: list, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(lines)
+        best = min(best, time.perf_counter() - started)
+    rate = len(lines) / best
+    print(f"{label:<10} {rate:>12,.0f} lines/sec")
+    return rate
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    lines = [SAMPLE_LINES[i % len(SAMPLE_LINES)] for i in range(count)]
+
+    print(f"Parsing {count} lines (best of 5)")
+    before = measure("before", lambda batch: [legacy_parse_log_line(line) for line in batch], lines)
+    after = measure("after", parse_lines, lines)
+    print(f"speedup    {after / before:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,5 +11,29 @@ PROJECT_SCRIPT_IDS = {
     "ss": ECOSYSTEM_SCRIPT_ID,
 }
 
+# Spreadsheets written by each project's script functions.
+# Cached reads for them are dropped after every script run.
+PROJECT_SPREADSHEET_IDS = {
+    "sk": [
+        "1CpYYLvRYslsyCkuLzL9EbbjsvbNpWCEZcmhKqMoX5zw",  # База SK
+        "1zSu0PzKKa5wvwMZCicwLN8N7Rwhs8XlJVrTrt2LMzQs",  # Док-ты от производителя
+    ],
+    "mt": [
+        "1fMOjUE7oZV96fCY5j5rPxnhWGJkDqg-GfwPZ8jUVgPw",  # База MT
+    ],
+    "ss": [],
+}
+
 # Sensible defaults if the project id isn't mapped explicitly
 DEFAULT_SCRIPT_ID = ECOSYSTEM_SCRIPT_ID
+
+# Apps Script functions that only read data: their results are cached
+# for SCRIPT_RESULT_CACHE_TTL seconds per (script, function, parameters).
+# Only list functions without side effects.
+READ_ONLY_SCRIPT_FUNCTIONS = set()
+
+# Sheets mirrored into the local SQLite copy queried by /api/sheets/{id}/query
+MIRRORED_SHEETS = {
+    "1CpYYLvRYslsyCkuLzL9EbbjsvbNpWCEZcmhKqMoX5zw": ["Главная"],  # База SK
+    "1fMOjUE7oZV96fCY5j5rPxnhWGJkDqg-GfwPZ8jUVgPw": ["Главная"],  # База MT
+}
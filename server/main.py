@@ -2,40 +2,22 @@ import os
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from api.sheets import router as sheets_router
-from typing import List
+from services.async_google import async_google_service
+from services.executor import shutdown_executors
+from services.log_follower import log_follower
+from services.connection_manager import manager
+from services.gemini_client import gemini_client
+from services.plan_cache import plan_cache
+from services.write_buffer import write_buffer
+from services.script_jobs import script_jobs
+from services.drive_changes import drive_changes
+from services.sheet_mirror import sheet_mirror
+from services.log_index import log_index
 import asyncio
 import json
 
 app = FastAPI(title="Business OS Agent API")
 
-
-# WebSocket Connection Manager for real-time logs
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                # Connection might be closed, will be removed on disconnect
-                pass
-
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
-
-
-manager = ConnectionManager()
-
 # Configure CORS
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
@@ -56,6 +38,63 @@ from api.scripts import router as scripts_router
 app.include_router(scripts_router)
 from api.logs import router as logs_router
 app.include_router(logs_router)
+from api.admin import router as admin_router
+app.include_router(admin_router)
+
+
+@app.on_event("startup")
+async def warm_up_google_clients():
+    # Build API clients once at startup instead of on the first request
+    await async_google_service.warm_up()
+
+
+@app.on_event("startup")
+async def load_plan_cache():
+    plan_cache.load()
+
+
+@app.on_event("startup")
+async def start_log_follower():
+    # Push new lines from LOG_DIR files to /ws/logs clients
+    log_follower.start(on_batch=manager.broadcast)
+
+
+@app.on_event("startup")
+async def start_script_jobs():
+    # Resume queued Apps Script jobs, push job updates to /ws/logs clients
+    await script_jobs.start(on_update=manager.broadcast)
+
+
+@app.on_event("startup")
+async def start_drive_changes():
+    # Drop cached reads of files edited outside BusinessOS
+    drive_changes.start()
+
+
+@app.on_event("startup")
+async def start_sheet_mirror():
+    # Keep the local copies behind /api/sheets/{id}/query in sync
+    sheet_mirror.start()
+
+
+@app.on_event("startup")
+async def start_log_index():
+    # Index LOG_DIR files for /api/logs/search
+    log_index.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await log_follower.stop()
+    await log_index.stop()
+    await script_jobs.stop()
+    await drive_changes.stop()
+    await sheet_mirror.stop()
+    # Commit buffered writes before the executors go away
+    await write_buffer.flush()
+    await gemini_client.close()
+    plan_cache.save()
+    shutdown_executors()
 
 
 # WebSocket endpoint for real-time logs
@@ -77,8 +116,12 @@ async def websocket_logs(websocket: WebSocket):
             # For now, just keep the connection alive
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         print(f"WebSocket disconnected")
+    except RuntimeError:
+        # Socket was closed by the server (slow client eviction)
+        pass
+    finally:
+        manager.disconnect(websocket)
 
 
 # Utility function to emit logs to all connected clients
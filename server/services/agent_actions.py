@@ -0,0 +1,133 @@
+from services.async_google import async_google_service
+
+# Consecutive actions of the same group are sent as one API call
+WRITE_GROUPS = {
+    'UPDATE_CELL': 'update',
+    'UPDATE_RANGE': 'update',
+    'ADD_ROW': 'append',
+}
+
+
+def normalize_actions(action_plan: dict) -> list:
+    """
+    Returns the plan's actions as a list of {"action", "params"}.
+    Accepts both {"actions": [...]} and the single {"action", "params"} form.
+    """
+    if isinstance(action_plan.get('actions'), list):
+        actions = action_plan['actions']
+    elif action_plan.get('action'):
+        actions = [{'action': action_plan.get('action'), 'params': action_plan.get('params', {})}]
+    else:
+        actions = []
+    return [
+        {'action': str(item.get('action', '')).upper(), 'params': item.get('params') or {}}
+        for item in actions if isinstance(item, dict)
+    ]
+
+
+def _update_entry(sheet_name: str, action: dict):
+    # batchUpdate data entry for UPDATE_CELL / UPDATE_RANGE, None if params are incomplete
+    params = action['params']
+    if action['action'] == 'UPDATE_CELL':
+        cell, value = params.get('cell'), params.get('value')
+        if cell and value is not None:
+            return {'range': f"'{sheet_name}'!{cell}", 'values': [[value]]}
+    else:
+        range_ref, values = params.get('range'), params.get('values')
+        if range_ref and isinstance(values, list) and values:
+            rows = [row if isinstance(row, list) else [row] for row in values]
+            return {'range': f"'{sheet_name}'!{range_ref}", 'values': rows}
+    return None
+
+
+def _skipped(action: dict) -> dict:
+    return {'action': action['action'], 'status': 'skipped', 'reason': 'missing params'}
+
+
+async def _run_updates(spreadsheet_id: str, sheet_name: str, group: list, results: list) -> int:
+    data, targets = [], []
+    for index, action in group:
+        entry = _update_entry(sheet_name, action)
+        if entry is None:
+            results[index] = _skipped(action)
+        else:
+            data.append(entry)
+            targets.append((index, action))
+    if not data:
+        return 0
+    response = await async_google_service.batch_update_values(spreadsheet_id, data)
+    responses = response.get('responses', [])
+    for position, (index, action) in enumerate(targets):
+        updated = responses[position] if position < len(responses) else {}
+        results[index] = {
+            'action': action['action'],
+            'status': 'success',
+            'range': updated.get('updatedRange', data[position]['range']),
+            'updated_cells': updated.get('updatedCells', 0),
+        }
+    return 1
+
+
+async def _run_appends(spreadsheet_id: str, sheet_name: str, group: list, results: list) -> int:
+    rows, targets = [], []
+    for index, action in group:
+        values = action['params'].get('values')
+        if isinstance(values, list) and values:
+            rows.append(values)
+            targets.append(index)
+        else:
+            results[index] = _skipped(action)
+    if not rows:
+        return 0
+    response = await async_google_service.append_rows(spreadsheet_id, f"'{sheet_name}'", rows)
+    updated_range = response.get('updates', {}).get('updatedRange')
+    for index in targets:
+        results[index] = {'action': 'ADD_ROW', 'status': 'success', 'range': updated_range}
+    return 1
+
+
+async def execute_actions(spreadsheet_id: str, sheet_name: str, actions: list):
+    """
+    Executes a list of normalized actions in order.
+
+    Consecutive cell/range updates are merged into one values.batchUpdate
+    (applied as a whole by the API) and consecutive ADD_ROWs into one
+    multi-row append. After a failed write the remaining writes are skipped.
+    Returns (per-action results, number of API calls made).
+    """
+    results = [None] * len(actions)
+    api_calls = 0
+    failed = None
+    index = 0
+    while index < len(actions):
+        action = actions[index]
+        kind = WRITE_GROUPS.get(action['action'])
+        if kind is None:
+            status = 'success' if action['action'] == 'ANSWER' else 'skipped'
+            results[index] = {'action': action['action'], 'status': status}
+            if status == 'skipped':
+                results[index]['reason'] = 'unknown action'
+            index += 1
+            continue
+
+        group = []
+        while index < len(actions) and WRITE_GROUPS.get(actions[index]['action']) == kind:
+            group.append((index, actions[index]))
+            index += 1
+
+        if failed:
+            for position, grouped in group:
+                results[position] = {'action': grouped['action'], 'status': 'skipped',
+                                     'reason': 'previous write failed'}
+            continue
+        try:
+            if kind == 'update':
+                api_calls += await _run_updates(spreadsheet_id, sheet_name, group, results)
+            else:
+                api_calls += await _run_appends(spreadsheet_id, sheet_name, group, results)
+        except Exception as e:
+            api_calls += 1
+            failed = e
+            for position, grouped in group:
+                results[position] = {'action': grouped['action'], 'status': 'error', 'error': str(e)}
+    return results, api_calls
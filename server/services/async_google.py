@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+from services.cache import MISSING
+from services.circuit_breaker import is_upstream_failure
+from services.executor import pools, run_blocking
+from services.google_service import google_service, GoogleService, SHEET_CHUNK_ROWS
+from services.write_buffer import write_buffer
+
+
+class AsyncGoogleService:
+    """
+    Async facade over GoogleService.
+    Every call runs on the bounded thread pool of its backend, so a slow
+    Apps Script run never blocks Sheets reads or the event loop.
+    """
+
+    def __init__(self, service: GoogleService):
+        self._service = service
+
+    async def warm_up(self):
+        # Spawn the worker threads and build their API clients up front
+        if not await run_blocking('sheets', self._service.warm_up, ['sheets']):
+            return
+        tasks = []
+        for api in ('sheets', 'drive', 'script'):
+            for _ in range(pools[api].max_workers):
+                tasks.append(run_blocking(api, self._service.warm_up, [api]))
+        await asyncio.gather(*tasks)
+
+    async def read_or_stale(self, key: tuple, read, *args):
+        """
+        Awaits read(*args) and keeps the result as the last known good value
+        under `key` (spreadsheet/folder id first). If the backend is failing
+        or its circuit is open, returns that value instead of raising.
+        Returns (value, stale_age): stale_age is None for a fresh value,
+        otherwise the seconds since the stale value was fetched.
+        """
+        try:
+            value = await read(*args)
+        except Exception as e:
+            if not is_upstream_failure(e):
+                raise
+            entry = self._service.last_good_cache.get(key)
+            if entry is MISSING:
+                raise
+            value, fetched_at = entry
+            print(f"⚠️ Serving stale {key[1]} for {key[0]}: {e}")
+            return value, time.time() - fetched_at
+        self._service.last_good_cache.set(key, (value, time.time()))
+        return value, None
+
+    # --- Sheets ---
+
+    async def get_spreadsheet_metadata(self, spreadsheet_id: str):
+        return await run_blocking('sheets', self._service.get_spreadsheet_metadata, spreadsheet_id)
+
+    async def get_sheet_headers(self, spreadsheet_id: str, sheet_name: str):
+        return await run_blocking('sheets', self._service.get_sheet_headers, spreadsheet_id, sheet_name)
+
+    async def get_sheet_values(self, spreadsheet_id: str, range_name: str):
+        return await run_blocking('sheets', self._service.get_sheet_values, spreadsheet_id, range_name)
+
+    async def batch_get_values(self, spreadsheet_id: str, ranges: list, value_render_option: str = 'FORMATTED_VALUE'):
+        return await run_blocking('sheets', self._service.batch_get_values, spreadsheet_id, ranges, value_render_option)
+
+    async def get_sheet_row_count(self, spreadsheet_id: str, sheet_name: str):
+        return await run_blocking('sheets', self._service.get_sheet_row_count, spreadsheet_id, sheet_name)
+
+    async def get_sheet_grid_size(self, spreadsheet_id: str, sheet_name: str):
+        return await run_blocking('sheets', self._service.get_sheet_grid_size, spreadsheet_id, sheet_name)
+
+    async def iter_sheet_rows(self, spreadsheet_id: str, sheet_name: str, start_row: int = 1,
+                              chunk_rows: int = SHEET_CHUNK_ROWS, value_render_option: str = 'FORMATTED_VALUE'):
+        """
+        Async version of GoogleService.iter_sheet_rows: one pooled request per chunk.
+        """
+        row_count = await self.get_sheet_row_count(spreadsheet_id, sheet_name)
+        row = start_row
+        while row <= row_count:
+            end_row = min(row + chunk_rows - 1, row_count)
+            rows = await run_blocking(
+                'sheets', self._service.read_rows, spreadsheet_id, sheet_name,
+                row, end_row, value_render_option
+            )
+            if end_row == row_count:
+                while rows and not rows[-1]:
+                    rows.pop()
+            if rows:
+                yield row, rows
+            row = end_row + 1
+
+    async def append_row(self, spreadsheet_id: str, range_name: str, values: list):
+        if write_buffer.enabled:
+            return await write_buffer.append_rows(spreadsheet_id, range_name, [values])
+        return await run_blocking('sheets', self._service.append_row, spreadsheet_id, range_name, values)
+
+    async def append_rows(self, spreadsheet_id: str, range_name: str, rows: list):
+        if write_buffer.enabled:
+            return await write_buffer.append_rows(spreadsheet_id, range_name, rows)
+        return await run_blocking('sheets', self._service.append_rows, spreadsheet_id, range_name, rows)
+
+    async def batch_update_values(self, spreadsheet_id: str, data: list):
+        if write_buffer.enabled:
+            return await write_buffer.batch_update_values(spreadsheet_id, data)
+        return await run_blocking('sheets', self._service.batch_update_values, spreadsheet_id, data)
+
+    async def update_cell(self, spreadsheet_id: str, range_name: str, value):
+        if write_buffer.enabled:
+            response = await write_buffer.batch_update_values(
+                spreadsheet_id, [{'range': range_name, 'values': [[value]]}]
+            )
+            # Shaped like a values.update response
+            responses = response.get('responses', [])
+            return responses[0] if responses else {}
+        return await run_blocking('sheets', self._service.update_cell, spreadsheet_id, range_name, value)
+
+    # --- Drive ---
+
+    async def list_files(self, folder_id: str = None, page_size: int = 20, page_token: str = None):
+        return await run_blocking('drive', self._service.list_files, folder_id, page_size, page_token)
+
+    # --- Apps Script ---
+
+    async def update_script_content(self, script_id: str, code: str = None, files=None, force: bool = False):
+        return await run_blocking('script', self._service.update_script_content, script_id, code, files, force)
+
+    async def deploy_scripts(self, script_ids: list, code: str = None, files=None, force: bool = False):
+        """
+        Pushes the same content to several script projects in parallel
+        (each distinct id once). Returns {script_id: push result or {"error": ...}}.
+        """
+        script_ids = list(dict.fromkeys(script_ids))
+        results = await asyncio.gather(
+            *(self.update_script_content(script_id, code, files, force) for script_id in script_ids),
+            return_exceptions=True
+        )
+        return {
+            script_id: {'script_id': script_id, 'error': str(result)} if isinstance(result, Exception) else result
+            for script_id, result in zip(script_ids, results)
+        }
+
+    async def run_script_function(self, script_id: str, function_name: str, parameters=None):
+        return await run_blocking('script', self._service.run_script_function, script_id, function_name, parameters)
+
+
+async_google_service = AsyncGoogleService(google_service)
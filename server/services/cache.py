@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Sentinel for "not in cache" (None is a valid cached value)
+MISSING = object()
+
+# All caches by name, for the admin endpoint
+caches = {}
+
+
+class TTLCache:
+    """
+    Thread-safe bounded LRU cache with per-entry TTL.
+    Keys are tuples whose first element is the spreadsheet/file id,
+    so everything cached for one spreadsheet can be invalidated at once.
+    """
+
+    def __init__(self, name: str, maxsize: int = 256, ttl: float = 300, invalidate_on_write: bool = True):
+        self.name = name
+        # False for caches that must outlive writes (e.g. last known good responses)
+        self.invalidate_on_write = invalidate_on_write
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation: loads that started earlier must not be stored
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        caches[name] = self
+
+    @property
+    def generation(self) -> int:
+        """
+        Pass to set() to drop a value loaded across an invalidation.
+        """
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self._misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value, generation: int = None, ttl: float = None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value or calls loader() and caches its result.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        generation = self._generation
+        value = loader()
+        self.set(key, value, generation)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            if self._data.pop(key, None) is not None:
+                self._invalidations += 1
+
+    def invalidate_spreadsheet(self, spreadsheet_id: str):
+        with self._lock:
+            self._generation += 1
+            stale = [key for key in self._data if key[0] == spreadsheet_id]
+            for key in stale:
+                del self._data[key]
+            self._invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            count = len(self._data)
+            self._data.clear()
+            self._invalidations += count
+            return count
+
+    def export(self):
+        """
+        Returns live entries as (key, value, remaining_ttl), oldest first.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value, expires_at - now)
+                    for key, (value, expires_at) in self._data.items() if expires_at > now]
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+
+def get_cache_stats():
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def flush_caches(name: str = None, spreadsheet_id: str = None):
+    """
+    Drops entries from one or all caches, optionally only for one spreadsheet.
+    Returns the number of removed entries per cache.
+    """
+    targets = [caches[name]] if name else list(caches.values())
+    removed = {}
+    for cache in targets:
+        if spreadsheet_id:
+            removed[cache.name] = cache.invalidate_spreadsheet(spreadsheet_id)
+        else:
+            removed[cache.name] = cache.clear()
+    return removed
@@ -0,0 +1,177 @@
+import os
+import socket
+import threading
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Consecutive failed (or too slow) requests that open a backend's circuit
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+# A request slower than this (seconds) counts as a failure; 0 turns the check off
+BREAKER_LATENCY_THRESHOLD = float(os.getenv('BREAKER_LATENCY_THRESHOLD', '10'))
+# Per-backend overrides. scripts.run routinely takes tens of seconds, so by
+# default only errors and timeouts count against the script backend
+BREAKER_LATENCY_THRESHOLDS = {
+    'script': float(os.getenv('BREAKER_SCRIPT_LATENCY_THRESHOLD', '0')),
+}
+# Seconds an open circuit fails fast before letting a probe request through
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', '30'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a backend whose circuit is open.
+    """
+
+    def __init__(self, backend: str, retry_in: float):
+        super().__init__(f"{backend} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.backend = backend
+        self.retry_in = retry_in
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    True for errors that say the backend is unhealthy (5xx, rate limits,
+    timeouts, connection errors), False for errors caused by the request itself.
+    """
+    if isinstance(error, CircuitOpenError):
+        return True
+    if isinstance(error, HttpError):
+        return error.resp.status >= 500 or error.resp.status == 429
+    return isinstance(error, (socket.timeout, TimeoutError, ConnectionError, httplib2.HttpLib2Error))
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker.
+
+    Closed: requests pass; `failure_threshold` upstream failures (or slow
+    calls) in a row open the circuit. Open: requests fail fast with
+    CircuitOpenError for `open_seconds`. Half-open: one probe request is
+    let through; success closes the circuit, failure opens it again.
+    The latency threshold defaults to the backend's entry in
+    BREAKER_LATENCY_THRESHOLDS, else BREAKER_LATENCY_THRESHOLD.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 latency_threshold: float = None,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        if latency_threshold is None:
+            latency_threshold = BREAKER_LATENCY_THRESHOLDS.get(name, BREAKER_LATENCY_THRESHOLD)
+        self.latency_threshold = latency_threshold
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._opened = 0
+        self._rejected = 0
+        self._slow = 0
+
+    def check(self):
+        """
+        Fails fast while the circuit is open, without taking the probe slot.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            retry_in = self._opened_at + self.open_seconds - time.monotonic()
+            if (self._state == OPEN and retry_in > 0) or (self._state == HALF_OPEN and self._probing):
+                self._rejected += 1
+                raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def before_call(self):
+        """
+        Raises CircuitOpenError unless a request may go to the backend now.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            retry_in = self._opened_at + self.open_seconds - time.monotonic()
+            if self._state == OPEN and retry_in <= 0:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self._rejected += 1
+        raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def record_success(self, latency: float):
+        if self.latency_threshold > 0 and latency > self.latency_threshold:
+            with self._lock:
+                self._slow += 1
+            self._record_failure()
+            return
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"✅ {self.name} circuit closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_error(self, error: Exception):
+        # Rate limits are handled by the rate limiter: the backend itself is healthy
+        rate_limited = isinstance(error, HttpError) and error.resp.status == 429
+        if is_upstream_failure(error) and not rate_limited:
+            self._record_failure()
+        else:
+            # The backend answered: it is up, the request was wrong
+            self.record_success(0)
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                print(f"🔌 {self.name} circuit opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._opened += 1
+            self._probing = False
+
+    def call(self, fn):
+        """
+        Runs fn() under the breaker and records its outcome.
+        """
+        self.before_call()
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record_error(e)
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+    def guard(self, request):
+        """
+        Wraps an API request so every execute() (each retry included) goes through the breaker.
+        """
+        return _GuardedRequest(request, self)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'opened': self._opened,
+                'rejected': self._rejected,
+                'slow_calls': self._slow,
+                'latency_threshold': self.latency_threshold,
+            }
+
+
+class _GuardedRequest:
+    def __init__(self, request, breaker: CircuitBreaker):
+        self._request = request
+        self._breaker = breaker
+
+    def execute(self):
+        return self._breaker.call(self._request.execute)
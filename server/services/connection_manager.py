@@ -0,0 +1,149 @@
+import asyncio
+import os
+from typing import Dict
+
+from fastapi import WebSocket
+
+# Per-connection send queue length (messages) before the slow-client policy kicks in
+WS_QUEUE_SIZE = int(os.getenv('WS_QUEUE_SIZE', '500'))
+# Messages queued within this window are sent as one frame
+WS_FLUSH_INTERVAL = float(os.getenv('WS_FLUSH_INTERVAL', '0.1'))
+# A socket that can't take a frame within this time is considered dead
+WS_SEND_TIMEOUT = float(os.getenv('WS_SEND_TIMEOUT', '5'))
+# "drop_oldest" keeps the client and loses old messages, "disconnect" evicts it
+WS_SLOW_CLIENT_POLICY = os.getenv('WS_SLOW_CLIENT_POLICY', 'drop_oldest')
+
+
+class _Client:
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+        self.task = None
+        self.frames_sent = 0
+        self.dropped = 0
+
+
+def _is_log_message(message: dict) -> bool:
+    # Log batches from the follower, or single entries from emit_log()
+    return message.get('type', 'logs') == 'logs'
+
+
+def _merge_frames(messages: list) -> list:
+    """
+    Merges consecutive log messages into one {"type": "logs"} frame,
+    other messages (status, job updates...) are sent unchanged and in order.
+    """
+    frames = []
+    group = []
+
+    def flush_group():
+        if len(group) == 1:
+            frames.append(group[0])
+        elif group:
+            logs = []
+            for message in group:
+                if message.get('type') == 'logs':
+                    logs.extend(message.get('logs', []))
+                else:
+                    logs.append(message)
+            frames.append({"type": "logs", "logs": logs})
+        group.clear()
+
+    for message in messages:
+        if _is_log_message(message):
+            group.append(message)
+        else:
+            flush_group()
+            frames.append(message)
+    flush_group()
+    return frames
+
+
+# WebSocket Connection Manager for real-time logs
+class ConnectionManager:
+    """
+    Each connection gets a bounded send queue and its own writer task,
+    so broadcast() never waits on a slow or half-dead client.
+    """
+
+    def __init__(self):
+        self.active_connections: Dict[WebSocket, _Client] = {}
+        self.evicted = 0
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        client = _Client(websocket)
+        self.active_connections[websocket] = client
+        client.task = asyncio.create_task(self._writer(client))
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.active_connections.pop(websocket, None)
+        if client and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    def _evict(self, client: _Client, reason: str):
+        if client.websocket not in self.active_connections:
+            return
+        print(f"⚠️ Evicting WebSocket client: {reason}")
+        self.evicted += 1
+        self.disconnect(client.websocket)
+        asyncio.create_task(self._close(client.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), WS_SEND_TIMEOUT)
+        except Exception:
+            pass
+
+    def _enqueue(self, client: _Client, message: dict):
+        if client.queue.full():
+            if WS_SLOW_CLIENT_POLICY == 'disconnect':
+                self._evict(client, "send queue full")
+                return
+            client.queue.get_nowait()
+            client.dropped += 1
+        client.queue.put_nowait(message)
+
+    async def _writer(self, client: _Client):
+        try:
+            while True:
+                messages = [await client.queue.get()]
+                # Let the batch fill up, then send everything queued as few frames
+                await asyncio.sleep(WS_FLUSH_INTERVAL)
+                while not client.queue.empty():
+                    messages.append(client.queue.get_nowait())
+                for frame in _merge_frames(messages):
+                    await asyncio.wait_for(client.websocket.send_json(frame), WS_SEND_TIMEOUT)
+                    client.frames_sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._evict(client, f"send failed: {type(e).__name__}")
+
+    async def broadcast(self, message: dict):
+        """Queue message for all connected clients"""
+        for client in list(self.active_connections.values()):
+            self._enqueue(client, message)
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        client = self.active_connections.get(websocket)
+        if client:
+            self._enqueue(client, message)
+
+    def stats(self):
+        return {
+            'connections': len(self.active_connections),
+            'policy': WS_SLOW_CLIENT_POLICY,
+            'evicted': self.evicted,
+            'clients': [
+                {
+                    'queued': client.queue.qsize(),
+                    'frames_sent': client.frames_sent,
+                    'dropped': client.dropped,
+                }
+                for client in self.active_connections.values()
+            ],
+        }
+
+
+manager = ConnectionManager()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import time
+
+from services.executor import run_blocking
+from services.google_service import google_service
+from services.drive_index import drive_index
+from services.rate_limiter import background_priority
+
+# Follow the Drive changes feed to drop cached data edited outside BusinessOS
+DRIVE_CHANGES_ENABLED = os.getenv('DRIVE_CHANGES_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Seconds between changes.list polls
+DRIVE_CHANGES_INTERVAL = float(os.getenv('DRIVE_CHANGES_INTERVAL', '30'))
+# JSON file keeping the feed position across restarts
+DRIVE_CHANGES_TOKEN_FILE = os.getenv('DRIVE_CHANGES_TOKEN_FILE', 'drive_changes_token.json')
+
+
+class DriveChangesPoller:
+    """
+    Background poller of the Drive changes feed.
+
+    Every DRIVE_CHANGES_INTERVAL seconds it reads the changes since the saved
+    page token and, for each changed file id, drops exactly that file's
+    cached reads (metadata, headers, row windows...) and updates the Drive
+    index. The token is saved after every poll, so changes made while the
+    server was down are applied on the next start.
+    """
+
+    def __init__(self):
+        self.page_token = None
+        self._task = None
+        self._stop_event = None
+        self._last_error = None
+        self.polls = 0
+        self.changes_seen = 0
+        self.invalidated = 0
+        self.errors = 0
+        self.last_poll_at = None
+
+    def start(self):
+        if self._task or not DRIVE_CHANGES_ENABLED:
+            return
+        if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+            # Nothing to follow without Google access
+            return
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        self._task = None
+
+    def _load_token(self):
+        if not DRIVE_CHANGES_TOKEN_FILE or not os.path.exists(DRIVE_CHANGES_TOKEN_FILE):
+            return None
+        try:
+            with open(DRIVE_CHANGES_TOKEN_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f).get('page_token')
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load Drive changes token: {e}")
+            return None
+
+    def _save_token(self):
+        if not DRIVE_CHANGES_TOKEN_FILE:
+            return
+        tmp_path = f"{DRIVE_CHANGES_TOKEN_FILE}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'page_token': self.page_token}, f)
+            os.replace(tmp_path, DRIVE_CHANGES_TOKEN_FILE)
+        except OSError as e:
+            print(f"⚠️ Could not save Drive changes token: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                with background_priority():
+                    await self.poll()
+                self._last_error = None
+            except Exception as e:
+                self.errors += 1
+                # Report each distinct problem once (e.g. missing credentials)
+                if str(e) != self._last_error:
+                    print(f"⚠️ Drive changes poll failed: {e}")
+                    self._last_error = str(e)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), DRIVE_CHANGES_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll(self) -> int:
+        """
+        Applies all changes since the saved token. Returns the number of changes.
+        """
+        if self.page_token is None:
+            self.page_token = await run_blocking('files', self._load_token)
+        if self.page_token is None:
+            # First run: start from now, nothing cached predates the server anyway
+            self.page_token = await run_blocking('drive', google_service.get_changes_start_token)
+            await run_blocking('files', self._save_token)
+            return 0
+
+        count = 0
+        page_token = self.page_token
+        while page_token:
+            page = await run_blocking('drive', google_service.list_changes, page_token)
+            changes = page.get('changes', [])
+            await self._apply(changes)
+            count += len(changes)
+            page_token = page.get('nextPageToken')
+            if page.get('newStartPageToken'):
+                self.page_token = page['newStartPageToken']
+        await run_blocking('files', self._save_token)
+
+        self.polls += 1
+        self.changes_seen += count
+        self.last_poll_at = time.time()
+        return count
+
+    async def _apply(self, changes: list):
+        changed_files = []
+        removed_ids = []
+        for change in changes:
+            file_id = change.get('fileId')
+            if not file_id:
+                continue
+            google_service.invalidate_spreadsheet(file_id)
+            self.invalidated += 1
+            file = change.get('file')
+            if change.get('removed') or not file:
+                removed_ids.append(file_id)
+            else:
+                changed_files.append(file)
+        if changed_files or removed_ids:
+            await drive_index.apply_changes(changed_files, removed_ids)
+
+    def stats(self):
+        return {
+            'enabled': DRIVE_CHANGES_ENABLED,
+            'running': self._task is not None,
+            'interval': DRIVE_CHANGES_INTERVAL,
+            'page_token': self.page_token,
+            'polls': self.polls,
+            'changes_seen': self.changes_seen,
+            'invalidated': self.invalidated,
+            'errors': self.errors,
+            'last_poll_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.last_poll_at)) if self.last_poll_at else None,
+            'last_error': self._last_error,
+        }
+
+
+drive_changes = DriveChangesPoller()
@@ -0,0 +1,261 @@
+import asyncio
+import bisect
+import os
+import time
+from datetime import datetime, timezone
+
+from services.executor import run_blocking
+from services.google_service import google_service
+
+# files.list calls in flight at once while crawling a tree
+DRIVE_CRAWL_CONCURRENCY = int(os.getenv('DRIVE_CRAWL_CONCURRENCY', '4'))
+# A root not fully re-crawled for this many seconds is crawled again instead of refreshed
+DRIVE_INDEX_MAX_AGE = float(os.getenv('DRIVE_INDEX_MAX_AGE', '86400'))
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+def _rfc3339(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class DriveIndex:
+    """
+    In-memory index of Drive folder trees (id -> parent, name, mimeType).
+
+    crawl() walks a tree breadth-first with up to DRIVE_CRAWL_CONCURRENCY
+    files.list calls at once, 1000 files per page and only the indexed
+    fields. refresh() then asks Drive only for files modified since the
+    last pass and applies them (renames, moves, trash, new folders get
+    crawled). Listings and name-prefix searches are answered locally.
+    """
+
+    def __init__(self):
+        self.files = {}
+        # Crawled folder id -> ids of its children
+        self.children = {}
+        # Crawled root id -> {'crawled_at', 'synced_at', ...} (time.time() values)
+        self.roots = {}
+        # Real folder id -> the alias it was crawled as (e.g. "root")
+        self._aliases = {}
+        self._root_locks = {}
+        self._names = []
+        self._names_dirty = True
+        self._list_calls = 0
+        self._crawls = 0
+        self._refreshes = 0
+
+    # --- Drive calls ---
+
+    async def _list_all(self, q: str) -> list:
+        files = []
+        page_token = None
+        while True:
+            page = await run_blocking('drive', google_service.list_files_page, q, page_token)
+            self._list_calls += 1
+            files.extend(page.get('files', []))
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                return files
+
+    async def _crawl_folder(self, folder_id: str, semaphore: asyncio.Semaphore, counts: dict):
+        async with semaphore:
+            items = await self._list_all(f"'{folder_id}' in parents and trashed = false")
+        self._set_children(folder_id, items)
+        counts['folders'] += 1
+        counts['files'] += len(items)
+        subfolders = [item['id'] for item in items if item.get('mimeType') == FOLDER_MIME_TYPE]
+        await asyncio.gather(*(self._crawl_folder(sub_id, semaphore, counts) for sub_id in subfolders))
+
+    # --- Index updates ---
+
+    def _entry(self, file: dict) -> dict:
+        parents = file.get('parents') or []
+        parent = parents[0] if parents else None
+        return {
+            'id': file['id'],
+            'name': file.get('name', ''),
+            'mimeType': file.get('mimeType', ''),
+            'parent': self._aliases.get(parent, parent),
+            'modifiedTime': file.get('modifiedTime'),
+        }
+
+    def _set_children(self, folder_id: str, items: list):
+        real_parent = (items[0].get('parents') or [folder_id])[0] if items else folder_id
+        if real_parent != folder_id:
+            self._aliases[real_parent] = folder_id
+        listed = {item['id'] for item in items}
+        for child_id in self.children.get(folder_id, set()) - listed:
+            self._remove(child_id)
+        self.children[folder_id] = listed
+        for item in items:
+            self.files[item['id']] = self._entry(item)
+        self._names_dirty = True
+
+    def _remove(self, file_id: str):
+        """
+        Drops a file, or a folder with everything indexed below it.
+        """
+        entry = self.files.pop(file_id, None)
+        if entry and entry['parent'] in self.children:
+            self.children[entry['parent']].discard(file_id)
+        for child_id in self.children.pop(file_id, set()):
+            if self.files.get(child_id, {}).get('parent') == file_id:
+                self._remove(child_id)
+        self._names_dirty = True
+
+    def apply_file(self, file: dict) -> bool:
+        """
+        Applies one changed file (from a modifiedTime query or the changes feed).
+        Returns True when it is a folder that is new to the index and must be crawled.
+        """
+        entry = self._entry(file)
+        file_id = entry['id']
+        known = self.files.get(file_id)
+        if file.get('trashed') or entry['parent'] not in self.children:
+            # Trashed, or outside every indexed tree (possibly moved out of one)
+            if known or file_id in self.children:
+                self._remove(file_id)
+            return False
+
+        if known and known['parent'] != entry['parent'] and known['parent'] in self.children:
+            self.children[known['parent']].discard(file_id)
+        self.children[entry['parent']].add(file_id)
+        self.files[file_id] = entry
+        self._names_dirty = True
+        return entry['mimeType'] == FOLDER_MIME_TYPE and file_id not in self.children
+
+    def remove_file(self, file_id: str):
+        if file_id in self.files or file_id in self.children:
+            self._remove(file_id)
+
+    async def apply_changes(self, files: list, removed_ids=()) -> list:
+        """
+        Applies changed files and removed ids, then crawls folders new to the index.
+        Returns the ids of the crawled folders.
+        """
+        for file_id in removed_ids:
+            self.remove_file(file_id)
+        new_folders = [file['id'] for file in files if self.apply_file(file)]
+        counts = {'folders': 0, 'files': 0}
+        semaphore = asyncio.Semaphore(DRIVE_CRAWL_CONCURRENCY)
+        await asyncio.gather(*(self._crawl_folder(folder_id, semaphore, counts) for folder_id in new_folders))
+        return new_folders
+
+    # --- Crawl / refresh ---
+
+    async def crawl(self, root_id: str) -> dict:
+        """
+        Fully (re-)indexes the tree below `root_id`.
+        """
+        lock = self._root_locks.setdefault(root_id, asyncio.Lock())
+        async with lock:
+            return await self._crawl(root_id)
+
+    async def _crawl(self, root_id: str) -> dict:
+        started = time.time()
+        counts = {'folders': 0, 'files': 0}
+        await self._crawl_folder(root_id, asyncio.Semaphore(DRIVE_CRAWL_CONCURRENCY), counts)
+        self._crawls += 1
+        self.roots[root_id] = {
+            'crawled_at': started,
+            # Changes made while crawling are picked up by the next refresh
+            'synced_at': started,
+            'crawl_ms': round((time.time() - started) * 1000, 1),
+            **counts,
+        }
+        print(f"📁 Indexed Drive folder {root_id}: {counts['folders']} folders, {counts['files']} files "
+              f"in {self.roots[root_id]['crawl_ms']} ms")
+        return self._root_summary(root_id)
+
+    async def refresh(self, root_id: str) -> dict:
+        """
+        Brings the tree below `root_id` up to date: a crawl the first time (or
+        after DRIVE_INDEX_MAX_AGE), otherwise only files modified since the last pass.
+        """
+        lock = self._root_locks.setdefault(root_id, asyncio.Lock())
+        async with lock:
+            root = self.roots.get(root_id)
+            if root is None or time.time() - root['crawled_at'] > DRIVE_INDEX_MAX_AGE:
+                return await self._crawl(root_id)
+
+            started = time.time()
+            changed = await self._list_all(f"modifiedTime > '{_rfc3339(root['synced_at'])}'")
+            new_folders = await self.apply_changes(changed)
+            root['synced_at'] = started
+            self._refreshes += 1
+            return {**self._root_summary(root_id), 'changed': len(changed), 'new_folders': len(new_folders)}
+
+    def _crawled(self, folder_id: str) -> bool:
+        # Inside a tree whose crawl finished (a crawl that failed partway records no root)
+        folder_id = self._aliases.get(folder_id, folder_id)
+        return folder_id in self.children and any(self._in_tree(folder_id, root_id) for root_id in self.roots)
+
+    async def ensure(self, folder_id: str):
+        """
+        Makes sure a folder's listing is in the index, crawling its tree if needed.
+        """
+        if self._crawled(folder_id):
+            return
+        lock = self._root_locks.setdefault(folder_id, asyncio.Lock())
+        async with lock:
+            # Another request may have crawled it while we waited
+            if not self._crawled(folder_id):
+                await self._crawl(folder_id)
+
+    # --- Queries ---
+
+    def list_folder(self, folder_id: str) -> list:
+        entries = [self.files[child_id] for child_id in self.children.get(folder_id, ()) if child_id in self.files]
+        entries.sort(key=lambda e: (e['mimeType'] != FOLDER_MIME_TYPE, e['name'].lower()))
+        return entries
+
+    def _in_tree(self, file_id: str, root_id: str) -> bool:
+        seen = set()
+        while file_id is not None and file_id not in seen:
+            if file_id == root_id:
+                return True
+            seen.add(file_id)
+            entry = self.files.get(file_id)
+            file_id = entry['parent'] if entry else None
+        return False
+
+    def search(self, prefix: str, root_id: str = None, limit: int = 50) -> list:
+        """
+        Files whose name starts with `prefix` (case-insensitive), optionally only below `root_id`.
+        """
+        if self._names_dirty:
+            self._names = sorted((entry['name'].lower(), file_id) for file_id, entry in self.files.items())
+            self._names_dirty = False
+        prefix = prefix.lower()
+        results = []
+        for name, file_id in self._names[bisect.bisect_left(self._names, (prefix,)):]:
+            if not name.startswith(prefix) or len(results) >= limit:
+                break
+            if root_id is None or self._in_tree(file_id, root_id):
+                results.append(self.files[file_id])
+        return results
+
+    def _root_summary(self, root_id: str) -> dict:
+        root = self.roots[root_id]
+        return {
+            'root_id': root_id,
+            'crawled_at': _rfc3339(root['crawled_at']),
+            'synced_at': _rfc3339(root['synced_at']),
+            'crawl_ms': root['crawl_ms'],
+            'folders': root['folders'],
+            'files': root['files'],
+        }
+
+    def stats(self):
+        return {
+            'files': len(self.files),
+            'folders': len(self.children),
+            'roots': [self._root_summary(root_id) for root_id in self.roots],
+            'list_calls': self._list_calls,
+            'crawls': self._crawls,
+            'refreshes': self._refreshes,
+        }
+
+
+drive_index = DriveIndex()
@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.rate_limiter import is_background
+
+# Max concurrent blocking calls per backend (one worker thread per slot)
+BACKEND_LIMITS = {
+    'sheets': int(os.getenv('SHEETS_CONCURRENCY', '8')),
+    'drive': int(os.getenv('DRIVE_CONCURRENCY', '4')),
+    'script': int(os.getenv('SCRIPT_CONCURRENCY', '4')),
+    'files': int(os.getenv('FILES_CONCURRENCY', '4')),
+    'compute': int(os.getenv('COMPUTE_CONCURRENCY', '2')),
+}
+# Share of each pool's workers that background calls (pollers, crawls, exports) may hold.
+# Quota waits and backoff sleep in the worker thread, so without a cap waiting
+# background calls could take every worker and interactive calls would queue behind them
+BACKGROUND_WORKER_SHARE = float(os.getenv('BACKGROUND_WORKER_SHARE', '0.5'))
+
+
+class BackendPool:
+    """
+    Bounded thread pool for one backend.
+    Keeps blocking Google API calls and heavy parsing off the event loop and tracks queue depth.
+    Calls made under background_priority() hold at most `background_workers`
+    workers at once and wait for a slot on the event loop, not in the executor queue.
+    """
+
+    def __init__(self, name: str, max_workers: int, background_share: float = BACKGROUND_WORKER_SHARE):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.background_workers = max(1, int(self.max_workers * background_share))
+        self._background_slots = None
+        self._background_loop = None
+        self._background_active = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"{name}-worker"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_ms_total = 0.0
+        self._run_ms_total = 0.0
+
+    def _background_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._background_loop is not loop:
+            self._background_slots = asyncio.Semaphore(self.background_workers)
+            self._background_loop = loop
+        return self._background_slots
+
+    async def run(self, fn, *args, **kwargs):
+        if not is_background():
+            return await self._run(fn, *args, **kwargs)
+        async with self._background_semaphore():
+            self._background_active += 1
+            try:
+                return await self._run(fn, *args, **kwargs)
+            finally:
+                self._background_active -= 1
+
+    async def _run(self, fn, *args, **kwargs):
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_ms_total += (started - submitted) * 1000
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    if failed:
+                        self._failed += 1
+                    self._run_ms_total += (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        # Run in the caller's context so context variables (e.g. request priority) reach the worker
+        future = self._executor.submit(contextvars.copy_context().run, task)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Caller went away before the task started: drop it from the queue
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            completed = self._completed
+            return {
+                'max_workers': self.max_workers,
+                'background_workers': self.background_workers,
+                'background_active': self._background_active,
+                'queued': self._queued,
+                'active': self._active,
+                'max_queued': self._max_queued,
+                'completed': completed,
+                'failed': self._failed,
+                'avg_wait_ms': round(self._wait_ms_total / completed, 2) if completed else 0.0,
+                'avg_run_ms': round(self._run_ms_total / completed, 2) if completed else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+pools = {name: BackendPool(name, limit) for name, limit in BACKEND_LIMITS.items()}
+
+
+async def run_blocking(backend: str, fn, *args, **kwargs):
+    """
+    Runs a blocking call on the backend's thread pool and awaits the result.
+    """
+    return await pools[backend].run(fn, *args, **kwargs)
+
+
+def get_executor_stats():
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+def shutdown_executors():
+    for pool in pools.values():
+        pool.shutdown()
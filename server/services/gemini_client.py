@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import random
+
+import httpx
+
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-flash-latest')
+GEMINI_BASE_URL = 'https://generativelanguage.googleapis.com/v1beta/models'
+# Seconds to wait for a full response (or between streamed chunks)
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '60'))
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '2'))
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '4'))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GeminiClient:
+    """
+    Shared keep-alive async client for the Gemini API.
+    One connection pool for the whole app: no TLS handshake per chat,
+    and no worker thread held while the model generates.
+    """
+
+    def __init__(self):
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=GEMINI_BASE_URL,
+                timeout=httpx.Timeout(GEMINI_TIMEOUT, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=GEMINI_CONCURRENCY,
+                    max_keepalive_connections=GEMINI_CONCURRENCY
+                )
+            )
+        return self._client
+
+    def _headers(self):
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise Exception("GEMINI_API_KEY is not configured")
+        return {'x-goog-api-key': api_key}
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _backoff(self, attempt: int, response: httpx.Response = None):
+        delay = 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+
+    async def generate(self, payload: dict) -> dict:
+        """
+        Calls generateContent and returns the parsed JSON response.
+        Retries timeouts, connection errors, 429 and 5xx with backoff.
+        """
+        client = self._get_client()
+        url = f"/{GEMINI_MODEL}:generateContent"
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            last_attempt = attempt == GEMINI_MAX_RETRIES
+            try:
+                response = await client.post(url, json=payload, headers=self._headers())
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await self._backoff(attempt)
+                continue
+            if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                await self._backoff(attempt, response)
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    async def stream_generate(self, payload: dict):
+        """
+        Calls streamGenerateContent (SSE) and yields text deltas as they arrive.
+        Only the connection is retried: once text has been yielded, errors propagate.
+        """
+        client = self._get_client()
+        url = f"/{GEMINI_MODEL}:streamGenerateContent"
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            last_attempt = attempt == GEMINI_MAX_RETRIES
+            try:
+                async with client.stream('POST', url, params={'alt': 'sse'}, json=payload,
+                                         headers=self._headers()) as response:
+                    if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                        await self._backoff(attempt, response)
+                        continue
+                    if response.is_error:
+                        await response.aread()
+                        response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith('data:'):
+                            continue
+                        chunk = json.loads(line[5:])
+                        for candidate in chunk.get('candidates', [])[:1]:
+                            for part in candidate.get('content', {}).get('parts', []):
+                                if part.get('text'):
+                                    yield part['text']
+                    return
+            except httpx.ConnectError:
+                if last_attempt:
+                    raise
+                await self._backoff(attempt)
+
+
+gemini_client = GeminiClient()
@@ -1,8 +1,20 @@
 import os
+import threading
+import time
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
 from dotenv import load_dotenv
 
+from services.cache import TTLCache, caches
+from services.singleflight import SingleFlight
+from services.rate_limiter import rate_limiter
+from services.circuit_breaker import CircuitBreaker
+from services.script_content import (
+    DEFAULT_MANIFEST, MANIFEST_NAME, normalize_files, project_hashes, script_hashes
+)
+
 load_dotenv()
 
 SCOPES = [
@@ -16,10 +28,67 @@ SCOPES = [
     'https://www.googleapis.com/auth/userinfo.email'
 ]
 
+# API name -> version for every client kept in the pool
+API_VERSIONS = {
+    'sheets': 'v4',
+    'drive': 'v3',
+    'script': 'v1',
+}
+
+# Rate limiter bucket -> backend whose circuit breaker guards it
+API_BACKENDS = {
+    'sheets_read': 'sheets',
+    'sheets_write': 'sheets',
+    'drive': 'drive',
+    'script': 'script',
+}
+
+# files.list maximum, and the file fields kept by the Drive index
+DRIVE_MAX_PAGE_SIZE = 1000
+DRIVE_INDEX_FIELDS = 'id, name, mimeType, parents, modifiedTime, trashed'
+
+# Rows per request when reading a whole sheet in chunks
+SHEET_CHUNK_ROWS = int(os.getenv('SHEET_CHUNK_ROWS', '1000'))
+
 class GoogleService:
     def __init__(self):
         self.creds = None
         self._initialized = False
+        # Built API clients are cached per worker thread:
+        # each one owns its own httplib2 transport, which is not thread-safe.
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._client_stats = {
+            'builds': 0,
+            'build_time_ms': 0.0,
+            'last_build_ms': 0.0,
+            'reuses': 0,
+            'threads': 0,
+        }
+        # Identical concurrent reads share one upstream call (sits under the caches)
+        self.inflight_reads = SingleFlight()
+        # Read caches, invalidated by our own write paths
+        self.metadata_cache = TTLCache(
+            'metadata',
+            maxsize=int(os.getenv('METADATA_CACHE_SIZE', '256')),
+            ttl=float(os.getenv('METADATA_CACHE_TTL', '300'))
+        )
+        self.headers_cache = TTLCache(
+            'headers',
+            maxsize=int(os.getenv('HEADERS_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('HEADERS_CACHE_TTL', '300'))
+        )
+        # Last successful response of each read endpoint, served (marked stale)
+        # while its backend is failing. Kept across our own writes on purpose.
+        self.last_good_cache = TTLCache(
+            'last_good',
+            maxsize=int(os.getenv('LAST_GOOD_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('STALE_MAX_AGE', '86400')),
+            invalidate_on_write=False
+        )
+        self.breakers = {backend: CircuitBreaker(backend) for backend in API_VERSIONS}
+        # Called with the spreadsheet id on every invalidation (from any thread)
+        self._invalidation_listeners = []
 
     def _authenticate(self):
         if self._initialized:
@@ -49,25 +118,115 @@ class GoogleService:
         if not self._initialized:
             raise Exception("Google Services are not available. Please configure GOOGLE_APPLICATION_CREDENTIALS.")
 
-    def get_sheets_service(self):
+    def _get_client(self, api: str):
+        """
+        Returns the API client for the current thread, building it on first use.
+        """
         self._ensure_authenticated()
-        return build('sheets', 'v4', credentials=self.creds)
+
+        clients = getattr(self._local, 'clients', None)
+        if clients is None:
+            clients = self._local.clients = {}
+            with self._stats_lock:
+                self._client_stats['threads'] += 1
+
+        client = clients.get(api)
+        if client is not None:
+            with self._stats_lock:
+                self._client_stats['reuses'] += 1
+            return client
+
+        started = time.perf_counter()
+        http = AuthorizedHttp(self.creds, http=build_http())
+        client = build(api, API_VERSIONS[api], http=http, cache_discovery=False)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        clients[api] = client
+
+        with self._stats_lock:
+            self._client_stats['builds'] += 1
+            self._client_stats['build_time_ms'] += elapsed_ms
+            self._client_stats['last_build_ms'] = elapsed_ms
+        return client
+
+    def warm_up(self, apis=None):
+        """
+        Pre-builds API clients for the current thread.
+        Called at startup so the first request doesn't pay the build cost.
+        """
+        try:
+            for api in (apis or API_VERSIONS):
+                self._get_client(api)
+            return True
+        except Exception as e:
+            print(f"WARNING: Google clients warm-up skipped: {e}")
+            return False
+
+    def get_client_stats(self):
+        with self._stats_lock:
+            stats = dict(self._client_stats)
+        stats['build_time_ms'] = round(stats['build_time_ms'], 2)
+        stats['last_build_ms'] = round(stats['last_build_ms'], 2)
+        return stats
+
+    def get_sheets_service(self):
+        return self._get_client('sheets')
 
     def get_drive_service(self):
-        self._ensure_authenticated()
-        return build('drive', 'v3', credentials=self.creds)
+        return self._get_client('drive')
 
     def get_script_service(self):
-        self._ensure_authenticated()
-        return build('script', 'v1', credentials=self.creds)
+        return self._get_client('script')
+
+    def _execute(self, request, api: str, spreadsheet_id: str = None, idempotent: bool = True):
+        """
+        Runs an API request through the backend's circuit breaker and the
+        shared rate limiter (quota buckets and retries).
+        """
+        breaker = self.breakers[API_BACKENDS[api]]
+        # Fail fast before waiting for quota when the backend is known to be down
+        breaker.check()
+        return rate_limiter.execute(breaker.guard(request), api, spreadsheet_id, idempotent)
+
+    def get_breaker_stats(self):
+        return {backend: breaker.stats() for backend, breaker in self.breakers.items()}
+
+    def invalidate_spreadsheet(self, spreadsheet_id: str, ranges: list = None):
+        """
+        Drops every cached read for a spreadsheet after we wrote to it.
+        All registered caches are keyed by spreadsheet id first.
+        `ranges` are the A1 ranges written, when known; listeners use them
+        to refresh only what changed.
+        """
+        for cache in list(caches.values()):
+            if cache.invalidate_on_write:
+                cache.invalidate_spreadsheet(spreadsheet_id)
+        self.inflight_reads.forget_spreadsheet(spreadsheet_id)
+        for listener in self._invalidation_listeners:
+            listener(spreadsheet_id, ranges)
+
+    def add_invalidation_listener(self, listener):
+        """
+        Registers listener(spreadsheet_id, ranges) for data kept outside the caches
+        (e.g. sheet mirrors). `ranges` is None when what changed is unknown.
+        """
+        self._invalidation_listeners.append(listener)
 
     def get_spreadsheet_metadata(self, spreadsheet_id: str):
         """
         Fetches the title and sheet names/ids from a spreadsheet.
         This is used to render the 'Smart Overlay'.
         """
+        return self.metadata_cache.get_or_load(
+            (spreadsheet_id,),
+            lambda: self.inflight_reads.do(
+                ('metadata', spreadsheet_id),
+                lambda: self._fetch_spreadsheet_metadata(spreadsheet_id)
+            )
+        )
+
+    def _fetch_spreadsheet_metadata(self, spreadsheet_id: str):
         service = self.get_sheets_service()
-        spreadsheet = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+        spreadsheet = self._execute(service.spreadsheets().get(spreadsheetId=spreadsheet_id), 'sheets_read', spreadsheet_id)
         
         sheets = []
         for sheet in spreadsheet.get('sheets', []):
@@ -95,11 +254,20 @@ class GoogleService:
         """
         Fetches the first row of a specific sheet to display as column chips.
         """
+        return self.headers_cache.get_or_load(
+            (spreadsheet_id, sheet_name),
+            lambda: self.inflight_reads.do(
+                ('headers', spreadsheet_id, sheet_name),
+                lambda: self._fetch_sheet_headers(spreadsheet_id, sheet_name)
+            )
+        )
+
+    def _fetch_sheet_headers(self, spreadsheet_id: str, sheet_name: str):
         service = self.get_sheets_service()
         range_name = f"'{sheet_name}'!A1:Z1"
-        result = service.spreadsheets().values().get(
+        result = self._execute(service.spreadsheets().values().get(
             spreadsheetId=spreadsheet_id, range=range_name
-        ).execute()
+        ), 'sheets_read', spreadsheet_id)
         
         headers = result.get('values', [])
         if not headers:
@@ -118,6 +286,164 @@ class GoogleService:
             
         return formatted_headers
 
+    def get_sheet_values(self, spreadsheet_id: str, range_name: str):
+        """
+        Reads raw cell values from an A1 range.
+        Concurrent reads of the same range share one request, so callers
+        must not mutate the returned rows.
+        """
+        return self.inflight_reads.do(
+            ('values', spreadsheet_id, range_name),
+            lambda: self._fetch_sheet_values(spreadsheet_id, range_name)
+        )
+
+    def _fetch_sheet_values(self, spreadsheet_id: str, range_name: str):
+        service = self.get_sheets_service()
+        result = self._execute(service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id, range=range_name
+        ), 'sheets_read', spreadsheet_id)
+        return result.get('values', [])
+
+    def batch_get_values(self, spreadsheet_id: str, ranges: list, value_render_option: str = 'FORMATTED_VALUE'):
+        """
+        Reads several A1 ranges in one request.
+        Returns a list of row lists, one per range.
+        """
+        return self.inflight_reads.do(
+            ('batch_values', spreadsheet_id, tuple(ranges), value_render_option),
+            lambda: self._fetch_batch_values(spreadsheet_id, ranges, value_render_option)
+        )
+
+    def _fetch_batch_values(self, spreadsheet_id: str, ranges: list, value_render_option: str):
+        service = self.get_sheets_service()
+        result = self._execute(service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=ranges,
+            valueRenderOption=value_render_option,
+            dateTimeRenderOption='FORMATTED_STRING'
+        ), 'sheets_read', spreadsheet_id)
+        return [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+
+    def read_rows(self, spreadsheet_id: str, sheet_name: str, start_row: int, end_row: int,
+                  value_render_option: str = 'FORMATTED_VALUE'):
+        """
+        Reads rows `start_row` .. `end_row` (all columns). Trailing empty
+        rows are padded so the result always covers the whole window.
+        """
+        service = self.get_sheets_service()
+        result = self._execute(service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=f"'{sheet_name}'!{start_row}:{end_row}",
+            valueRenderOption=value_render_option,
+            dateTimeRenderOption='FORMATTED_STRING'
+        ), 'sheets_read', spreadsheet_id)
+        rows = result.get('values', [])
+        return rows + [[] for _ in range(end_row - start_row + 1 - len(rows))]
+
+    def iter_sheet_rows(self, spreadsheet_id: str, sheet_name: str, start_row: int = 1,
+                        chunk_rows: int = SHEET_CHUNK_ROWS, value_render_option: str = 'FORMATTED_VALUE'):
+        """
+        Yields (first_row_number, rows) chunks over the whole sheet, so large
+        sheets are never held in memory at once. Stops at the grid end;
+        trailing empty rows of the last chunk are dropped.
+        """
+        row_count = self.get_sheet_row_count(spreadsheet_id, sheet_name)
+        row = start_row
+        while row <= row_count:
+            end_row = min(row + chunk_rows - 1, row_count)
+            rows = self.read_rows(spreadsheet_id, sheet_name, row, end_row, value_render_option)
+            if end_row == row_count:
+                while rows and not rows[-1]:
+                    rows.pop()
+            if rows:
+                yield row, rows
+            row = end_row + 1
+
+    def get_sheet_row_count(self, spreadsheet_id: str, sheet_name: str):
+        """
+        Returns the grid row count of a sheet (includes trailing empty rows).
+        Much cheaper than reading a column to count rows.
+        """
+        return self.get_sheet_grid_size(spreadsheet_id, sheet_name)[0]
+
+    def get_sheet_grid_size(self, spreadsheet_id: str, sheet_name: str):
+        """
+        Returns the grid (row count, column count) of a sheet.
+        """
+        return self.inflight_reads.do(
+            ('grid_size', spreadsheet_id, sheet_name),
+            lambda: self._fetch_sheet_grid_size(spreadsheet_id, sheet_name)
+        )
+
+    def _fetch_sheet_grid_size(self, spreadsheet_id: str, sheet_name: str):
+        service = self.get_sheets_service()
+        result = self._execute(service.spreadsheets().get(
+            spreadsheetId=spreadsheet_id,
+            ranges=[f"'{sheet_name}'"],
+            fields='sheets(properties(gridProperties(rowCount,columnCount)))'
+        ), 'sheets_read', spreadsheet_id)
+        sheets = result.get('sheets', [])
+        if not sheets:
+            return 0, 0
+        grid = sheets[0]['properties'].get('gridProperties', {})
+        return grid.get('rowCount', 0), grid.get('columnCount', 0)
+
+    def list_files(self, folder_id: str = None, page_size: int = 20, page_token: str = None):
+        """
+        Lists one page of Drive files, optionally inside a folder.
+        """
+        service = self.get_drive_service()
+
+        # Default query: Not in trash
+        q = "trashed = false"
+        if folder_id:
+            q += f" and '{folder_id}' in parents"
+
+        return self._execute(service.files().list(
+            q=q,
+            pageSize=page_size,
+            pageToken=page_token,
+            fields="nextPageToken, files(id, name, mimeType, iconLink, webViewLink)"
+        ), 'drive')
+
+    def list_files_page(self, q: str, page_token: str = None):
+        """
+        One page of a files.list query for crawling: maximum page size and
+        only the fields the Drive index keeps. Includes shared drive items.
+        """
+        service = self.get_drive_service()
+        return self._execute(service.files().list(
+            q=q,
+            pageSize=DRIVE_MAX_PAGE_SIZE,
+            pageToken=page_token,
+            fields=f"nextPageToken, files({DRIVE_INDEX_FIELDS})",
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True
+        ), 'drive')
+
+    def get_changes_start_token(self):
+        """
+        Page token for the current end of the Drive changes feed.
+        """
+        service = self.get_drive_service()
+        result = self._execute(service.changes().getStartPageToken(supportsAllDrives=True), 'drive')
+        return result['startPageToken']
+
+    def list_changes(self, page_token: str):
+        """
+        One page of the Drive changes feed, with the indexed fields of each changed file.
+        The last page carries newStartPageToken instead of nextPageToken.
+        """
+        service = self.get_drive_service()
+        return self._execute(service.changes().list(
+            pageToken=page_token,
+            pageSize=DRIVE_MAX_PAGE_SIZE,
+            includeRemoved=True,
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True,
+            fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({DRIVE_INDEX_FIELDS}))"
+        ), 'drive')
+
     def _get_column_letter(self, n):
         string = ""
         while n > 0:
@@ -125,44 +451,49 @@ class GoogleService:
             string = chr(65 + remainder) + string
         return string
 
-    def update_script_content(self, script_id: str, code: str):
+    def update_script_content(self, script_id: str, code: str = None, files=None, force: bool = False):
         """
         Updates the content of a Google Apps Script project.
-        Equivalent to 'clasp push'.
+        Equivalent to 'clasp push': the project gets exactly the given files,
+        plus its current manifest (appsscript.json) unless one is given.
+
+        `code` is pushed as a single "Code" file; `files` may instead be a
+        {name: source} dict or a list of Apps Script file dicts. Unless `force`
+        is set, nothing is sent when every file matches the hashes of the
+        last push (no API call at all) or the project's current content.
         """
+        files = normalize_files(code, files)
+        wanted = project_hashes(files)
+
+        # 1. Same files as our last push: nothing to do
+        known = script_hashes.get(script_id)
+        if not force and known and {MANIFEST_NAME: known.get(MANIFEST_NAME), **wanted} == known:
+            return {'script_id': script_id, 'pushed': False, 'changed_files': []}
+
+        # 2. Get current content to preserve manifest
         service = self.get_script_service()
+        current_content = self._execute(service.projects().getContent(scriptId=script_id), 'script')
+        current_files = current_content.get('files', [])
+        manifest = next((f for f in current_files if f['name'] == MANIFEST_NAME), None)
 
-        # 1. Get current content to preserve manifest
-        current_content = service.projects().getContent(scriptId=script_id).execute()
-        files = current_content.get('files', [])
-
-        # 2. Find manifest (appsscript.json)
-        manifest = next((f for f in files if f['name'] == 'appsscript'), None)
-
-        # 3. Prepare new file list
-        new_files = []
-        if manifest:
-            new_files.append(manifest)
-        else:
-            # Default manifest if missing
-            new_files.append({
-                'name': 'appsscript',
-                'type': 'JSON',
-                'source': '{"timeZone":"Etc/GMT","dependencies":{},"exceptionLogging":"STACKDRIVER","runtimeVersion":"V8"}'
-            })
+        # 3. Prepare new file list: manifest first, then the given files
+        new_files = [f for f in files if f['name'] == MANIFEST_NAME]
+        if not new_files:
+            new_files.append(manifest or DEFAULT_MANIFEST)
+        new_files += [f for f in files if f['name'] != MANIFEST_NAME]
 
-        # 4. Add our new code file
-        new_files.append({
-            'name': 'Code',
-            'type': 'SERVER_JS',
-            'source': code
-        })
+        current = project_hashes(normalize_files(files=current_files))
+        target = project_hashes(new_files)
+        changed = sorted(name for name in set(current) | set(target) if current.get(name) != target.get(name))
+        if not changed and not force:
+            script_hashes.set(script_id, target)
+            return {'script_id': script_id, 'pushed': False, 'changed_files': []}
 
-        # 5. Update project
+        # 4. Update project
         request = {'files': new_files}
-        service.projects().updateContent(scriptId=script_id, body=request).execute()
-        return True
-
+        self._execute(service.projects().updateContent(scriptId=script_id, body=request), 'script')
+        script_hashes.set(script_id, target)
+        return {'script_id': script_id, 'pushed': True, 'changed_files': changed}
 
     def append_row(self, spreadsheet_id: str, range_name: str, values: list):
         """
@@ -172,10 +503,57 @@ class GoogleService:
         body = {
             'values': [values]
         }
-        result = service.spreadsheets().values().append(
-            spreadsheetId=spreadsheet_id, range=range_name,
-            valueInputOption='USER_ENTERED', body=body
-        ).execute()
+        written = None
+        try:
+            result = self._execute(service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id, range=range_name,
+                valueInputOption='USER_ENTERED', body=body
+            ), 'sheets_write', spreadsheet_id, idempotent=False)
+            # Where the rows landed is only known from the response
+            updated_range = result.get('updates', {}).get('updatedRange')
+            written = [updated_range] if updated_range else None
+        finally:
+            self.invalidate_spreadsheet(spreadsheet_id, written)
+        return result
+
+    def append_rows(self, spreadsheet_id: str, range_name: str, rows: list):
+        """
+        Appends several rows in a single request.
+        """
+        service = self.get_sheets_service()
+        body = {
+            'values': rows
+        }
+        written = None
+        try:
+            result = self._execute(service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id, range=range_name,
+                valueInputOption='USER_ENTERED', body=body
+            ), 'sheets_write', spreadsheet_id, idempotent=False)
+            # Where the rows landed is only known from the response
+            updated_range = result.get('updates', {}).get('updatedRange')
+            written = [updated_range] if updated_range else None
+        finally:
+            self.invalidate_spreadsheet(spreadsheet_id, written)
+        return result
+
+    def batch_update_values(self, spreadsheet_id: str, data: list):
+        """
+        Writes several ranges in one values.batchUpdate request.
+        `data` is a list of {'range': 'Sheet!G2', 'values': [[...]]}.
+        The request is applied as a whole: if it fails, nothing is written.
+        """
+        service = self.get_sheets_service()
+        body = {
+            'valueInputOption': 'USER_ENTERED',
+            'data': data
+        }
+        try:
+            result = self._execute(service.spreadsheets().values().batchUpdate(
+                spreadsheetId=spreadsheet_id, body=body
+            ), 'sheets_write', spreadsheet_id)
+        finally:
+            self.invalidate_spreadsheet(spreadsheet_id, [entry['range'] for entry in data])
         return result
 
     def update_cell(self, spreadsheet_id: str, range_name: str, value):
@@ -186,10 +564,13 @@ class GoogleService:
         body = {
             'values': [[value]]
         }
-        result = service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id, range=range_name,
-            valueInputOption='USER_ENTERED', body=body
-        ).execute()
+        try:
+            result = self._execute(service.spreadsheets().values().update(
+                spreadsheetId=spreadsheet_id, range=range_name,
+                valueInputOption='USER_ENTERED', body=body
+            ), 'sheets_write', spreadsheet_id)
+        finally:
+            self.invalidate_spreadsheet(spreadsheet_id, [range_name])
         return result
 
     def run_script_function(self, script_id: str, function_name: str, parameters=None):
@@ -201,7 +582,7 @@ class GoogleService:
         if parameters is not None:
             body["parameters"] = parameters
 
-        result = service.scripts().run(scriptId=script_id, body=body).execute()
+        result = self._execute(service.scripts().run(scriptId=script_id, body=body), 'script', idempotent=False)
 
         # Normalize error handling to raise Python exceptions with a friendly message
         if "error" in result:
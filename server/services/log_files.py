@@ -0,0 +1,97 @@
+import os
+
+# Bytes read per backward step when tailing a file
+TAIL_BLOCK_SIZE = 64 * 1024
+# Largest `tail` accepted by the log endpoints (server files and log sheets)
+LOG_MAX_TAIL = int(os.getenv('LOG_MAX_TAIL', '5000'))
+
+
+def get_log_dir():
+    # Default log directory (can be configured via environment variable)
+    return os.getenv('LOG_DIR', '/var/log/businessos/')
+
+
+def tail_lines(path: str, count: int, start_offset: int = 0, include_partial: bool = True, inode: int = None):
+    """
+    Returns up to `count` last lines of a file without reading it whole.
+
+    The file is read backwards in fixed-size blocks, stopping at
+    `start_offset`, so memory depends on `count`, not on file size.
+    Lines are split on b"\\n" before decoding, which never cuts a UTF-8
+    sequence in half.
+
+    Returns a dict with `lines`, `next_offset`, `inode`, `file_size`,
+    `reset` and `truncated`. `next_offset` is the byte position right after
+    the last complete line: pass it back as `start_offset` (with `inode`) to
+    get only what was appended since. If the file behind `path` is no longer
+    that inode (rotated) or is shorter than `start_offset` (truncated), it
+    is read from the start and `reset` is set. `truncated` is set when lines
+    after `start_offset` were skipped because more than `count` were there.
+    An unterminated trailing fragment (a line still being written) is
+    returned only when `include_partial` is set, and is not counted as consumed.
+    """
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        reset = start_offset > file_size or (inode is not None and inode != st.st_ino)
+        if reset:
+            start_offset = 0
+
+        # Find where the last complete line ends
+        pos = file_size
+        partial = b''
+        chunks = []
+        while pos > start_offset:
+            read_size = min(TAIL_BLOCK_SIZE, pos - start_offset)
+            pos -= read_size
+            f.seek(pos)
+            block = f.read(read_size)
+            newline = block.rfind(b'\n')
+            if newline == -1:
+                chunks.append(block)
+                continue
+            chunks.append(block[newline + 1:])
+            partial = b''.join(reversed(chunks))
+            pos += newline + 1
+            break
+        else:
+            # No newline after start_offset: everything is a partial line
+            partial = b''.join(reversed(chunks))
+            pos = start_offset
+
+        next_offset = pos
+        lines = []
+        complete = []
+        if partial and include_partial and count > 0:
+            lines.append(partial)
+
+        # Walk backwards over complete lines, starting before the final newline
+        if next_offset > start_offset:
+            pos = next_offset - 1
+            remainder = b''
+            while len(lines) + len(complete) < count:
+                if pos <= start_offset:
+                    complete.append(remainder)
+                    break
+                read_size = min(TAIL_BLOCK_SIZE, pos - start_offset)
+                pos -= read_size
+                f.seek(pos)
+                parts = (f.read(read_size) + remainder).split(b'\n')
+                remainder = parts[0]
+                for part in reversed(parts[1:]):
+                    complete.append(part)
+                    if len(lines) + len(complete) >= count:
+                        break
+
+    # Complete lines end right before next_offset, one newline each
+    first_line_start = next_offset - sum(len(line) + 1 for line in complete)
+    lines = list(reversed(complete)) + lines
+    return {
+        'lines': [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines],
+        'next_offset': next_offset,
+        'inode': st.st_ino,
+        'file_size': file_size,
+        'reset': reset,
+        'truncated': first_line_start > start_offset,
+    }
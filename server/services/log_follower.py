@@ -0,0 +1,266 @@
+import asyncio
+import os
+
+from services.executor import run_blocking
+from services.log_files import get_log_dir
+from services.log_parser import parse_file_lines
+
+try:
+    # Ships with uvicorn[standard]; uses inotify on Linux
+    from watchfiles import awatch
+except ImportError:
+    awatch = None
+
+FOLLOW_POLL_INTERVAL = float(os.getenv('LOG_FOLLOW_POLL_INTERVAL', '1.0'))
+FOLLOW_BATCH_SIZE = int(os.getenv('LOG_FOLLOW_BATCH_SIZE', '200'))
+# Bytes read per step, and the longest line kept before it is flushed as-is
+FOLLOW_READ_SIZE = 256 * 1024
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class _FollowedFile:
+    """
+    An open log file read incrementally from the last seen offset.
+    Rotation (the path now points to another inode) and truncation are
+    detected on every read; a rotated file is drained before switching.
+    """
+
+    def __init__(self, path: str, from_end: bool):
+        self.path = path
+        self.handle = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b''
+        self.rotations = 0
+        self.truncations = 0
+        self._open(from_end)
+
+    def _open(self, from_end: bool):
+        self.handle = open(self.path, 'rb')
+        st = os.fstat(self.handle.fileno())
+        self.inode = (st.st_dev, st.st_ino)
+        self.offset = st.st_size if from_end else 0
+        self.handle.seek(self.offset)
+        self.partial = b''
+
+    def _resume(self, st) -> bool:
+        """
+        Reopens the same file (closed after a read error) at the last offset.
+        Returns False if the path now holds another file or a shorter one.
+        """
+        if (st.st_dev, st.st_ino) != self.inode or st.st_size < self.offset:
+            return False
+        handle = open(self.path, 'rb')
+        opened = os.fstat(handle.fileno())
+        if (opened.st_dev, opened.st_ino) != self.inode:
+            # Rotated between stat() and open()
+            handle.close()
+            return False
+        self.handle = handle
+        self.handle.seek(self.offset)
+        return True
+
+    def close(self):
+        if self.handle:
+            self.handle.close()
+            self.handle = None
+
+    def _drain(self):
+        lines = []
+        while True:
+            chunk = self.handle.read(FOLLOW_READ_SIZE)
+            if not chunk:
+                break
+            self.offset += len(chunk)
+            parts = (self.partial + chunk).split(b'\n')
+            self.partial = parts.pop()
+            lines.extend(parts)
+            if len(self.partial) > MAX_LINE_BYTES:
+                lines.append(self.partial)
+                self.partial = b''
+        return lines
+
+    def read_new(self):
+        """
+        Returns complete lines appended since the last call.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+
+        lines = []
+        if self.handle is None:
+            if st is None:
+                return lines
+            if not self._resume(st):
+                # File re-appeared after rotation, or shrank: read it from the start
+                self._open(from_end=False)
+            return self._drain()
+
+        lines.extend(self._drain())
+        if st is None:
+            # Rotated away and not recreated yet
+            self.close()
+        elif (st.st_dev, st.st_ino) != self.inode:
+            self.rotations += 1
+            self.close()
+            self._open(from_end=False)
+            lines.extend(self._drain())
+        elif st.st_size < self.offset:
+            self.truncations += 1
+            self.handle.seek(0)
+            self.offset = 0
+            self.partial = b''
+            lines.extend(self._drain())
+        return lines
+
+
+class LogFollower:
+    """
+    Background task that follows *.log files in LOG_DIR and pushes new
+    parsed lines in batches. One incremental reader replaces every
+    client polling /api/logs/server.
+    """
+
+    def __init__(self):
+        self.log_dir = None
+        self.files = {}
+        self.mode = 'stopped'
+        self.lines_read = 0
+        self.batches_sent = 0
+        self._on_batch = None
+        self._task = None
+        self._stop_event = None
+
+    def start(self, on_batch):
+        """
+        on_batch(dict) is awaited with {"type": "logs", "file", "logs"}.
+        """
+        if self._task:
+            return
+        self.log_dir = get_log_dir()
+        self._on_batch = on_batch
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        # Let the watcher exit on its stop event before cancelling
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=FOLLOW_POLL_INTERVAL + 1)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        self._task = None
+        for followed in self.files.values():
+            followed.close()
+        self.files.clear()
+        self.mode = 'stopped'
+
+    def _scan(self, initial: bool = False):
+        """
+        Blocking: picks up new files and reads appended lines from all of them.
+        Files present at startup are followed from their end.
+        """
+        batches = []
+        try:
+            names = [n for n in os.listdir(self.log_dir) if n.endswith('.log')]
+        except FileNotFoundError:
+            names = []
+
+        for name in names:
+            if name not in self.files:
+                try:
+                    self.files[name] = _FollowedFile(os.path.join(self.log_dir, name), from_end=initial)
+                except OSError as e:
+                    print(f"⚠️ Log follower cannot open {name}: {e}")
+                    continue
+
+        for name, followed in self.files.items():
+            try:
+                raw_lines = followed.read_new()
+            except OSError as e:
+                print(f"⚠️ Log follower read error on {name}: {e}")
+                followed.close()
+                continue
+            lines = [raw.decode('utf-8', errors='replace').strip() for raw in raw_lines]
+            entries = parse_file_lines(followed.path, [line for line in lines if line])
+            self.lines_read += len(entries)
+            for i in range(0, len(entries), FOLLOW_BATCH_SIZE):
+                batches.append({
+                    "type": "logs",
+                    "file": name,
+                    "logs": entries[i:i + FOLLOW_BATCH_SIZE]
+                })
+        return batches
+
+    async def _publish(self, initial: bool = False):
+        batches = await run_blocking('files', self._scan, initial)
+        for batch in batches:
+            await self._on_batch(batch)
+            self.batches_sent += 1
+
+    async def _run(self):
+        try:
+            await self._publish(initial=True)
+            if awatch is not None:
+                try:
+                    await self._watch()
+                    return
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Log follower: file watching unavailable ({e}), polling instead")
+            await self._poll()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Log follower stopped: {e}")
+            self.mode = 'failed'
+
+    async def _sleep(self):
+        """
+        Waits one poll interval; returns True if the follower is stopping.
+        """
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), FOLLOW_POLL_INTERVAL)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _watch(self):
+        # Wait for the directory: watching a missing path fails right away
+        while not os.path.isdir(self.log_dir):
+            if await self._sleep():
+                return
+            await self._publish()
+        self.mode = 'inotify'
+        async for _ in awatch(self.log_dir, stop_event=self._stop_event, debounce=200, recursive=False):
+            await self._publish()
+
+    async def _poll(self):
+        self.mode = 'polling'
+        while not await self._sleep():
+            await self._publish()
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'log_dir': self.log_dir,
+            'lines_read': self.lines_read,
+            'batches_sent': self.batches_sent,
+            'files': {
+                name: {
+                    'offset': followed.offset,
+                    'open': followed.handle is not None,
+                    'rotations': followed.rotations,
+                    'truncations': followed.truncations,
+                }
+                for name, followed in list(self.files.items())
+            },
+        }
+
+
+log_follower = LogFollower()
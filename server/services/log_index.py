@@ -0,0 +1,477 @@
+import asyncio
+import gzip
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from services.executor import run_blocking
+from services.log_files import get_log_dir
+from services.log_parser import detect_format, parse_lines
+
+# Index LOG_DIR files in the background so /api/logs/search stays fast
+LOG_INDEX_ENABLED = os.getenv('LOG_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# SQLite file with line offsets and the full-text index (not the log text itself)
+LOG_INDEX_DB = os.getenv('LOG_INDEX_DB', 'log_index.db')
+# Seconds between background passes over LOG_DIR
+LOG_INDEX_INTERVAL = float(os.getenv('LOG_INDEX_INTERVAL', '30'))
+# Lines committed per transaction, so indexing progress survives a restart
+LOG_INDEX_BATCH_LINES = int(os.getenv('LOG_INDEX_BATCH_LINES', '5000'))
+# Bytes read per step, the longest line kept before it is indexed as-is, and how much of it is indexed
+INDEX_READ_SIZE = 1024 * 1024
+MAX_LINE_BYTES = 1024 * 1024
+MAX_INDEXED_LINE_BYTES = 64 * 1024
+
+# app.log, app.log.1, app.log.2.gz
+LOG_FILE_PATTERN = re.compile(r'\.log(\.\d+)?(\.gz)?$')
+_TIMESTAMP_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})')
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def normalize_timestamp(value):
+    """
+    "YYYY-MM-DD HH:MM:SS" (local time, as logged) from a parsed timestamp, or None.
+    """
+    if value is None:
+        return None
+    match = _TIMESTAMP_PATTERN.search(str(value))
+    if match:
+        return f"{match.group(1)} {match.group(2)}"
+    try:
+        # Epoch seconds (JSON logs)
+        return datetime.fromtimestamp(float(value)).strftime('%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def _normalize_emoji(emoji: str) -> str:
+    # "⚠️" and "⚠" are the same marker
+    return emoji.replace('\ufe0f', '')
+
+
+def fts_query(text: str) -> str:
+    """
+    Plain search words -> FTS5 query: every word must match; "word*" matches a prefix.
+    Words are split like the tokenizer does ("id=42" -> id AND 42), since the
+    index keeps no positions for phrase matching.
+    """
+    terms = []
+    for word in text.split():
+        tokens = _TOKEN_PATTERN.findall(word)
+        terms.extend(f'"{token}"' for token in tokens)
+        if tokens and word.endswith('*'):
+            terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _connect(path: str):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+class LogIndex:
+    """
+    Incremental full-text index of the log files in LOG_DIR, rotations included.
+
+    Only byte offsets, timestamps, levels and emoji markers are stored, next
+    to a contentless SQLite FTS5 index of the line text; matching lines are
+    read back from the log files with seek(). Files are tracked by inode,
+    so a rotation (app.log -> app.log.1) keeps its index and only appended
+    bytes are indexed. Results are ordered by timestamp, then line id:
+    ids follow indexing order, which is not log order once an archive is
+    re-indexed under a new inode. Compressed rotations (.gz) are
+    indexed once, with offsets into the decompressed stream. Rows of deleted files are dropped;
+    their leftover FTS entries no longer join to a line and are purged by a
+    rebuild once they outnumber the live ones.
+    """
+
+    def __init__(self, db_path: str = LOG_INDEX_DB):
+        self.db_path = db_path
+        self.log_dir = None
+        self._writer = None
+        self._readers = threading.local()
+        self._update_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._formats = {}
+        self._stopping = False
+        self._task = None
+        self._stop_event = None
+        self._last_error = None
+        self._updates = 0
+        self._lines_indexed = 0
+        self._bytes_indexed = 0
+        self._rebuilds = 0
+        self._searches = 0
+        self._last_update_ms = None
+
+    # --- SQLite (called on the files pool) ---
+
+    def _db(self):
+        with self._init_lock:
+            if self._writer is None:
+                self._writer = self._create()
+        return self._writer
+
+    def _create(self):
+        conn = _connect(self.db_path)
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS log_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL,
+                name TEXT NOT NULL,
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                compressed INTEGER NOT NULL,
+                indexed_offset INTEGER NOT NULL DEFAULT 0,
+                indexed_size INTEGER,
+                last_ts TEXT,
+                UNIQUE (device, inode)
+            );
+            CREATE TABLE IF NOT EXISTS log_lines (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_id INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                ts TEXT,
+                level TEXT,
+                emoji TEXT
+            );
+            CREATE INDEX IF NOT EXISTS log_lines_file ON log_lines (file_id);
+            CREATE INDEX IF NOT EXISTS log_lines_ts ON log_lines (ts);
+            CREATE INDEX IF NOT EXISTS log_lines_level ON log_lines (level);
+            CREATE INDEX IF NOT EXISTS log_lines_emoji ON log_lines (emoji);
+            CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5(
+                line, content='', detail=none, tokenize='unicode61'
+            );
+            CREATE TABLE IF NOT EXISTS log_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        ''')
+        conn.commit()
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            # Make sure the tables exist before the first read
+            self._db()
+            conn = self._readers.conn = _connect(self.db_path)
+        return conn
+
+    def _state(self, conn, key: str) -> int:
+        row = conn.execute('SELECT value FROM log_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_state(self, conn, key: str, value: int):
+        conn.execute('INSERT OR REPLACE INTO log_state (key, value) VALUES (?, ?)', (key, value))
+
+    # --- Indexing ---
+
+    def update(self, wait: bool = True) -> bool:
+        """
+        Indexes new and appended files in LOG_DIR. Returns False without
+        doing anything if another update is running and `wait` is not set.
+        """
+        if not self._update_lock.acquire(blocking=wait):
+            return False
+        try:
+            started = time.time()
+            self._update()
+            self._updates += 1
+            self._last_update_ms = round((time.time() - started) * 1000, 1)
+            return True
+        finally:
+            self._update_lock.release()
+
+    def _update(self):
+        self.log_dir = get_log_dir()
+        found = {}
+        if os.path.isdir(self.log_dir):
+            for name in os.listdir(self.log_dir):
+                if not LOG_FILE_PATTERN.search(name):
+                    continue
+                path = os.path.join(self.log_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found[(st.st_dev, st.st_ino)] = (path, name, st.st_size, st.st_mtime)
+
+        conn = self._db()
+        known = {(row['device'], row['inode']): row for row in conn.execute('SELECT * FROM log_files')}
+        removed = [row['id'] for key, row in known.items() if key not in found]
+        if removed:
+            with conn:
+                for file_id in removed:
+                    self._drop_lines(conn, file_id, delete_file=True)
+            self._maybe_rebuild(conn)
+            known = {(row['device'], row['inode']): row for row in conn.execute('SELECT * FROM log_files')}
+
+        # Oldest files first, so lines with equal timestamps keep their log order
+        for key, (path, name, size, _) in sorted(found.items(), key=lambda item: item[1][3]):
+            if self._stopping:
+                return
+            compressed = name.endswith('.gz')
+            row = known.get(key)
+            with conn:
+                if row is None:
+                    file_id = conn.execute(
+                        'INSERT INTO log_files (path, name, device, inode, compressed) VALUES (?, ?, ?, ?, ?)',
+                        (path, name, key[0], key[1], int(compressed))
+                    ).lastrowid
+                    offset, last_ts = 0, None
+                else:
+                    file_id, offset, last_ts = row['id'], row['indexed_offset'], row['last_ts']
+                    if row['path'] != path:
+                        # Rotated: same file, new name
+                        conn.execute('UPDATE log_files SET path = ?, name = ? WHERE id = ?', (path, name, file_id))
+                    if compressed and row['indexed_size'] == size:
+                        continue
+                    if (compressed and row['indexed_size'] is not None) or (not compressed and size < offset):
+                        # Rewritten or truncated in place: index it again from the start
+                        self._drop_lines(conn, file_id)
+                        offset, last_ts = 0, None
+            if compressed or size > offset:
+                self._index_file(conn, file_id, path, compressed, offset, last_ts, size)
+
+    def _drop_lines(self, conn, file_id: int, delete_file: bool = False):
+        dropped = conn.execute('DELETE FROM log_lines WHERE file_id = ?', (file_id,)).rowcount
+        self._set_state(conn, 'orphans', self._state(conn, 'orphans') + dropped)
+        if delete_file:
+            conn.execute('DELETE FROM log_files WHERE id = ?', (file_id,))
+        else:
+            conn.execute('UPDATE log_files SET indexed_offset = 0, indexed_size = NULL, last_ts = NULL WHERE id = ?',
+                         (file_id,))
+        self._formats.pop(file_id, None)
+
+    def _maybe_rebuild(self, conn):
+        orphans = self._state(conn, 'orphans')
+        if orphans <= max(LOG_INDEX_BATCH_LINES, conn.execute('SELECT COUNT(*) FROM log_lines').fetchone()[0]):
+            return
+        # Contentless FTS rows can't be deleted one by one: start over and re-index what's left
+        with conn:
+            conn.execute("INSERT INTO log_fts (log_fts) VALUES ('delete-all')")
+            conn.execute('DELETE FROM log_lines')
+            conn.execute('UPDATE log_files SET indexed_offset = 0, indexed_size = NULL, last_ts = NULL')
+            self._set_state(conn, 'orphans', 0)
+        self._formats.clear()
+        self._rebuilds += 1
+        print(f"🔄 Rebuilding log index ({orphans} stale entries)")
+
+    def _index_file(self, conn, file_id: int, path: str, compressed: bool, offset: int, last_ts, size: int):
+        opener = gzip.open if compressed else open
+        try:
+            with opener(path, 'rb') as f:
+                f.seek(offset)
+                pending = b''
+                batch = []
+                while not self._stopping:
+                    chunk = f.read(INDEX_READ_SIZE)
+                    if not chunk:
+                        break
+                    parts = (pending + chunk).split(b'\n')
+                    pending = parts.pop()
+                    if len(pending) > MAX_LINE_BYTES:
+                        parts.append(pending)
+                        pending = b''
+                    for part in parts:
+                        batch.append((offset, part))
+                        offset += len(part) + 1
+                    if len(batch) >= LOG_INDEX_BATCH_LINES:
+                        last_ts = self._insert(conn, file_id, batch, offset, last_ts)
+                        batch = []
+                else:
+                    return
+                if compressed and pending:
+                    # A finished file: the last line is complete even without a newline
+                    batch.append((offset, pending))
+                    offset += len(pending)
+                self._insert(conn, file_id, batch, offset, last_ts, indexed_size=size if compressed else None)
+        except (OSError, EOFError) as e:
+            # Rotated away mid-read or a damaged archive: the next pass sorts it out
+            print(f"⚠️ Could not index {path}: {e}")
+
+    def _insert(self, conn, file_id: int, batch: list, next_offset: int, last_ts, indexed_size: int = None):
+        """
+        Stores a batch of (offset, raw line) and the file's progress in one transaction.
+        Returns the timestamp of the last timestamped line.
+        """
+        lines = []
+        for offset, raw in batch:
+            text = raw[:MAX_INDEXED_LINE_BYTES].decode('utf-8', errors='replace').rstrip('\r')
+            if text.strip():
+                lines.append((offset, len(raw), text))
+
+        log_format = self._formats.get(file_id)
+        if log_format is None and lines:
+            log_format = self._formats[file_id] = detect_format([text for _, _, text in lines])
+        entries = parse_lines([text for _, _, text in lines], log_format, fill_timestamp=False)
+
+        with conn:
+            first_id = self._state(conn, 'next_id') or 1
+            rows = []
+            for line_id, ((offset, length, text), entry) in enumerate(zip(lines, entries), first_id):
+                # Continuation lines (tracebacks) take the time of the line they belong to
+                last_ts = normalize_timestamp(entry['timestamp']) or last_ts
+                rows.append((line_id, file_id, offset, length, last_ts,
+                             entry['level'].upper(), _normalize_emoji(entry['emoji']) or None, text))
+            conn.executemany('INSERT INTO log_lines (id, file_id, offset, length, ts, level, emoji) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', [row[:7] for row in rows])
+            conn.executemany('INSERT INTO log_fts (rowid, line) VALUES (?, ?)', [(row[0], row[7]) for row in rows])
+            # Ids are never reused, so leftover FTS entries can't match a new line
+            self._set_state(conn, 'next_id', first_id + len(rows))
+            conn.execute('UPDATE log_files SET indexed_offset = ?, indexed_size = ?, last_ts = ? WHERE id = ?',
+                         (next_offset, indexed_size, last_ts, file_id))
+        self._lines_indexed += len(rows)
+        self._bytes_indexed += sum(len(raw) + 1 for _, raw in batch)
+        return last_ts
+
+    # --- Search ---
+
+    def _search(self, text, level, emoji, since, until, log_file, limit, offset) -> dict:
+        sql = ('SELECT l.id, l.file_id, l.offset, l.length, l.ts, f.path, f.name, f.device, f.inode, f.compressed '
+               'FROM log_lines l JOIN log_files f ON f.id = l.file_id')
+        clauses, args = [], []
+        # Timestamp first: an archive compressed after rotation (app.log.1 -> .gz,
+        # a new inode) is re-indexed with the newest ids but holds the oldest lines
+        order = 'l.ts DESC, l.id DESC'
+        if text:
+            query = fts_query(text)
+            if not query:
+                return {'logs': [], 'has_more': False}
+            sql = sql.replace('FROM log_lines l', 'FROM log_fts JOIN log_lines l ON l.id = log_fts.rowid')
+            clauses.append('log_fts MATCH ?')
+            args.append(query)
+        if level:
+            clauses.append('l.level = ?')
+            args.append(level.upper())
+        if emoji:
+            clauses.append('l.emoji = ?')
+            args.append(_normalize_emoji(emoji))
+        if since:
+            clauses.append('l.ts >= ?')
+            args.append(since.replace('T', ' '))
+        if until:
+            # "~" sorts after digits, so a date or minute includes all of it
+            clauses.append('l.ts <= ?')
+            args.append(until.replace('T', ' ') + '~')
+        if log_file:
+            clauses.append('f.name = ?')
+            args.append(log_file)
+
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += f' ORDER BY {order} LIMIT ? OFFSET ?'
+        rows = self._reader().execute(sql, args + [limit + 1, offset]).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        texts = self._read_lines(rows)
+        logs = []
+        for row in rows:
+            line = texts.get(row['id'])
+            if line is None:
+                continue
+            entry = parse_lines([line], self._formats.get(row['file_id']), fill_timestamp=False)[0]
+            if entry['timestamp'] is None:
+                entry['timestamp'] = row['ts']
+            entry.update(file=row['name'], offset=row['offset'])
+            logs.append(entry)
+        return {'logs': logs, 'has_more': has_more}
+
+    def _read_lines(self, rows) -> dict:
+        """
+        Reads the matching lines with seek(), one open per file, in offset order.
+        Lines of files that were replaced since they were indexed are skipped.
+        """
+        by_file = {}
+        for row in rows:
+            by_file.setdefault(row['file_id'], []).append(row)
+        texts = {}
+        for file_rows in by_file.values():
+            first = file_rows[0]
+            opener = gzip.open if first['compressed'] else open
+            try:
+                with opener(first['path'], 'rb') as f:
+                    st = os.stat(first['path'])
+                    if (st.st_dev, st.st_ino) != (first['device'], first['inode']):
+                        continue
+                    for row in sorted(file_rows, key=lambda r: r['offset']):
+                        f.seek(row['offset'])
+                        raw = f.read(row['length'])
+                        texts[row['id']] = raw.decode('utf-8', errors='replace').rstrip('\r')
+            except (OSError, EOFError):
+                continue
+        return texts
+
+    async def search(self, text: str = None, level: str = None, emoji: str = None, since: str = None,
+                     until: str = None, log_file: str = None, limit: int = 100, offset: int = 0) -> dict:
+        """
+        Matching lines in log order, newest first. New lines are indexed
+        before searching, unless a long indexing pass is already running.
+        """
+        started = time.time()
+        await run_blocking('files', self.update, False)
+        result = await run_blocking('files', self._search, text, level, emoji, since, until, log_file, limit, offset)
+        self._searches += 1
+        result['took_ms'] = round((time.time() - started) * 1000, 1)
+        return result
+
+    # --- Background task ---
+
+    def start(self):
+        if self._task or not LOG_INDEX_ENABLED:
+            return
+        self._stopping = False
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._task:
+            self._stop_event.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._task = None
+        if self._writer is not None and self._update_lock.acquire(timeout=5):
+            try:
+                self._writer.close()
+                self._writer = None
+            finally:
+                self._update_lock.release()
+
+    async def _run(self):
+        while True:
+            try:
+                await run_blocking('files', self.update, False)
+                self._last_error = None
+            except Exception as e:
+                if str(e) != self._last_error:
+                    print(f"⚠️ Log indexing failed: {e}")
+                    self._last_error = str(e)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), LOG_INDEX_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self):
+        return {
+            'enabled': LOG_INDEX_ENABLED,
+            'running': self._task is not None,
+            'log_dir': self.log_dir,
+            'updates': self._updates,
+            'last_update_ms': self._last_update_ms,
+            'lines_indexed': self._lines_indexed,
+            'bytes_indexed': self._bytes_indexed,
+            'rebuilds': self._rebuilds,
+            'searches': self._searches,
+            'last_error': self._last_error,
+        }
+
+
+log_index = LogIndex()
@@ -0,0 +1,207 @@
+import json
+import re
+from datetime import datetime
+
+# Common emoji markers used in logs, in priority order: a line with several
+# markers is tagged with the one listed first
+EMOJI_MARKERS = ['🚀', '⏳', '📥', '✅', '✏️', '⚠️', '❌', '🏁', '🐛', '🔄', '📤', '🗑️', '➕']
+
+# Any other emoji: known markers first in the alternation (so "✏️" keeps
+# its variation selector), then the usual emoji ranges
+EMOJI_PATTERN = re.compile(
+    "(?:" + "|".join(re.escape(marker) for marker in EMOJI_MARKERS) + ")"
+    "|["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+"
+)
+
+# Number of lines used to pick the format of a file
+DETECT_SAMPLE_SIZE = 50
+
+
+def extract_emoji(text: str) -> str:
+    """
+    Extract the emoji marker of a text string: the highest-priority known
+    marker it contains, else the first other emoji.
+    """
+    if text.isascii():
+        return ''
+    for marker in EMOJI_MARKERS:
+        if marker in text:
+            return marker
+    match = EMOJI_PATTERN.search(text)
+    return match.group() if match else ''
+
+
+def _entry(timestamp: str, level: str, message: str, **extra) -> dict:
+    entry = {
+        "timestamp": timestamp,
+        "level": level,
+        "message": message,
+        "emoji": extract_emoji(message),
+        "source": "server-files"
+    }
+    entry.update(extra)
+    return entry
+
+
+class LogFormat:
+    """
+    A named log line format: `parse(line)` returns an entry dict,
+    or None when the line doesn't match. Entries from formats without
+    timestamps have timestamp None; callers fill in the read time.
+    """
+
+    def __init__(self, name: str, parse):
+        self.name = name
+        self.parse = parse
+
+
+# Registered formats, tried in order
+LOG_FORMATS = []
+
+
+def register_format(name: str, parse):
+    log_format = LogFormat(name, parse)
+    LOG_FORMATS.append(log_format)
+    return log_format
+
+
+def _regex_format(pattern: str):
+    # Groups: timestamp (may be empty), level, message
+    compiled = re.compile(pattern)
+
+    def parse(line: str):
+        match = compiled.match(line)
+        if not match:
+            return None
+        return _entry(match.group(1) or None, match.group(2), match.group(3))
+    return parse
+
+
+# [2024-12-08 14:30:45] INFO: Message
+register_format('bracketed', _regex_format(r'\[([^\]]+)\]\s*(\w+):\s*(.+)'))
+
+# 2024-12-08 14:30:45 - INFO - Message
+register_format('dashed', _regex_format(r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})\s*-\s*(\w+)\s*-\s*(.+)'))
+
+
+def _parse_json_line(line: str):
+    # {"timestamp": "...", "level": "INFO", "message": "..."}
+    if not line.startswith('{'):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    message = record.get('message', record.get('msg'))
+    if message is None:
+        return None
+    timestamp = record.get('timestamp') or record.get('time') or record.get('asctime') or record.get('ts')
+    level = record.get('level') or record.get('levelname') or 'INFO'
+    extra = {key: record[key] for key in ('function', 'details') if key in record}
+    return _entry(str(timestamp) if timestamp else None, str(level).upper(), str(message), **extra)
+
+
+register_format('json', _parse_json_line)
+
+# INFO:     127.0.0.1:50312 - "GET /api/logs/server HTTP/1.1" 200 OK
+UVICORN_ACCESS_PATTERN = re.compile(
+    r'(\w+):\s+(\S+) - "(\w+) (\S+) [^"]*" (\d{3})(?: .*)?$'
+)
+
+
+def _parse_uvicorn_access(line: str):
+    match = UVICORN_ACCESS_PATTERN.match(line)
+    if not match:
+        return None
+    level, client, method, path, status = match.groups()
+    return _entry(None, level, f"{method} {path} {status}",
+                  client=client, method=method, path=path, status=int(status))
+
+
+register_format('uvicorn_access', _parse_uvicorn_access)
+
+# INFO:     Started server process [4651]
+register_format('uvicorn', _regex_format(r'()(DEBUG|INFO|WARNING|ERROR|CRITICAL):\s+(.+)'))
+
+
+def _fallback(line: str, timestamp: str) -> dict:
+    # Unknown format: return as-is
+    return _entry(timestamp, "INFO", line)
+
+
+def parse_log_line(line: str) -> dict:
+    """
+    Parse a single log line into structured format.
+    Attempts to extract: timestamp, level, message
+    """
+    now = datetime.now().isoformat()
+    for log_format in LOG_FORMATS:
+        entry = log_format.parse(line)
+        if entry is not None:
+            if entry["timestamp"] is None:
+                entry["timestamp"] = now
+            return entry
+    return _fallback(line, now)
+
+
+def detect_format(lines: list):
+    """
+    Picks the registered format that matches most of a sample of lines.
+    """
+    sample = [line for line in lines[:DETECT_SAMPLE_SIZE] if line]
+    best, best_hits = None, 0
+    for log_format in LOG_FORMATS:
+        hits = sum(1 for line in sample if log_format.parse(line) is not None)
+        if hits > best_hits:
+            best, best_hits = log_format, hits
+    return best
+
+
+def parse_lines(lines: list, log_format: LogFormat = None, fill_timestamp: bool = True) -> list:
+    """
+    Parses a batch of lines. The format is detected once for the batch;
+    lines it doesn't match (e.g. tracebacks, mixed uvicorn output) fall
+    back to trying every format. Without `fill_timestamp`, lines without
+    a timestamp keep timestamp None instead of getting the read time.
+    """
+    if log_format is None:
+        log_format = detect_format(lines)
+    now = datetime.now().isoformat()
+    entries = []
+    for line in lines:
+        entry = log_format.parse(line) if log_format else None
+        if entry is None:
+            for other in LOG_FORMATS:
+                if other is not log_format:
+                    entry = other.parse(line)
+                    if entry is not None:
+                        break
+        if entry is None:
+            entry = _fallback(line, now if fill_timestamp else None)
+        elif entry["timestamp"] is None and fill_timestamp:
+            # Format without timestamps (uvicorn): use read time
+            entry["timestamp"] = now
+        entries.append(entry)
+    return entries
+
+
+# Detected format per log file path, so each file is sniffed only once
+_file_formats = {}
+
+
+def parse_file_lines(path: str, lines: list) -> list:
+    log_format = _file_formats.get(path)
+    if log_format is None:
+        log_format = detect_format(lines)
+        if log_format is not None:
+            _file_formats[path] = log_format
+    return parse_lines(lines, log_format)
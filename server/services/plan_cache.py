@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import time
+
+from services.cache import MISSING, TTLCache
+from services.gemini_client import GEMINI_MODEL
+from services.agent_actions import normalize_actions
+
+PLAN_CACHE_SIZE = int(os.getenv('PLAN_CACHE_SIZE', '512'))
+PLAN_CACHE_TTL = float(os.getenv('PLAN_CACHE_TTL', '3600'))
+# Optional JSON file to keep cached plans across restarts
+PLAN_CACHE_FILE = os.getenv('PLAN_CACHE_FILE')
+
+# Only answers are safe to replay: write actions must always run the model
+CACHEABLE_ACTIONS = {'ANSWER'}
+
+
+def normalize_prompt(prompt: str) -> str:
+    return ' '.join(prompt.lower().split()).strip(' ?!.')
+
+
+class PlanCache:
+    """
+    Content-addressed cache of agent action plans.
+
+    The key hashes the normalized prompt, the sheet and a digest of the
+    sheet context the model saw, so an unchanged question about unchanged
+    data reuses the previous plan instead of a Gemini round trip.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache('agent_plans', maxsize=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL)
+
+    @staticmethod
+    def make_key(prompt: str, spreadsheet_id: str, sheet_name: str, sheet_context: str):
+        context_digest = hashlib.sha256(sheet_context.encode('utf-8')).hexdigest()
+        content = json.dumps(
+            [GEMINI_MODEL, normalize_prompt(prompt), spreadsheet_id, sheet_name, context_digest],
+            ensure_ascii=False
+        )
+        # Spreadsheet id first: writes to the spreadsheet invalidate its plans
+        return (spreadsheet_id, hashlib.sha256(content.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        plan = self._cache.get(key)
+        return None if plan is MISSING else plan
+
+    def put(self, key, plan: dict):
+        actions = normalize_actions(plan)
+        if actions and all(action['action'] in CACHEABLE_ACTIONS for action in actions):
+            self._cache.set(key, plan)
+
+    def load(self):
+        if not PLAN_CACHE_FILE or not os.path.exists(PLAN_CACHE_FILE):
+            return 0
+        try:
+            with open(PLAN_CACHE_FILE, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load agent plan cache: {e}")
+            return 0
+        now = time.time()
+        loaded = 0
+        for entry in entries:
+            remaining = entry['expires_at'] - now
+            if remaining > 0:
+                self._cache.set(tuple(entry['key']), entry['plan'], ttl=remaining)
+                loaded += 1
+        return loaded
+
+    def save(self):
+        if not PLAN_CACHE_FILE:
+            return 0
+        now = time.time()
+        entries = [
+            {'key': list(key), 'plan': plan, 'expires_at': now + remaining}
+            for key, plan, remaining in self._cache.export()
+        ]
+        tmp_path = f"{PLAN_CACHE_FILE}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, PLAN_CACHE_FILE)
+        except OSError as e:
+            print(f"⚠️ Could not save agent plan cache: {e}")
+            return 0
+        return len(entries)
+
+
+plan_cache = PlanCache()
@@ -0,0 +1,229 @@
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from googleapiclient.errors import HttpError
+
+# Requests per minute per bucket. Defaults follow Google's published per-user
+# quotas: the app calls every API as one service account, so the per-user
+# limit is the one it hits first. Raise them if the Cloud project has more.
+API_QUOTAS = {
+    'sheets_read': int(os.getenv('SHEETS_READ_QUOTA', '60')),
+    'sheets_write': int(os.getenv('SHEETS_WRITE_QUOTA', '60')),
+    'drive': int(os.getenv('DRIVE_QUOTA', '12000')),
+    'script': int(os.getenv('SCRIPT_QUOTA', '60')),
+}
+# Share of the Sheets quota one spreadsheet may use, so a hot sheet can't starve the rest
+SPREADSHEET_QUOTA = int(os.getenv('SHEETS_PER_SPREADSHEET_QUOTA', '30'))
+# Burst size of every bucket, in seconds of its rate
+RATE_LIMIT_BURST_SECONDS = float(os.getenv('RATE_LIMIT_BURST_SECONDS', '10'))
+
+GOOGLE_MAX_RETRIES = int(os.getenv('GOOGLE_MAX_RETRIES', '4'))
+GOOGLE_BACKOFF_BASE = float(os.getenv('GOOGLE_BACKOFF_BASE', '1.0'))
+GOOGLE_BACKOFF_MAX = float(os.getenv('GOOGLE_BACKOFF_MAX', '32'))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Drive and the Apps Script API report rate limits as 403 with one of these reasons
+RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded', b'RESOURCE_EXHAUSTED')
+
+# Lower value goes first
+PRIORITIES = {'interactive': 0, 'background': 1}
+
+_priority = contextvars.ContextVar('google_request_priority', default='interactive')
+
+
+@contextmanager
+def background_priority():
+    """
+    Google calls made inside this block (including ones handed to the
+    backend thread pools) wait behind interactive requests for quota.
+    """
+    token = _priority.set('background')
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_background() -> bool:
+    return _priority.get() == 'background'
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `per_minute / 60` tokens per second.
+    Waiters are served strictly by priority, then arrival order.
+    """
+
+    def __init__(self, name: str, per_minute: int, burst_seconds: float = RATE_LIMIT_BURST_SECONDS):
+        self.name = name
+        self.per_minute = max(1, per_minute)
+        self.rate = self.per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_ms_total = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: str = 'interactive'):
+        started = time.monotonic()
+        entry = (PRIORITIES.get(priority, 0), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and self._tokens >= 1 and now >= self._paused_until:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        break
+                    if now < self._paused_until:
+                        timeout = self._paused_until - now
+                    else:
+                        timeout = max((1 - self._tokens) / self.rate, 0.001)
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                raise
+            finally:
+                self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            self.acquired += 1
+            if waited > 0.001:
+                self.throttled += 1
+                self.wait_ms_total += waited * 1000
+
+    def pause(self, seconds: float):
+        """
+        Stops handing out tokens for `seconds` (after the API said we are over quota).
+        """
+        with self._cond:
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+            self._paused_until = max(self._paused_until, self._updated + seconds)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'per_minute': self.per_minute,
+                'capacity': round(self.capacity, 2),
+                'level': round(self._tokens, 2),
+                'paused_for': round(max(0.0, self._paused_until - now), 2),
+                'waiting': len(self._waiters),
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'avg_wait_ms': round(self.wait_ms_total / self.throttled, 2) if self.throttled else 0.0,
+            }
+
+
+def _retry_after(error: HttpError):
+    value = error.resp.get('retry-after') if error.resp is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_rate_limit(error: HttpError):
+    status = error.resp.status
+    if status == 429:
+        return True
+    return status == 403 and any(reason in (error.content or b'') for reason in RATE_LIMIT_REASONS)
+
+
+class RateLimiter:
+    """
+    Central scheduler for Google API requests: every request takes a token
+    from its API bucket (and, for Sheets, its spreadsheet's bucket), then
+    runs with retries on rate limits and 5xx errors. Retries use exponential
+    backoff with full jitter, or the server's Retry-After when it sends one.
+    Requests that are not safe to repeat (appends, script runs) are only
+    retried on rate limits, which the API rejects before doing anything.
+    """
+
+    def __init__(self):
+        self.buckets = {name: TokenBucket(name, quota) for name, quota in API_QUOTAS.items()}
+        self._spreadsheet_buckets = {}
+        self._lock = threading.Lock()
+        self._retries = {name: 0 for name in self.buckets}
+        self._rate_limited = {name: 0 for name in self.buckets}
+        self._gave_up = {name: 0 for name in self.buckets}
+
+    def _spreadsheet_bucket(self, spreadsheet_id: str):
+        with self._lock:
+            bucket = self._spreadsheet_buckets.get(spreadsheet_id)
+            if bucket is None:
+                bucket = self._spreadsheet_buckets[spreadsheet_id] = TokenBucket(spreadsheet_id, SPREADSHEET_QUOTA)
+            return bucket
+
+    def _count(self, counter: dict, api: str):
+        with self._lock:
+            counter[api] += 1
+
+    def execute(self, request, api: str, spreadsheet_id: str = None, idempotent: bool = True):
+        """
+        Runs `request.execute()` under the quota of `api` and returns its result.
+        Blocks the calling worker thread while waiting for quota or backing off.
+        """
+        priority = _priority.get()
+        bucket = self.buckets[api]
+        attempt = 0
+        while True:
+            if spreadsheet_id:
+                self._spreadsheet_bucket(spreadsheet_id).acquire(priority)
+            bucket.acquire(priority)
+            try:
+                return request.execute()
+            except HttpError as e:
+                rate_limited = _is_rate_limit(e)
+                retryable = rate_limited or (idempotent and e.resp.status in RETRY_STATUS_CODES)
+                if rate_limited:
+                    self._count(self._rate_limited, api)
+                if not retryable or attempt >= GOOGLE_MAX_RETRIES:
+                    if retryable:
+                        self._count(self._gave_up, api)
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(GOOGLE_BACKOFF_MAX, GOOGLE_BACKOFF_BASE * 2 ** attempt))
+                if rate_limited:
+                    # Everyone using this quota would get the same answer
+                    bucket.pause(delay)
+                print(f"⏳ {api} request failed with {e.resp.status}, retry {attempt + 1} in {delay:.1f}s")
+            attempt += 1
+            self._count(self._retries, api)
+            time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            spreadsheet_buckets = dict(self._spreadsheet_buckets)
+            return {
+                'buckets': {name: bucket.stats() for name, bucket in self.buckets.items()},
+                'spreadsheets': {sid: bucket.stats() for sid, bucket in spreadsheet_buckets.items()},
+                'retries': dict(self._retries),
+                'rate_limited': dict(self._rate_limited),
+                'gave_up': dict(self._gave_up),
+            }
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import threading
+
+# JSON file with the content hashes of the last push per script id
+SCRIPT_HASHES_FILE = os.getenv('SCRIPT_HASHES_FILE', 'script_hashes.json')
+
+MANIFEST_NAME = 'appsscript'
+DEFAULT_MANIFEST = {
+    'name': MANIFEST_NAME,
+    'type': 'JSON',
+    'source': '{"timeZone":"Etc/GMT","dependencies":{},"exceptionLogging":"STACKDRIVER","runtimeVersion":"V8"}'
+}
+
+
+def normalize_files(code: str = None, files=None) -> list:
+    """
+    Accepts a single code string (pushed as "Code"), a {name: source} dict
+    or a list of Apps Script file dicts, and returns file dicts.
+    """
+    if files is None:
+        files = {'Code': code}
+    if isinstance(files, dict):
+        files = [
+            {'name': name, 'type': 'JSON' if name == MANIFEST_NAME else 'SERVER_JS', 'source': source}
+            for name, source in files.items()
+        ]
+    return [{'name': f['name'], 'type': f.get('type', 'SERVER_JS'), 'source': f['source']} for f in files]
+
+
+def file_hash(file: dict) -> str:
+    content = f"{file['name']}\0{file['type']}\0{file['source']}"
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def project_hashes(files: list) -> dict:
+    return {f['name']: file_hash(f) for f in files}
+
+
+class ScriptHashStore:
+    """
+    Per-file content hashes of what was last pushed to each script project,
+    kept in memory and in SCRIPT_HASHES_FILE so unchanged pushes can be
+    skipped without asking the API for the current content.
+    """
+
+    def __init__(self, path: str = SCRIPT_HASHES_FILE):
+        self.path = path
+        self._hashes = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._hashes is not None:
+            return
+        self._hashes = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._hashes = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load script hashes: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._hashes, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save script hashes: {e}")
+
+    def get(self, script_id: str) -> dict:
+        with self._lock:
+            self._load()
+            return dict(self._hashes.get(script_id, {}))
+
+    def set(self, script_id: str, hashes: dict):
+        with self._lock:
+            self._load()
+            if self._hashes.get(script_id) == hashes:
+                return
+            self._hashes[script_id] = hashes
+            self._save()
+
+    def forget(self, script_id: str):
+        with self._lock:
+            self._load()
+            if self._hashes.pop(script_id, None) is not None:
+                self._save()
+
+
+script_hashes = ScriptHashStore()
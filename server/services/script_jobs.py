@@ -0,0 +1,285 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from services.executor import run_blocking
+from services.script_runs import execute_script, invalidate_after_run, run_key
+
+# SQLite file with job records (relative paths are resolved from the working directory)
+SCRIPT_JOBS_DB = os.getenv('SCRIPT_JOBS_DB', 'script_jobs.db')
+# Jobs running at once per Apps Script project (sk/mt/ss share EcosystemLib, so one limit)
+SCRIPT_JOB_CONCURRENCY = int(os.getenv('SCRIPT_JOB_CONCURRENCY', '2'))
+# Finished jobs older than this are deleted at startup
+SCRIPT_JOB_RETENTION_DAYS = int(os.getenv('SCRIPT_JOB_RETENTION_DAYS', '7'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+STATUS_EMOJI = {QUEUED: '🕒', RUNNING: '🚀', SUCCEEDED: '✅', FAILED: '❌'}
+
+_COLUMNS = ('id', 'project_id', 'script_id', 'function_name', 'parameters', 'spreadsheet_id',
+            'status', 'result', 'error', 'created_at', 'started_at', 'finished_at')
+# Stored as JSON text
+_JSON_COLUMNS = ('parameters', 'result')
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ScriptJobs:
+    """
+    Background Apps Script runs.
+
+    submit() stores a queued job and returns it at once; the run happens in
+    a task limited to SCRIPT_JOB_CONCURRENCY jobs per script id. Every
+    status change is written to SQLite and passed to `on_update` (pushed
+    over /ws/logs). Queued jobs are resumed after a restart; jobs that were
+    running are marked failed, since a script run can't be safely repeated.
+    """
+
+    def __init__(self, db_path: str = SCRIPT_JOBS_DB, concurrency: int = SCRIPT_JOB_CONCURRENCY):
+        self.db_path = db_path
+        self.concurrency = max(1, concurrency)
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._semaphores = {}
+        self._tasks = set()
+        self._running = {}
+        # Queued or running jobs by (script, function, parameters)
+        self._active = {}
+        self._on_update = None
+        self._submitted = 0
+        self._joined = 0
+        self._succeeded = 0
+        self._failed = 0
+
+    # --- SQLite (called on the files pool) ---
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS script_jobs (
+                    id TEXT PRIMARY KEY,
+                    project_id TEXT NOT NULL,
+                    script_id TEXT NOT NULL,
+                    function_name TEXT NOT NULL,
+                    parameters TEXT,
+                    spreadsheet_id TEXT,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS script_jobs_created ON script_jobs (created_at)')
+            self._conn.commit()
+        return self._conn
+
+    def _row_to_job(self, row) -> dict:
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def _save(self, job: dict):
+        values = [json.dumps(job[c], ensure_ascii=False) if c in _JSON_COLUMNS and job[c] is not None else job[c]
+                  for c in _COLUMNS]
+        with self._db_lock:
+            conn = self._db()
+            conn.execute(
+                f"INSERT OR REPLACE INTO script_jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                values
+            )
+            conn.commit()
+
+    def _load(self, job_id: str):
+        with self._db_lock:
+            row = self._db().execute('SELECT * FROM script_jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def _query(self, status: str = None, project_id: str = None, limit: int = 50):
+        sql = 'SELECT * FROM script_jobs'
+        clauses, args = [], []
+        if status:
+            clauses.append('status = ?')
+            args.append(status)
+        if project_id:
+            clauses.append('project_id = ?')
+            args.append(project_id)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY created_at DESC LIMIT ?'
+        args.append(limit)
+        with self._db_lock:
+            rows = self._db().execute(sql, args).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def _recover(self):
+        """
+        Applies retention, fails jobs cut off by a restart and returns the queued ones.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=SCRIPT_JOB_RETENTION_DAYS)).isoformat()
+        with self._db_lock:
+            conn = self._db()
+            conn.execute('DELETE FROM script_jobs WHERE status IN (?, ?) AND finished_at < ?',
+                         (SUCCEEDED, FAILED, cutoff))
+            conn.execute('UPDATE script_jobs SET status = ?, error = ?, finished_at = ? WHERE status = ?',
+                         (FAILED, 'Interrupted by server restart', _now(), RUNNING))
+            conn.commit()
+            rows = conn.execute('SELECT * FROM script_jobs WHERE status = ? ORDER BY created_at',
+                                (QUEUED,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    # --- Jobs ---
+
+    async def start(self, on_update=None):
+        self._on_update = on_update
+        queued = await run_blocking('files', self._recover)
+        if queued:
+            print(f"🕒 Resuming {len(queued)} queued script jobs")
+        for job in queued:
+            self._schedule(job)
+
+    async def stop(self):
+        # Queued jobs stay queued and are resumed on the next start
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+                self._conn = None
+
+    async def submit(self, project_id: str, script_id: str, function_name: str,
+                     parameters=None, spreadsheet_id: str = None) -> dict:
+        """
+        Queues a run, or returns the queued/running job for the same call (e.g. a double click).
+        """
+        key = run_key(script_id, function_name, parameters)
+        active = self._active.get(key)
+        if active is not None:
+            self._joined += 1
+            return active
+        job = {
+            'id': uuid.uuid4().hex,
+            'project_id': project_id,
+            'script_id': script_id,
+            'function_name': function_name,
+            'parameters': parameters,
+            'spreadsheet_id': spreadsheet_id,
+            'status': QUEUED,
+            'result': None,
+            'error': None,
+            'created_at': _now(),
+            'started_at': None,
+            'finished_at': None,
+        }
+        # Registered before the first await, so a concurrent identical submit joins this job
+        self._active[key] = job
+        try:
+            await run_blocking('files', self._save, job)
+        except Exception:
+            del self._active[key]
+            raise
+        self._submitted += 1
+        await self._notify(job)
+        self._schedule(job)
+        return job
+
+    async def get(self, job_id: str):
+        return await run_blocking('files', self._load, job_id)
+
+    async def list(self, status: str = None, project_id: str = None, limit: int = 50):
+        return await run_blocking('files', self._query, status, project_id, limit)
+
+    def _schedule(self, job: dict):
+        key = run_key(job['script_id'], job['function_name'], job['parameters'])
+        self._active[key] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+
+        def done(task):
+            self._tasks.discard(task)
+            if self._active.get(key) is job:
+                del self._active[key]
+
+        task.add_done_callback(done)
+
+    async def _run(self, job: dict):
+        semaphore = self._semaphores.setdefault(job['script_id'], asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            self._running[job['script_id']] = self._running.get(job['script_id'], 0) + 1
+            try:
+                await self._execute(job)
+            finally:
+                self._running[job['script_id']] -= 1
+
+    async def _execute(self, job: dict):
+        job.update(status=RUNNING, started_at=_now())
+        await run_blocking('files', self._save, job)
+        await self._notify(job)
+        try:
+            job['result'], _ = await execute_script(job['script_id'], job['function_name'], job['parameters'])
+            job['status'] = SUCCEEDED
+            self._succeeded += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Script job {job['id']} ({job['function_name']}) failed: {type(e).__name__}: {e}")
+            job['status'] = FAILED
+            job['error'] = str(e)
+            self._failed += 1
+        finally:
+            invalidate_after_run(job['project_id'], job['script_id'], job['function_name'], job['spreadsheet_id'])
+        job['finished_at'] = _now()
+        await run_blocking('files', self._save, job)
+        await self._notify(job)
+
+    async def _notify(self, job: dict):
+        if self._on_update is None:
+            return
+        status = job['status']
+        message = f"{STATUS_EMOJI[status]} {job['function_name']} ({job['project_id']}): {status}"
+        if job['error']:
+            message += f" - {job['error']}"
+        try:
+            # Shaped like a log entry so log viewers show it as a line
+            await self._on_update({
+                "type": "job",
+                "job": job,
+                "timestamp": _now(),
+                "level": "ERROR" if status == FAILED else "INFO",
+                "message": message,
+                "function": job['function_name'],
+                "emoji": STATUS_EMOJI[status],
+                "source": "script-jobs",
+            })
+        except Exception as e:
+            print(f"⚠️ Script job update not delivered: {e}")
+
+    def stats(self):
+        return {
+            'concurrency_per_script': self.concurrency,
+            'active_tasks': len(self._tasks),
+            'running': dict(self._running),
+            'submitted': self._submitted,
+            'joined': self._joined,
+            'succeeded': self._succeeded,
+            'failed': self._failed,
+        }
+
+
+script_jobs = ScriptJobs()
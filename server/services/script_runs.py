@@ -0,0 +1,68 @@
+import json
+import os
+
+from services.async_google import async_google_service
+from services.cache import MISSING, TTLCache
+from services.google_service import google_service
+from services.singleflight import AsyncSingleFlight
+from config.projects import PROJECT_SPREADSHEET_IDS, READ_ONLY_SCRIPT_FUNCTIONS
+
+# Identical concurrent runs (script, function, parameters) share one execution
+inflight_runs = AsyncSingleFlight()
+# Results of READ_ONLY_SCRIPT_FUNCTIONS, keyed by script id first
+script_results_cache = TTLCache(
+    'script_results',
+    maxsize=int(os.getenv('SCRIPT_RESULT_CACHE_SIZE', '256')),
+    ttl=float(os.getenv('SCRIPT_RESULT_CACHE_TTL', '300'))
+)
+
+
+def is_read_only(function_name: str) -> bool:
+    return function_name in READ_ONLY_SCRIPT_FUNCTIONS
+
+
+def run_key(script_id: str, function_name: str, parameters) -> tuple:
+    return (script_id, function_name, json.dumps(parameters, sort_keys=True, ensure_ascii=False))
+
+
+async def execute_script(script_id: str, function_name: str, parameters=None):
+    """
+    Runs an Apps Script function, saving execution-time quota where possible:
+    a call identical to one already running waits for that run's result,
+    and read-only functions are answered from cache within their TTL.
+    Returns (result, source) with source 'executed', 'shared' or 'cached'.
+    """
+    key = run_key(script_id, function_name, parameters)
+    read_only = is_read_only(function_name)
+    if read_only:
+        cached = script_results_cache.get(key)
+        if cached is not MISSING:
+            return cached, 'cached'
+
+    executed = False
+
+    async def execute():
+        nonlocal executed
+        executed = True
+        result = await async_google_service.run_script_function(script_id, function_name, parameters)
+        if read_only:
+            script_results_cache.set(key, result)
+        return result
+
+    result = await inflight_runs.do(key, execute)
+    return result, 'executed' if executed else 'shared'
+
+
+def invalidate_after_run(project_key: str, script_id: str, function_name: str, spreadsheet_id: str = None):
+    """
+    The script may have written to the project's sheets: drop cached reads,
+    including cached results of the same script's read-only functions.
+    """
+    if is_read_only(function_name):
+        return
+    script_results_cache.invalidate_spreadsheet(script_id)
+    touched = list(PROJECT_SPREADSHEET_IDS.get(project_key, []))
+    if spreadsheet_id:
+        touched.append(spreadsheet_id)
+    for touched_id in touched:
+        google_service.invalidate_spreadsheet(touched_id)
@@ -0,0 +1,215 @@
+import asyncio
+import csv
+import io
+import json
+import os
+
+from services.async_google import async_google_service
+from services.google_service import SHEET_CHUNK_ROWS
+from services.rate_limiter import background_priority
+from services.sheet_mirror import column_letter, column_names
+
+try:
+    # Optional: only needed for format=arrow / format=parquet
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Row chunks (of SHEET_CHUNK_ROWS rows) read per values.batchGet call while exporting
+EXPORT_RANGES_PER_REQUEST = int(os.getenv('EXPORT_RANGES_PER_REQUEST', '5'))
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+ARROW_FORMATS = {'arrow', 'parquet'}
+
+
+class ExportError(ValueError):
+    """
+    An export that can't be produced (unknown format, missing optional dependency...).
+    """
+
+
+def check_format(export_format: str):
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format '{export_format}' (use {', '.join(EXPORT_FORMATS)})")
+    if export_format in ARROW_FORMATS and pyarrow is None:
+        raise ExportError(f"Export format '{export_format}' needs pyarrow (pip install pyarrow)")
+
+
+async def iter_row_batches(spreadsheet_id: str, sheet_name: str, chunk_rows: int = SHEET_CHUNK_ROWS,
+                           value_render_option: str = 'FORMATTED_VALUE', grid_size: tuple = None):
+    """
+    Yields lists of rows (header row first) covering the whole sheet,
+    no wider than its grid (`grid_size` is (rows, columns), fetched if not given).
+
+    EXPORT_RANGES_PER_REQUEST chunks are read per batchGet, and the next
+    batchGet is in flight while the current batch is being consumed, so at
+    most two batches are held in memory. Empty rows inside the sheet are
+    kept; trailing empty rows are dropped. Reads use the background
+    rate-limit lane so a nightly pull doesn't starve interactive requests.
+    """
+    if grid_size is None:
+        with background_priority():
+            grid_size = await async_google_service.get_sheet_grid_size(spreadsheet_id, sheet_name)
+    row_count, column_count = grid_size
+    last_column = column_letter(max(column_count, 1))
+    batch_rows = chunk_rows * EXPORT_RANGES_PER_REQUEST
+
+    async def fetch(first_row: int):
+        last_row = min(first_row + batch_rows - 1, row_count)
+        ranges = [f"'{sheet_name}'!A{row}:{last_column}{min(row + chunk_rows - 1, last_row)}"
+                  for row in range(first_row, last_row + 1, chunk_rows)]
+        with background_priority():
+            values = await async_google_service.batch_get_values(spreadsheet_id, ranges, value_render_option)
+        rows = []
+        for row, chunk in zip(range(first_row, last_row + 1, chunk_rows), values):
+            # batchGet drops the empty rows at the end of each range
+            rows.extend(chunk + [[] for _ in range(min(chunk_rows, last_row - row + 1) - len(chunk))])
+        return rows
+
+    blank_rows = 0
+    first_row = 1
+    pending = asyncio.ensure_future(fetch(first_row)) if row_count else None
+    try:
+        while pending is not None:
+            rows = await pending
+            first_row += batch_rows
+            pending = asyncio.ensure_future(fetch(first_row)) if first_row <= row_count else None
+
+            batch = []
+            for row in rows:
+                if not row:
+                    blank_rows += 1
+                    continue
+                batch.extend([] for _ in range(blank_rows))
+                blank_rows = 0
+                batch.append(row)
+            if batch:
+                yield batch
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+class _Drain(io.RawIOBase):
+    """
+    Write-only sink that hands out what was written since the last drain.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        # Parquet writers ask for the position to record column chunk offsets
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _cell_text(value) -> str:
+    return '' if value is None else str(value)
+
+
+def _csv_bytes(rows: list) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+async def stream_export(batches, export_format: str, column_count: int = None):
+    """
+    Encodes row batches from iter_row_batches() as `export_format`, yielding bytes per batch.
+    Rows are `column_count` cells wide (the sheet's grid width); without it,
+    the widest row of the first batch sets the width.
+    """
+    columns = None
+    drain = _Drain()
+    writer = None
+    schema = None
+    try:
+        async for rows in batches:
+            if columns is None:
+                # Blank or missing header cells are named by column letter, not dropped
+                width = column_count or max(len(row) for row in rows)
+                columns = column_names(rows[0] + [''] * (width - len(rows[0])))
+                if export_format == 'csv':
+                    # BOM so Excel opens Cyrillic text correctly
+                    yield '\ufeff'.encode('utf-8') + _csv_bytes(rows[:1])
+                elif export_format in ARROW_FORMATS:
+                    schema = pyarrow.schema([(name, pyarrow.string()) for name in columns])
+                    if export_format == 'arrow':
+                        writer = pyarrow.ipc.new_stream(drain, schema)
+                    else:
+                        writer = pyarrow.parquet.ParquetWriter(drain, schema)
+                rows = rows[1:]
+                if not rows:
+                    continue
+
+            if export_format == 'csv':
+                yield _csv_bytes(rows)
+            elif export_format == 'ndjson':
+                yield ''.join(
+                    json.dumps(dict(zip(columns, row + [''] * (len(columns) - len(row)))), ensure_ascii=False) + '\n'
+                    for row in rows
+                ).encode('utf-8')
+            else:
+                arrays = [
+                    pyarrow.array([_cell_text(row[i]) if i < len(row) else '' for row in rows], pyarrow.string())
+                    for i in range(len(columns))
+                ]
+                # One record batch / Parquet row group per batch of rows
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+                yield drain.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        yield drain.drain()
+
+
+async def export_sheet(spreadsheet_id: str, sheet_name: str, export_format: str = 'csv',
+                       value_render_option: str = 'FORMATTED_VALUE'):
+    """
+    Starts an export and returns an async iterator of encoded bytes.
+
+    The first batch is read before returning, so a missing sheet or an API
+    error is raised here (and becomes an error response) rather than
+    cutting off a response that already started.
+    """
+    check_format(export_format)
+    with background_priority():
+        grid_size = await async_google_service.get_sheet_grid_size(spreadsheet_id, sheet_name)
+    batches = iter_row_batches(spreadsheet_id, sheet_name, value_render_option=value_render_option,
+                               grid_size=grid_size)
+    try:
+        first = await batches.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def primed():
+        if first is None:
+            return
+        yield first
+        async for rows in batches:
+            yield rows
+
+    return stream_export(primed(), export_format, column_count=grid_size[1])
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+from services.async_google import async_google_service
+from services.cache import MISSING, TTLCache
+from services.circuit_breaker import is_upstream_failure
+from services.log_files import LOG_MAX_TAIL
+from services.rate_limiter import background_priority
+
+# Parsed rows kept in memory per log sheet
+LOG_SHEET_BUFFER_ROWS = int(os.getenv('LOG_SHEET_BUFFER_ROWS', '1000'))
+# Log sheets buffered at once (least recently read dropped first) and
+# seconds an unread sheet's buffer is kept
+LOG_SHEET_MAX_SHEETS = int(os.getenv('LOG_SHEET_MAX_SHEETS', '64'))
+LOG_SHEET_IDLE_TTL = float(os.getenv('LOG_SHEET_IDLE_TTL', '3600'))
+# Rows loaded on the first read of a sheet (at least `tail`)
+LOG_SHEET_INITIAL_WINDOW = 200
+# First-column rows read per step when locating the last data row
+LOG_SHEET_PROBE_ROWS = 5000
+
+
+class _SheetLog:
+    def __init__(self):
+        self.loaded = False
+        # Row number of the last data row seen (1 = header only)
+        self.known_rows = 0
+        # Raw values of that row, re-checked on every poll to detect deletions
+        self.last_raw = None
+        self.buffer = deque(maxlen=LOG_SHEET_BUFFER_ROWS)
+        # time.time() of the last successful poll
+        self.synced_at = None
+        self.lock = asyncio.Lock()
+        self.polls = 0
+        self.rows_fetched = 0
+        self.resets = 0
+        self.stale_reads = 0
+
+
+class SheetLogTail:
+    """
+    Incremental tail of an append-only log sheet (e.g. "Журнал синхро").
+
+    The first read locates the last data row through the grid size and a
+    probe of the first column (the timestamp, always filled), then loads a
+    window of rows before it. Every later poll is one batchGet
+    of the last known row (to detect deleted or rewritten rows) plus the
+    open range after it, so only appended rows are transferred.
+    Parsed rows are kept in a ring buffer per spreadsheet/sheet, for at most
+    LOG_SHEET_MAX_SHEETS sheets read within LOG_SHEET_IDLE_TTL seconds.
+    """
+
+    def __init__(self, parse_row, columns: str = 'A:E'):
+        self._parse_row = parse_row
+        self._first_col, self._last_col = columns.split(':')
+        # Our own writes don't invalidate: each poll re-checks the sheet itself
+        self._sheets = TTLCache('sheet_logs', maxsize=LOG_SHEET_MAX_SHEETS, ttl=LOG_SHEET_IDLE_TTL,
+                                invalidate_on_write=False)
+
+    def _range(self, sheet: str, start: int, end: int = None):
+        end_ref = f"{self._last_col}{end}" if end else self._last_col
+        return f"'{sheet}'!{self._first_col}{start}:{end_ref}"
+
+    def _parse(self, rows: list, first_row: int):
+        return [self._parse_row(row, first_row + i) for i, row in enumerate(rows)]
+
+    async def _load_tail(self, state: _SheetLog, spreadsheet_id: str, sheet: str, window: int):
+        state.buffer.clear()
+        state.known_rows = 1
+        state.last_raw = None
+        state.loaded = True
+
+        # The grid usually has empty rows after the data: find the last
+        # data row by probing only the first column, walking back from the end
+        end = await async_google_service.get_sheet_row_count(spreadsheet_id, sheet)
+        last_row = 0
+        while end >= 2:
+            start = max(2, end - LOG_SHEET_PROBE_ROWS + 1)
+            column = await async_google_service.get_sheet_values(
+                spreadsheet_id, f"'{sheet}'!{self._first_col}{start}:{self._first_col}{end}"
+            )
+            if column:
+                last_row = start + len(column) - 1
+                break
+            end = start - 1
+        if not last_row:
+            return
+
+        start = max(2, last_row - window + 1)
+        rows = await async_google_service.get_sheet_values(spreadsheet_id, self._range(sheet, start, last_row))
+        state.rows_fetched += len(rows)
+        rows = rows + [[]] * (last_row - start + 1 - len(rows))
+        state.buffer.extend(self._parse(rows, start))
+        state.known_rows = last_row
+        state.last_raw = rows[-1]
+
+    async def _fetch_new(self, state: _SheetLog, spreadsheet_id: str, sheet: str, window: int):
+        known = state.known_rows
+        last_rows, new_rows = await async_google_service.batch_get_values(spreadsheet_id, [
+            self._range(sheet, known, known),
+            self._range(sheet, known + 1),
+        ])
+        if state.last_raw is not None and last_rows != [state.last_raw]:
+            # Rows were deleted or rewritten: our row numbers are stale
+            state.resets += 1
+            await self._load_tail(state, spreadsheet_id, sheet, window)
+            return
+        if new_rows:
+            state.rows_fetched += len(new_rows)
+            state.buffer.extend(self._parse(new_rows, known + 1))
+            state.known_rows = known + len(new_rows)
+            state.last_raw = new_rows[-1]
+
+    async def _backfill(self, state: _SheetLog, spreadsheet_id: str, sheet: str, first_row: int):
+        """
+        Reads the rows from `first_row` up to the oldest buffered one. They are
+        kept in the buffer when it has room; otherwise they are returned for
+        this response only, so a large `tail` doesn't grow the buffer for good.
+        """
+        oldest = state.buffer[0]['row'] if state.buffer else state.known_rows + 1
+        if first_row >= oldest:
+            return []
+        rows = await async_google_service.get_sheet_values(
+            spreadsheet_id, self._range(sheet, first_row, oldest - 1)
+        )
+        state.rows_fetched += len(rows)
+        # Trailing empty rows are omitted by the API: pad the gap
+        rows = rows + [[]] * (oldest - first_row - len(rows))
+        entries = self._parse(rows, first_row)
+        if len(state.buffer) + len(entries) <= state.buffer.maxlen:
+            state.buffer.extendleft(reversed(entries))
+            return []
+        return entries
+
+    async def read(self, spreadsheet_id: str, sheet: str, tail: int, after_row: int = None):
+        """
+        Returns (entries, last_row, stale_age): up to `tail` last parsed rows,
+        only rows after `after_row` if given, and the last data row number.
+        If Sheets is failing, the buffered rows are returned as they are and
+        stale_age is the seconds since the last successful poll (else None).
+        """
+        key = (spreadsheet_id, sheet)
+        state = self._sheets.get(key)
+        if state is MISSING:
+            state = _SheetLog()
+        # Set on every read, so the TTL counts from the last read
+        self._sheets.set(key, state)
+        tail = min(tail, LOG_MAX_TAIL)
+        window = min(max(tail, LOG_SHEET_INITIAL_WINDOW), state.buffer.maxlen)
+        # Log polling is background traffic: interactive reads get quota first
+        with background_priority():
+            return await self._read(state, spreadsheet_id, sheet, window, tail, after_row)
+
+    async def _read(self, state: _SheetLog, spreadsheet_id: str, sheet: str, window: int,
+                    tail: int, after_row: int):
+        async with state.lock:
+            state.polls += 1
+            stale_age = None
+            if not state.loaded:
+                try:
+                    await self._load_tail(state, spreadsheet_id, sheet, window)
+                except Exception:
+                    # Nothing to fall back to yet: start over on the next poll
+                    state.loaded = False
+                    raise
+                state.synced_at = time.time()
+            else:
+                try:
+                    await self._fetch_new(state, spreadsheet_id, sheet, window)
+                    state.synced_at = time.time()
+                except Exception as e:
+                    if not is_upstream_failure(e):
+                        raise
+                    state.stale_reads += 1
+                    stale_age = time.time() - state.synced_at
+
+            first_row = max(2, state.known_rows - tail + 1)
+            if after_row is not None:
+                first_row = max(first_row, after_row + 1)
+            older = []
+            if first_row <= state.known_rows and stale_age is None:
+                older = await self._backfill(state, spreadsheet_id, sheet, first_row)
+
+            entries = older + [entry for entry in state.buffer if entry['row'] >= first_row]
+            return entries, state.known_rows, stale_age
+
+    def stats(self):
+        return {
+            f"{spreadsheet_id}/{sheet}": {
+                'last_row': state.known_rows,
+                'buffered': len(state.buffer),
+                'polls': state.polls,
+                'rows_fetched': state.rows_fetched,
+                'resets': state.resets,
+                'stale_reads': state.stale_reads,
+            }
+            for (spreadsheet_id, sheet), state, _ in self._sheets.export()
+        }
@@ -0,0 +1,586 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from services.async_google import async_google_service
+from services.executor import run_blocking
+from services.google_service import google_service
+from services.rate_limiter import background_priority
+from config.projects import MIRRORED_SHEETS
+
+# SQLite file with the mirrored rows (relative paths are resolved from the working directory)
+SHEET_MIRROR_DB = os.getenv('SHEET_MIRROR_DB', 'sheet_mirror.db')
+# Rows per hashed block; only blocks whose hash changed are rewritten
+SHEET_MIRROR_BLOCK_ROWS = int(os.getenv('SHEET_MIRROR_BLOCK_ROWS', '500'))
+# Blocks read per values.batchGet call
+SHEET_MIRROR_BLOCKS_PER_REQUEST = int(os.getenv('SHEET_MIRROR_BLOCKS_PER_REQUEST', '10'))
+# Seconds between checks for sheets marked dirty by writes or the Drive changes feed
+SHEET_MIRROR_INTERVAL = float(os.getenv('SHEET_MIRROR_INTERVAL', '15'))
+# A sheet not synced for this many seconds is synced even if nothing marked it dirty
+SHEET_MIRROR_MAX_AGE = float(os.getenv('SHEET_MIRROR_MAX_AGE', '3600'))
+
+QUERY_OPERATORS = {'eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'contains'}
+AGGREGATES = {'count', 'sum', 'avg', 'min', 'max'}
+_COMPARISONS = {'eq': '=', 'ne': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+_NUMERIC = "typeof({0}) IN ('integer', 'real')"
+# Row numbers of an A1 range: A2, A2:C5, 2:5, A2:C
+_A1_ROWS = re.compile(r'[A-Za-z]*(\d+)?(?::[A-Za-z]*(\d+)?)?')
+# Dirty entry for a spreadsheet whose written ranges are unknown: every sheet is scanned
+_ALL = None
+
+
+class MirrorQueryError(ValueError):
+    """
+    A query that can't be run against the mirrored sheet (unknown column, bad operator...).
+    """
+
+
+def column_letter(n: int) -> str:
+    letters = ""
+    while n > 0:
+        n, remainder = divmod(n - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _column_index(letters: str):
+    if not re.fullmatch(r'[A-Za-z]{1,3}', letters):
+        return None
+    n = 0
+    for char in letters.upper():
+        n = n * 26 + ord(char) - 64
+    return n - 1
+
+
+def column_names(headers: list) -> list:
+    """
+    Header names made unique; empty headers are named by their column letter.
+    """
+    columns = []
+    for i, header in enumerate(headers):
+        name = str(header).strip() or column_letter(i + 1)
+        if name in columns:
+            name = f"{name} ({column_letter(i + 1)})"
+        columns.append(name)
+    return columns
+
+
+def parse_written_range(range_name: str):
+    """
+    Splits an A1 range into (sheet name, (first row, last row)). The rows are
+    None when the range covers whole columns or the whole sheet, and the
+    sheet name is None when the range doesn't name one.
+    """
+    if '!' not in range_name:
+        return None, None
+    sheet_name, cells = range_name.rsplit('!', 1)
+    if sheet_name.startswith("'") and sheet_name.endswith("'"):
+        sheet_name = sheet_name[1:-1].replace("''", "'")
+    match = _A1_ROWS.fullmatch(cells.strip())
+    if not match or not match.group(1):
+        return sheet_name, None
+    first = int(match.group(1))
+    if match.group(2) is None:
+        # A single cell, unless it is an open range such as A2:C
+        return sheet_name, (first, first) if ':' not in cells else None
+    return sheet_name, (first, int(match.group(2)))
+
+
+def _block_hash(rows: list) -> str:
+    return hashlib.sha256(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _casefold(value):
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _parse_value(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _connect(path: str):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # Case-insensitive matching that also works for Cyrillic (SQLite's LIKE/NOCASE are ASCII-only)
+    conn.create_function('casefold', 1, _casefold, deterministic=True)
+    return conn
+
+
+class SheetMirror:
+    """
+    Local SQLite copy of the sheets listed in MIRRORED_SHEETS.
+
+    Each sheet is stored as its header row plus one JSON array per data row
+    (UNFORMATTED_VALUE, so numbers stay numbers). A full sync reads the sheet
+    in blocks of SHEET_MIRROR_BLOCK_ROWS rows and rewrites only the blocks
+    whose hash differs from the stored one. Writes through BusinessOS mark
+    the rows they wrote dirty, and only the blocks holding them are read
+    again. Script runs and the Drive changes feed (what changed is unknown)
+    and SHEET_MIRROR_MAX_AGE trigger a full sync. The background loop
+    re-syncs dirty sheets every SHEET_MIRROR_INTERVAL.
+    Queries (filter, sort, aggregate, paginate) run locally without API calls.
+    """
+
+    def __init__(self, db_path: str = SHEET_MIRROR_DB, sheets: dict = None):
+        self.db_path = db_path
+        self.sheets = {sid: list(names) for sid, names in (sheets if sheets is not None else MIRRORED_SHEETS).items()}
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._readers = threading.local()
+        # Spreadsheet id -> {sheet name: [(first row, last row)] or None for the whole sheet},
+        # or _ALL when every sheet must be scanned
+        self._dirty = {}
+        self._dirty_lock = threading.Lock()
+        self._sync_locks = {}
+        self._task = None
+        self._stop_event = None
+        self._last_error = None
+        self._syncs = 0
+        self._blocks_read = 0
+        self._blocks_written = 0
+        self._queries = 0
+        self._errors = 0
+        google_service.add_invalidation_listener(self.mark_dirty)
+
+    # --- SQLite (called on the files pool) ---
+
+    def _db(self):
+        if self._writer is None:
+            self._writer = _connect(self.db_path)
+            self._writer.executescript('''
+                CREATE TABLE IF NOT EXISTS mirror_sheets (
+                    spreadsheet_id TEXT NOT NULL,
+                    sheet_name TEXT NOT NULL,
+                    headers TEXT NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    synced_at REAL NOT NULL,
+                    PRIMARY KEY (spreadsheet_id, sheet_name)
+                );
+                CREATE TABLE IF NOT EXISTS mirror_blocks (
+                    spreadsheet_id TEXT NOT NULL,
+                    sheet_name TEXT NOT NULL,
+                    block INTEGER NOT NULL,
+                    hash TEXT NOT NULL,
+                    PRIMARY KEY (spreadsheet_id, sheet_name, block)
+                );
+                CREATE TABLE IF NOT EXISTS mirror_rows (
+                    spreadsheet_id TEXT NOT NULL,
+                    sheet_name TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (spreadsheet_id, sheet_name, row)
+                );
+            ''')
+            self._writer.commit()
+        return self._writer
+
+    def _reader(self):
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            with self._write_lock:
+                # Make sure the tables exist before the first read
+                self._db()
+            conn = self._readers.conn = _connect(self.db_path)
+        return conn
+
+    def _load_state(self, spreadsheet_id: str, sheet_name: str):
+        with self._write_lock:
+            conn = self._db()
+            sheet = conn.execute(
+                'SELECT headers, row_count, synced_at FROM mirror_sheets WHERE spreadsheet_id = ? AND sheet_name = ?',
+                (spreadsheet_id, sheet_name)
+            ).fetchone()
+            hashes = dict(conn.execute(
+                'SELECT block, hash FROM mirror_blocks WHERE spreadsheet_id = ? AND sheet_name = ?',
+                (spreadsheet_id, sheet_name)
+            ).fetchall())
+        return sheet, hashes
+
+    def _write_blocks(self, spreadsheet_id: str, sheet_name: str, headers: list, row_count: int,
+                      changed: dict, block_count: int, synced_at: float):
+        """
+        Replaces the rows of the changed blocks ({block: (hash, rows)}) and drops blocks past the end.
+        """
+        key = (spreadsheet_id, sheet_name)
+        with self._write_lock:
+            conn = self._db()
+            with conn:
+                for block, (block_hash, rows) in changed.items():
+                    first_row = 2 + block * SHEET_MIRROR_BLOCK_ROWS
+                    conn.execute(
+                        'DELETE FROM mirror_rows WHERE spreadsheet_id = ? AND sheet_name = ? AND row BETWEEN ? AND ?',
+                        key + (first_row, first_row + SHEET_MIRROR_BLOCK_ROWS - 1)
+                    )
+                    conn.executemany(
+                        'INSERT INTO mirror_rows (spreadsheet_id, sheet_name, row, data) VALUES (?, ?, ?, ?)',
+                        [key + (first_row + i, json.dumps(row, ensure_ascii=False))
+                         for i, row in enumerate(rows) if any(cell != '' for cell in row)]
+                    )
+                    conn.execute('INSERT OR REPLACE INTO mirror_blocks VALUES (?, ?, ?, ?)',
+                                 key + (block, block_hash))
+                conn.execute('DELETE FROM mirror_blocks WHERE spreadsheet_id = ? AND sheet_name = ? AND block >= ?',
+                             key + (block_count,))
+                conn.execute('DELETE FROM mirror_rows WHERE spreadsheet_id = ? AND sheet_name = ? AND row >= ?',
+                             key + (2 + block_count * SHEET_MIRROR_BLOCK_ROWS,))
+                conn.execute('INSERT OR REPLACE INTO mirror_sheets VALUES (?, ?, ?, ?, ?)',
+                             key + (json.dumps(headers, ensure_ascii=False), row_count, synced_at))
+
+    # --- Sync ---
+
+    def is_mirrored(self, spreadsheet_id: str, sheet_name: str) -> bool:
+        return sheet_name in self.sheets.get(spreadsheet_id, ())
+
+    def mark_dirty(self, spreadsheet_id: str, ranges: list = None):
+        """
+        Records a change to a spreadsheet: the A1 `ranges` written, or None
+        when what changed is unknown (every mirrored sheet is then scanned).
+        """
+        names = self.sheets.get(spreadsheet_id)
+        if not names:
+            return
+        written = {}
+        for range_name in ranges if ranges is not None else ():
+            sheet_name, rows = parse_written_range(range_name)
+            if sheet_name is None:
+                # No sheet name: the first sheet, which we can't tell apart here
+                ranges = None
+                break
+            if sheet_name not in names:
+                continue
+            if rows is None or written.get(sheet_name, []) is None:
+                written[sheet_name] = None
+            else:
+                written.setdefault(sheet_name, []).append(rows)
+        with self._dirty_lock:
+            if ranges is None:
+                self._dirty[spreadsheet_id] = _ALL
+                return
+            if not written:
+                return
+            dirty = self._dirty.setdefault(spreadsheet_id, {})
+            if dirty is _ALL:
+                return
+            for sheet_name, rows in written.items():
+                if rows is None or dirty.get(sheet_name, []) is None:
+                    dirty[sheet_name] = None
+                else:
+                    dirty.setdefault(sheet_name, []).extend(rows)
+
+    def is_dirty(self, spreadsheet_id: str) -> bool:
+        with self._dirty_lock:
+            return spreadsheet_id in self._dirty
+
+    async def sync(self, spreadsheet_id: str, sheet_name: str, rows: list = None) -> dict:
+        """
+        Syncs a sheet: only the blocks holding `rows` ([(first, last)]) if
+        given and the sheet was synced before, else every block.
+        """
+        lock = self._sync_locks.setdefault((spreadsheet_id, sheet_name), asyncio.Lock())
+        async with lock:
+            return await self._sync(spreadsheet_id, sheet_name, rows)
+
+    async def _sync(self, spreadsheet_id: str, sheet_name: str, rows: list = None) -> dict:
+        started = time.time()
+        sheet, hashes = await run_blocking('files', self._load_state, spreadsheet_id, sheet_name)
+        row_count = await async_google_service.get_sheet_row_count(spreadsheet_id, sheet_name)
+        block_count = max(0, (row_count - 1 + SHEET_MIRROR_BLOCK_ROWS - 1) // SHEET_MIRROR_BLOCK_ROWS)
+
+        if rows is None or sheet is None:
+            read_header, blocks_to_read, synced_at = True, list(range(block_count)), started
+        else:
+            read_header = any(first <= 1 for first, _ in rows)
+            touched = set()
+            for first, last in rows:
+                first_block = max(0, (max(first, 2) - 2) // SHEET_MIRROR_BLOCK_ROWS)
+                last_block = (max(last, 2) - 2) // SHEET_MIRROR_BLOCK_ROWS
+                touched.update(range(first_block, min(last_block, block_count - 1) + 1))
+            blocks_to_read = sorted(touched)
+            # Partial syncs don't count as a full pass for SHEET_MIRROR_MAX_AGE
+            synced_at = sheet[2]
+
+        headers = json.loads(sheet[0]) if sheet is not None else []
+        changed = {}
+        for start in range(0, max(len(blocks_to_read), 1), SHEET_MIRROR_BLOCKS_PER_REQUEST):
+            blocks = blocks_to_read[start:start + SHEET_MIRROR_BLOCKS_PER_REQUEST]
+            ranges = [f"'{sheet_name}'!{2 + b * SHEET_MIRROR_BLOCK_ROWS}:{1 + (b + 1) * SHEET_MIRROR_BLOCK_ROWS}"
+                      for b in blocks]
+            header_first = start == 0 and read_header
+            if header_first:
+                ranges.insert(0, f"'{sheet_name}'!1:1")
+            if not ranges:
+                break
+            values = await async_google_service.batch_get_values(spreadsheet_id, ranges, 'UNFORMATTED_VALUE')
+            if header_first:
+                header_rows = values.pop(0)
+                headers = header_rows[0] if header_rows else []
+            self._blocks_read += len(blocks)
+            for block, block_rows in zip(blocks, values):
+                block_hash = _block_hash(block_rows)
+                if hashes.get(block) != block_hash:
+                    changed[block] = (block_hash, block_rows)
+
+        await run_blocking('files', self._write_blocks, spreadsheet_id, sheet_name, headers,
+                           row_count, changed, block_count, synced_at)
+        self._syncs += 1
+        self._blocks_written += len(changed)
+        return {
+            'spreadsheet_id': spreadsheet_id,
+            'sheet_name': sheet_name,
+            'blocks': block_count,
+            'read_blocks': len(blocks_to_read),
+            'changed_blocks': len(changed),
+            'sync_ms': round((time.time() - started) * 1000, 1),
+        }
+
+    async def sync_spreadsheet(self, spreadsheet_id: str) -> list:
+        """
+        Syncs the mirrored sheets of a spreadsheet: only the rows our writes
+        touched when that is all that is known to have changed, else everything.
+        """
+        with self._dirty_lock:
+            # Writes during the sync mark it dirty again
+            dirty = self._dirty.pop(spreadsheet_id, _ALL)
+        results = []
+        try:
+            for sheet_name in self.sheets.get(spreadsheet_id, ()):
+                if dirty is _ALL or dirty.get(sheet_name, []) is None:
+                    results.append(await self.sync(spreadsheet_id, sheet_name))
+                elif sheet_name in dirty:
+                    results.append(await self.sync(spreadsheet_id, sheet_name, dirty[sheet_name]))
+        except Exception:
+            self._restore_dirty(spreadsheet_id, dirty)
+            raise
+        return results
+
+    def _restore_dirty(self, spreadsheet_id: str, dirty):
+        with self._dirty_lock:
+            current = self._dirty.get(spreadsheet_id, {})
+            if dirty is _ALL or current is _ALL:
+                self._dirty[spreadsheet_id] = _ALL
+                return
+            for sheet_name, rows in dirty.items():
+                if rows is None or current.get(sheet_name, []) is None:
+                    current[sheet_name] = None
+                else:
+                    current.setdefault(sheet_name, []).extend(rows)
+            self._dirty[spreadsheet_id] = current
+
+    async def _due(self) -> list:
+        now = time.time()
+        due = []
+        for spreadsheet_id, names in self.sheets.items():
+            if self.is_dirty(spreadsheet_id):
+                due.append(spreadsheet_id)
+                continue
+            for sheet_name in names:
+                sheet, _ = await run_blocking('files', self._load_state, spreadsheet_id, sheet_name)
+                if sheet is None or now - sheet[2] > SHEET_MIRROR_MAX_AGE:
+                    due.append(spreadsheet_id)
+                    break
+        return due
+
+    def start(self):
+        if self._task or not self.sheets:
+            return
+        if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+            # Nothing to mirror without Google access
+            return
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._stop_event.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._task = None
+        if self._writer is not None:
+            with self._write_lock:
+                self._writer.close()
+                self._writer = None
+
+    async def _run(self):
+        while True:
+            try:
+                with background_priority():
+                    for spreadsheet_id in await self._due():
+                        for result in await self.sync_spreadsheet(spreadsheet_id):
+                            if result['changed_blocks']:
+                                print(f"🪞 Mirrored {spreadsheet_id} / {result['sheet_name']}: "
+                                      f"{result['changed_blocks']}/{result['blocks']} blocks changed "
+                                      f"in {result['sync_ms']} ms")
+                self._last_error = None
+            except Exception as e:
+                self._errors += 1
+                if str(e) != self._last_error:
+                    print(f"⚠️ Sheet mirror sync failed: {e}")
+                    self._last_error = str(e)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), SHEET_MIRROR_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+    # --- Queries ---
+
+    async def query(self, spreadsheet_id: str, sheet_name: str, where=(), sort=(), group_by: str = None,
+                    aggregates=(), limit: int = 100, offset: int = 0) -> dict:
+        """
+        Filters, sorts, aggregates and paginates a mirrored sheet. A sheet
+        that was never synced is synced first.
+        """
+        sheet, _ = await run_blocking('files', self._load_state, spreadsheet_id, sheet_name)
+        if sheet is None:
+            await self.sync(spreadsheet_id, sheet_name)
+        result = await run_blocking('files', self._query, spreadsheet_id, sheet_name,
+                                    list(where), list(sort), group_by, list(aggregates), limit, offset)
+        self._queries += 1
+        result['dirty'] = self.is_dirty(spreadsheet_id)
+        return result
+
+    def _query(self, spreadsheet_id, sheet_name, where, sort, group_by, aggregates, limit, offset) -> dict:
+        conn = self._reader()
+        sheet = conn.execute(
+            'SELECT headers, synced_at FROM mirror_sheets WHERE spreadsheet_id = ? AND sheet_name = ?',
+            (spreadsheet_id, sheet_name)
+        ).fetchone()
+        headers = json.loads(sheet[0])
+        columns = column_names(headers)
+
+        clauses = ['spreadsheet_id = ?', 'sheet_name = ?']
+        args = [spreadsheet_id, sheet_name]
+        for condition in where:
+            sql, condition_args = self._condition(condition, columns)
+            clauses.append(sql)
+            args.extend(condition_args)
+        base = f"FROM mirror_rows WHERE {' AND '.join(clauses)}"
+
+        if group_by or aggregates:
+            return self._aggregate(conn, base, args, columns, group_by, aggregates, sort, limit, offset, sheet[1])
+
+        order = [f"{self._cell(self._resolve(term.lstrip('-'), columns))} {'DESC' if term.startswith('-') else 'ASC'}"
+                 for term in sort]
+        total = conn.execute(f"SELECT COUNT(*) {base}", args).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT row, data {base} ORDER BY {', '.join(order + ['row'])} LIMIT ? OFFSET ?",
+            args + [limit, offset]
+        ).fetchall()
+        return {
+            'columns': columns,
+            'rows': [self._row_dict(row, json.loads(data), columns) for row, data in rows],
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'synced_at': sheet[1],
+        }
+
+    def _aggregate(self, conn, base, args, columns, group_by, aggregates, sort, limit, offset, synced_at) -> dict:
+        selected = {}
+        if group_by:
+            selected[columns[self._resolve(group_by, columns)]] = self._cell(self._resolve(group_by, columns))
+        for spec in aggregates or ['count']:
+            function, _, column = spec.partition(':')
+            if function not in AGGREGATES:
+                raise MirrorQueryError(f"Unknown aggregate '{function}' (use {', '.join(sorted(AGGREGATES))})")
+            if function == 'count':
+                selected[spec] = 'COUNT(*)'
+            elif not column:
+                raise MirrorQueryError(f"Aggregate '{function}' needs a column, e.g. {function}:Price")
+            else:
+                cell = self._cell(self._resolve(column, columns))
+                # Text cells (e.g. "-") are left out of numeric aggregates
+                selected[spec] = f"{function.upper()}(CASE WHEN {_NUMERIC.format(cell)} THEN {cell} END)"
+
+        names = list(selected)
+        select = ', '.join(f"{sql} AS c{i}" for i, sql in enumerate(selected.values()))
+        if not group_by:
+            row = conn.execute(f"SELECT {select} {base}", args).fetchone()
+            return {'columns': names, 'rows': [dict(zip(names, row))], 'total': 1,
+                    'limit': limit, 'offset': offset, 'synced_at': synced_at}
+
+        order = []
+        for term in sort:
+            name = term.lstrip('-')
+            if name not in selected:
+                raise MirrorQueryError(f"Grouped results can only be sorted by {', '.join(names)}")
+            order.append(f"c{names.index(name)} {'DESC' if term.startswith('-') else 'ASC'}")
+        grouped = f"SELECT {select} {base} GROUP BY c0"
+        total = conn.execute(f"SELECT COUNT(*) FROM ({grouped})", args).fetchone()[0]
+        rows = conn.execute(f"{grouped} ORDER BY {', '.join(order + ['c0'])} LIMIT ? OFFSET ?",
+                            args + [limit, offset]).fetchall()
+        return {
+            'columns': names,
+            'rows': [dict(zip(names, row)) for row in rows],
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'synced_at': synced_at,
+        }
+
+    def _resolve(self, column: str, columns: list) -> int:
+        if column in columns:
+            return columns.index(column)
+        folded = [c.casefold() for c in columns]
+        if column.casefold() in folded:
+            return folded.index(column.casefold())
+        index = _column_index(column)
+        if index is not None:
+            return index
+        raise MirrorQueryError(f"Unknown column '{column}'")
+
+    def _cell(self, index: int) -> str:
+        return f"json_extract(data, '$[{index}]')"
+
+    def _condition(self, condition: str, columns: list):
+        """
+        "column:op:value" -> (SQL, args). Numeric values compare numerically
+        against numeric cells; text compares case-insensitively.
+        """
+        parts = condition.split(':', 2)
+        if len(parts) != 3 or parts[1] not in QUERY_OPERATORS:
+            raise MirrorQueryError(f"Bad filter '{condition}', expected column:op:value "
+                                   f"with op one of {', '.join(sorted(QUERY_OPERATORS))}")
+        column, op, value = parts
+        cell = self._cell(self._resolve(column, columns))
+        if op == 'contains':
+            return f"instr(casefold(CAST({cell} AS TEXT)), ?) > 0", [value.casefold()]
+        parsed = _parse_value(value)
+        if isinstance(parsed, float):
+            if op == 'ne':
+                return f"NOT ({_NUMERIC.format(cell)} AND {cell} = ?)", [parsed]
+            return f"{_NUMERIC.format(cell)} AND {cell} {_COMPARISONS[op]} ?", [parsed]
+        return f"casefold(COALESCE({cell}, '')) {_COMPARISONS[op]} ?", [parsed.casefold()]
+
+    def _row_dict(self, row: int, values: list, columns: list) -> dict:
+        entry = {'_row': row}
+        for i, name in enumerate(columns):
+            entry[name] = values[i] if i < len(values) else ''
+        return entry
+
+    def stats(self):
+        with self._dirty_lock:
+            dirty = sorted(self._dirty)
+        return {
+            'sheets': {sid: names for sid, names in self.sheets.items()},
+            'running': self._task is not None,
+            'dirty': dirty,
+            'syncs': self._syncs,
+            'blocks_read': self._blocks_read,
+            'blocks_written': self._blocks_written,
+            'queries': self._queries,
+            'errors': self._errors,
+            'last_error': self._last_error,
+        }
+
+
+sheet_mirror = SheetMirror()
@@ -0,0 +1,248 @@
+import os
+import re
+from collections import Counter
+
+from services.cache import TTLCache
+
+# Approximate prompt budget for the sheet context, in tokens
+AGENT_CONTEXT_TOKEN_BUDGET = int(os.getenv('AGENT_CONTEXT_TOKEN_BUDGET', '3000'))
+# Data rows loaded for the summary (read in chunks)
+AGENT_CONTEXT_MAX_ROWS = int(os.getenv('AGENT_CONTEXT_MAX_ROWS', '2000'))
+# Summaries keyed by (spreadsheet id, sheet name), dropped on our own writes
+sheet_summary_cache = TTLCache(
+    'sheet_summaries',
+    maxsize=int(os.getenv('SHEET_SUMMARY_CACHE_SIZE', '64')),
+    ttl=float(os.getenv('SHEET_SUMMARY_CACHE_TTL', '60'))
+)
+# First rows of the sheet shown after the matching ones, budget permitting
+HEAD_ROWS = 20
+TOP_VALUES = 3
+MAX_CELL_CHARS = 60
+
+# "строка 500", "row 500", "ряд 12" or a cell reference like "G500"
+ROW_REF_PATTERN = re.compile(r'(?:row|строк\w*|ряд\w*)\s*№?\s*(\d+)|\b[A-Za-z]{1,2}(\d+)\b', re.IGNORECASE)
+WORD_PATTERN = re.compile(r'\w{3,}')
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough: ~3 characters per token for mixed Russian/English text
+    return len(text) // 3 + 1
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _format_number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int):
+        return str(value)
+    return f"{value:.2f}".rstrip('0').rstrip('.') if abs(value) >= 0.01 else f"{value:.4g}"
+
+
+def _cell(value) -> str:
+    text = _format_number(value) if _is_number(value) else str(value)
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS - 1] + '…'
+
+
+class ColumnStats:
+    """
+    Running statistics of one column, fed as rows arrive: non-empty count,
+    min/max/sum for numbers and value counts for text.
+    """
+
+    def __init__(self):
+        self.numbers = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+        self.texts = Counter()
+
+    def add(self, value):
+        if value == '' or value is None:
+            return
+        if _is_number(value):
+            self.numbers += 1
+            self.sum += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+        else:
+            self.texts[str(value)] += 1
+
+    def summary(self, total: int) -> dict:
+        """
+        Type, non-empty count and null ratio out of `total` rows, plus the
+        number range or the most common text values.
+        """
+        text_count = sum(self.texts.values())
+        count = self.numbers + text_count
+        summary = {
+            'count': count,
+            'null_ratio': round(1 - count / total, 2) if total else 1.0,
+        }
+        if not count:
+            summary['type'] = 'empty'
+        elif self.numbers and not text_count:
+            summary['type'] = 'number'
+        elif text_count and not self.numbers:
+            summary['type'] = 'text'
+        else:
+            summary['type'] = 'mixed'
+        if self.numbers:
+            summary.update(min=self.min, max=self.max, sum=self.sum)
+        if text_count:
+            summary['distinct'] = len(self.texts)
+            summary['top'] = self.texts.most_common(TOP_VALUES)
+        return summary
+
+
+class SheetSummary:
+    """
+    Prompt-independent part of the agent context, built chunk by chunk:
+    headers, column statistics and the loaded data rows (at most
+    AGENT_CONTEXT_MAX_ROWS) with their sheet row numbers.
+    render() then picks the rows relevant to a prompt.
+    """
+
+    def __init__(self, max_rows: int = AGENT_CONTEXT_MAX_ROWS):
+        self.max_rows = max_rows
+        self.raw_headers = None
+        self.rows = []
+        self.row_numbers = []
+        self.stats = []
+
+    @property
+    def full(self) -> bool:
+        return len(self.rows) >= self.max_rows
+
+    def add_rows(self, rows: list, first_row: int):
+        """
+        Adds a chunk of sheet rows starting at sheet row `first_row`
+        (row 1 is the header). Rows past max_rows are ignored.
+        """
+        for offset, row in enumerate(rows):
+            if self.raw_headers is None:
+                self.raw_headers = list(row)
+                continue
+            if self.full:
+                break
+            while len(self.stats) < len(row):
+                self.stats.append(ColumnStats())
+            for stats, value in zip(self.stats, row):
+                stats.add(value)
+            self.rows.append(row)
+            self.row_numbers.append(first_row + offset)
+
+    @property
+    def headers(self) -> list:
+        raw = self.raw_headers or []
+        width = max(len(raw), len(self.stats))
+        return [str(raw[i]) if i < len(raw) and raw[i] != '' else f"Col{i + 1}" for i in range(width)]
+
+    def row(self, index: int) -> list:
+        row = self.rows[index]
+        return row + [''] * (len(self.headers) - len(row))
+
+    def column_summary(self, index: int) -> dict:
+        stats = self.stats[index] if index < len(self.stats) else ColumnStats()
+        return stats.summary(len(self.rows))
+
+    def render(self, prompt: str, token_budget: int = AGENT_CONTEXT_TOKEN_BUDGET) -> str:
+        return render_context(self, prompt, token_budget)
+
+
+def _summary_line(name: str, summary: dict) -> str:
+    parts = [f"{name} [{summary['type']}]", f"filled {summary['count']}"]
+    if summary['null_ratio']:
+        parts.append(f"empty {int(summary['null_ratio'] * 100)}%")
+    if 'sum' in summary:
+        parts.append(f"min {_format_number(summary['min'])}, max {_format_number(summary['max'])}, "
+                     f"sum {_format_number(summary['sum'])}")
+    if 'top' in summary and summary['distinct'] == summary['count']:
+        parts.append("all unique")
+    elif 'top' in summary:
+        top = ', '.join(f"{_cell(value)} ({n})" for value, n in summary['top'])
+        parts.append(f"{summary['distinct']} distinct, top: {top}")
+    return "- " + "; ".join(parts)
+
+
+def select_rows(summary: SheetSummary, prompt: str, limit: int) -> list:
+    """
+    Picks row indexes relevant to the prompt: rows referenced by number
+    first, then rows whose cells match the most prompt keywords.
+    """
+    explicit = []
+    for match in ROW_REF_PATTERN.finditer(prompt):
+        number = int(match.group(1) or match.group(2))
+        index = number - summary.row_numbers[0] if summary.row_numbers else -1
+        if 0 <= index < len(summary.row_numbers) and index not in explicit:
+            explicit.append(index)
+
+    # Crude stemming: Russian endings vary, so match on word prefixes
+    stems = {word[:5] for word in WORD_PATTERN.findall(prompt.lower()) if not word.isdigit()}
+    scores = Counter()
+    if stems:
+        for index, row in enumerate(summary.rows):
+            for value in row:
+                if value == '' or _is_number(value):
+                    continue
+                text = str(value).lower()
+                hits = sum(1 for stem in stems if stem in text)
+                if hits:
+                    scores[index] += hits
+    matched = [index for index, _ in scores.most_common() if index not in explicit]
+    return (explicit + matched)[:limit]
+
+
+def render_context(summary: SheetSummary, prompt: str, token_budget: int = AGENT_CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Renders a sheet summary as prompt context within a token budget:
+    column statistics for the whole loaded range, rows relevant to the
+    prompt, then the first rows of the sheet while the budget lasts.
+    """
+    headers = summary.headers
+    if not headers:
+        return ""
+
+    lines = [f"\nSheet Data ({len(summary.row_numbers)} data rows):",
+             f"Headers: {', '.join(headers)}"]
+    used = estimate_tokens('\n'.join(lines))
+
+    def add(line: str) -> bool:
+        nonlocal used
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            return False
+        lines.append(line)
+        used += cost
+        return True
+
+    add("Column summary:")
+    for position, name in enumerate(headers):
+        if not add(_summary_line(name, summary.column_summary(position))):
+            add(f"- ... {len(headers) - position} more columns")
+            break
+
+    def render(index: int) -> str:
+        return f"Row {summary.row_numbers[index]}: " + " | ".join(_cell(v) for v in summary.row(index))
+
+    def add_rows(title: str, indexes: list) -> list:
+        added = []
+        for index in indexes:
+            line = render(index)
+            if not added:
+                # Only add the section title if at least one row fits
+                if used + estimate_tokens(title) + estimate_tokens(line) > token_budget:
+                    break
+                add(title)
+            if not add(line):
+                break
+            added.append(index)
+        return added
+
+    shown = add_rows("Rows matching the request:", select_rows(summary, prompt, limit=len(summary.row_numbers)))
+    add_rows("First rows:", [index for index in range(min(HEAD_ROWS, len(summary.row_numbers)))
+                             if index not in shown])
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a call for a key is in flight,
+    other callers with the same key wait for it and share its result or error.
+    Keys are tuples of (kind, spreadsheet_id, ...).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # The key may have been forgotten (and reused) after a write
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget_spreadsheet(self, spreadsheet_id: str):
+        """
+        Lets new callers start a fresh call instead of joining one
+        that began before a write to this spreadsheet.
+        """
+        with self._lock:
+            for key in [k for k in self._calls if k[1] == spreadsheet_id]:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            total = self._executed + self._shared
+            return {
+                'in_flight': len(self._calls),
+                'executed': self._executed,
+                'shared': self._shared,
+                'shared_ratio': round(self._shared / total, 3) if total else 0.0,
+            }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines: concurrent callers with the same key
+    await one shared task instead of each starting their own.
+    The shared call is not cancelled when one of its callers goes away.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._executed = 0
+        self._shared = 0
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+
+            def forget(done):
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+                # Nobody may be left to await it
+                if not done.cancelled():
+                    done.exception()
+
+            task.add_done_callback(forget)
+            self._executed += 1
+        else:
+            self._shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        total = self._executed + self._shared
+        return {
+            'in_flight': len(self._calls),
+            'executed': self._executed,
+            'shared': self._shared,
+            'shared_ratio': round(self._shared / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,177 @@
+import asyncio
+import os
+
+from services.circuit_breaker import is_upstream_failure
+from services.executor import run_blocking
+from services.google_service import google_service
+
+# Write-behind buffering of batch_update_values / append_rows (off by default)
+WRITE_BUFFER_ENABLED = os.getenv('WRITE_BUFFER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+# Seconds to collect writes for one spreadsheet before flushing them
+WRITE_BUFFER_WINDOW = float(os.getenv('WRITE_BUFFER_WINDOW', '0.05'))
+# Flush immediately once this many writes are pending for one spreadsheet
+WRITE_BUFFER_MAX_OPS = int(os.getenv('WRITE_BUFFER_MAX_OPS', '100'))
+
+
+class _Write:
+    """
+    One buffered call: batchUpdate data entries ('update') or rows appended
+    to `range_name` ('append').
+    """
+
+    def __init__(self, kind: str, range_name: str, values: list):
+        self.kind = kind
+        self.range_name = range_name
+        self.values = values
+        self.future = asyncio.get_running_loop().create_future()
+
+
+def _segments(writes: list) -> list:
+    """
+    Splits writes into runs that can share one request, keeping their order:
+    consecutive updates go into one batchUpdate, consecutive appends
+    to the same range into one multi-row append.
+    """
+    segments = []
+    for write in writes:
+        last = segments[-1] if segments else None
+        if last and last[0].kind == write.kind and (write.kind == 'update' or last[0].range_name == write.range_name):
+            last.append(write)
+        else:
+            segments.append([write])
+    return segments
+
+
+class WriteBuffer:
+    """
+    Groups writes to the same spreadsheet over a short window (or up to
+    WRITE_BUFFER_MAX_OPS writes) and sends them as one Sheets request.
+    Each caller gets a future that resolves with its part of the response
+    once the write is committed, or raises the request's error.
+    """
+
+    def __init__(self, window: float = WRITE_BUFFER_WINDOW, max_ops: int = WRITE_BUFFER_MAX_OPS,
+                 enabled: bool = WRITE_BUFFER_ENABLED):
+        self.window = window
+        self.max_ops = max(1, max_ops)
+        self.enabled = enabled
+        self._pending = {}
+        self._timers = {}
+        self._locks = {}
+        self._flushing = set()
+        self._writes = 0
+        self._requests = 0
+        self._failed = 0
+        self._split = 0
+
+    def batch_update_values(self, spreadsheet_id: str, data: list) -> asyncio.Future:
+        return self._add(spreadsheet_id, _Write('update', None, data))
+
+    def append_rows(self, spreadsheet_id: str, range_name: str, rows: list) -> asyncio.Future:
+        return self._add(spreadsheet_id, _Write('append', range_name, rows))
+
+    def _add(self, spreadsheet_id: str, write: _Write) -> asyncio.Future:
+        pending = self._pending.setdefault(spreadsheet_id, [])
+        pending.append(write)
+        self._writes += 1
+        if len(pending) >= self.max_ops:
+            self._start_flush(spreadsheet_id)
+        elif spreadsheet_id not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[spreadsheet_id] = loop.call_later(self.window, self._start_flush, spreadsheet_id)
+        return write.future
+
+    def _start_flush(self, spreadsheet_id: str):
+        timer = self._timers.pop(spreadsheet_id, None)
+        if timer:
+            timer.cancel()
+        writes = self._pending.pop(spreadsheet_id, None)
+        if not writes:
+            return
+        task = asyncio.create_task(self._flush(spreadsheet_id, writes))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, spreadsheet_id: str, writes: list):
+        # One flush at a time per spreadsheet, so writes land in the order they were made
+        lock = self._locks.setdefault(spreadsheet_id, asyncio.Lock())
+        async with lock:
+            for segment in _segments(writes):
+                try:
+                    await self._send(spreadsheet_id, segment)
+                except Exception as e:
+                    if len(segment) > 1 and not is_upstream_failure(e):
+                        # The API rejected the merged request as a whole (e.g. one
+                        # caller's bad range), so nothing was written: send each
+                        # write on its own so only the faulty caller fails
+                        self._split += 1
+                        for write in segment:
+                            await self._send_or_fail(spreadsheet_id, [write])
+                    else:
+                        self._fail(spreadsheet_id, segment, e)
+
+    async def _send(self, spreadsheet_id: str, writes: list):
+        self._requests += 1
+        if writes[0].kind == 'update':
+            await self._send_updates(spreadsheet_id, writes)
+        else:
+            await self._send_appends(spreadsheet_id, writes)
+
+    async def _send_or_fail(self, spreadsheet_id: str, writes: list):
+        try:
+            await self._send(spreadsheet_id, writes)
+        except Exception as e:
+            self._fail(spreadsheet_id, writes, e)
+
+    def _fail(self, spreadsheet_id: str, writes: list, error: Exception):
+        self._failed += len(writes)
+        print(f"❌ Buffered write to {spreadsheet_id} failed ({len(writes)} ops): {error}")
+        for write in writes:
+            if not write.future.done():
+                write.future.set_exception(error)
+
+    async def _send_updates(self, spreadsheet_id: str, writes: list):
+        data = [entry for write in writes for entry in write.values]
+        result = await run_blocking('sheets', google_service.batch_update_values, spreadsheet_id, data)
+        # Each caller gets a batchUpdate response covering just its own entries
+        responses = result.get('responses', [])
+        start = 0
+        for write in writes:
+            end = start + len(write.values)
+            if not write.future.done():
+                write.future.set_result({**result, 'responses': responses[start:end]})
+            start = end
+
+    async def _send_appends(self, spreadsheet_id: str, writes: list):
+        rows = [row for write in writes for row in write.values]
+        result = await run_blocking('sheets', google_service.append_rows, spreadsheet_id, writes[0].range_name, rows)
+        # The API reports one combined range for all appended rows
+        for write in writes:
+            if not write.future.done():
+                write.future.set_result(result)
+
+    async def flush(self):
+        """
+        Sends everything still pending and waits for in-flight flushes (used on shutdown).
+        """
+        for spreadsheet_id in list(self._pending):
+            self._start_flush(spreadsheet_id)
+        if self._flushing:
+            await asyncio.gather(*list(self._flushing), return_exceptions=True)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'window': self.window,
+            'max_ops': self.max_ops,
+            'pending': sum(len(writes) for writes in self._pending.values()),
+            'flushing': len(self._flushing),
+            'writes': self._writes,
+            'requests': self._requests,
+            'failed': self._failed,
+            'split': self._split,
+            'writes_per_request': round(self._writes / self._requests, 2) if self._requests else 0.0,
+        }
+
+
+write_buffer = WriteBuffer()
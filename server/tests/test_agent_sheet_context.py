@@ -0,0 +1,62 @@
+import asyncio
+
+from api import agents
+from services.sheet_summary import SheetSummary, sheet_summary_cache
+
+
+class FakeSheets:
+    """
+    A sheet with a header and `rows` data rows, read in chunks like iter_sheet_rows.
+    """
+
+    def __init__(self, rows: int):
+        self.values = [['sku', 'qty']] + [[f'SKU-{i}', i] for i in range(2, rows + 2)]
+        self.chunks = []
+
+    async def iter_sheet_rows(self, spreadsheet_id, sheet_name, start_row=1, chunk_rows=1000,
+                              value_render_option='FORMATTED_VALUE'):
+        for row in range(start_row, len(self.values) + 1, chunk_rows):
+            self.chunks.append(row)
+            yield row, self.values[row - 1:row - 1 + chunk_rows]
+
+
+def _load(monkeypatch, rows, max_rows, chunk_rows):
+    fake = FakeSheets(rows)
+    monkeypatch.setattr(agents, 'async_google_service', fake)
+    monkeypatch.setattr(agents, 'AGENT_CONTEXT_MAX_ROWS', max_rows)
+    monkeypatch.setattr(agents, 'SHEET_CHUNK_ROWS', chunk_rows)
+    sheet_summary_cache.clear()
+    return fake
+
+
+def test_summary_is_read_in_chunks_up_to_the_row_cap(monkeypatch):
+    fake = _load(monkeypatch, rows=500, max_rows=120, chunk_rows=50)
+    summary = asyncio.run(agents._load_sheet_summary('sid', 'Stock'))
+    assert fake.chunks == [1, 51, 101]
+    assert len(summary.rows) == 120 and summary.row_numbers[-1] == 121
+    assert summary.column_summary(1)['max'] == 121
+
+
+def test_chunked_summary_renders_stats_and_matching_rows(monkeypatch):
+    fake = _load(monkeypatch, rows=90, max_rows=200, chunk_rows=25)
+    summary = asyncio.run(agents._load_sheet_summary('sid', 'Stock'))
+    single = SheetSummary(200)
+    single.add_rows(fake.values, 1)
+
+    context = summary.render('compare row 40 with row 77')
+    assert context == single.render('compare row 40 with row 77')
+    assert 'Sheet Data (90 data rows):' in context
+    lines = context.splitlines()
+    matching = lines[lines.index('Rows matching the request:') + 1:]
+    assert matching[0] == 'Row 40: SKU-40 | 40' and matching[1] == 'Row 77: SKU-77 | 77'
+
+
+def test_summary_is_cached_until_a_write(monkeypatch):
+    fake = _load(monkeypatch, rows=10, max_rows=100, chunk_rows=5)
+    first = asyncio.run(agents._load_sheet_summary('sid', 'Stock'))
+    assert asyncio.run(agents._load_sheet_summary('sid', 'Stock')) is first
+    reads = len(fake.chunks)
+
+    sheet_summary_cache.invalidate_spreadsheet('sid')
+    assert asyncio.run(agents._load_sheet_summary('sid', 'Stock')) is not first
+    assert len(fake.chunks) > reads
@@ -0,0 +1,20 @@
+from services.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+
+
+def test_slow_calls_open_the_sheets_circuit():
+    breaker = CircuitBreaker('sheets', failure_threshold=2, latency_threshold=10)
+    breaker.record_success(12)
+    breaker.record_success(15)
+    assert breaker.stats()['state'] == OPEN
+
+
+def test_long_script_runs_do_not_open_the_circuit():
+    breaker = CircuitBreaker('script', failure_threshold=2)
+    for _ in range(5):
+        breaker.record_success(45)
+    stats = breaker.stats()
+    assert stats['state'] == CLOSED and stats['slow_calls'] == 0
+
+    breaker.record_error(TimeoutError())
+    breaker.record_error(TimeoutError())
+    assert breaker.stats()['state'] == OPEN
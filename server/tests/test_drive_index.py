@@ -0,0 +1,54 @@
+import asyncio
+import re
+
+import pytest
+
+from services import drive_index as drive_index_module
+from services.drive_index import FOLDER_MIME_TYPE, DriveIndex
+
+PARENT = re.compile(r"'([^']+)' in parents")
+
+
+class FakeDrive:
+    """
+    Folder tree root -> (a -> a.txt, b -> b.txt); listing `fail_once` raises the first time.
+    """
+
+    def __init__(self, fail_once=None):
+        self.tree = {
+            'root': [('a', True), ('b', True)],
+            'a': [('a.txt', False)],
+            'b': [('b.txt', False)],
+        }
+        self.fail_once = fail_once
+        self.listed = []
+
+    def list_files_page(self, q, page_token=None):
+        folder_id = PARENT.search(q).group(1)
+        self.listed.append(folder_id)
+        if folder_id == self.fail_once:
+            self.fail_once = None
+            raise ConnectionError('drive unavailable')
+        return {'files': [
+            {'id': name, 'name': name, 'parents': [folder_id],
+             'mimeType': FOLDER_MIME_TYPE if folder else 'text/plain'}
+            for name, folder in self.tree.get(folder_id, [])
+        ]}
+
+
+def test_partial_crawl_is_redone_by_ensure(monkeypatch):
+    drive = FakeDrive(fail_once='b')
+    monkeypatch.setattr(drive_index_module, 'google_service', drive)
+    index = DriveIndex()
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(index.ensure('root'))
+    assert 'root' not in index.roots
+
+    asyncio.run(index.ensure('root'))
+    assert 'root' in index.roots
+    assert [entry['id'] for entry in index.search('b', 'root')] == ['b', 'b.txt']
+
+    listed = len(drive.listed)
+    asyncio.run(index.ensure('a'))
+    assert len(drive.listed) == listed
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+from services.executor import BackendPool
+from services.rate_limiter import background_priority
+
+
+def test_background_calls_leave_workers_for_interactive_ones():
+    pool = BackendPool('test', 4, background_share=0.5)
+    release = threading.Event()
+    started = []
+
+    def wait_for_quota(name):
+        started.append(name)
+        release.wait(5)
+        return name
+
+    async def run():
+        with background_priority():
+            background = [asyncio.create_task(pool.run(wait_for_quota, f'bg{i}')) for i in range(4)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()['background_active'] == 2
+        # Two workers are still free: an interactive call runs at once
+        interactive = await asyncio.wait_for(pool.run(lambda: 'interactive'), 1)
+        release.set()
+        return interactive, await asyncio.gather(*background)
+
+    try:
+        interactive, background = asyncio.run(run())
+    finally:
+        release.set()
+        pool.shutdown()
+    assert interactive == 'interactive'
+    assert background == ['bg0', 'bg1', 'bg2', 'bg3']
+    assert len(started) == 4
@@ -0,0 +1,45 @@
+import os
+
+from services.log_files import tail_lines
+
+
+def _write(path, lines, mode='a'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.writelines(f"{line}\n" for line in lines)
+
+
+def test_cursor_follows_appends(tmp_path):
+    path = tmp_path / 'app.log'
+    _write(path, ['one', 'two'])
+    first = tail_lines(str(path), 10)
+    assert first['lines'] == ['one', 'two'] and not first['truncated']
+
+    _write(path, ['three'])
+    result = tail_lines(str(path), 10, first['next_offset'], include_partial=False, inode=first['inode'])
+    assert result['lines'] == ['three'] and not result['reset']
+
+
+def test_rotation_past_the_old_offset_is_a_reset(tmp_path):
+    path = tmp_path / 'app.log'
+    _write(path, ['old 1'])
+    cursor = tail_lines(str(path), 10)
+
+    # Rotated, and the new file is already longer than the old offset
+    os.rename(path, tmp_path / 'app.log.1')
+    _write(path, ['new line 1', 'new line 2'])
+    result = tail_lines(str(path), 10, cursor['next_offset'], include_partial=False, inode=cursor['inode'])
+    assert result['reset']
+    assert result['lines'] == ['new line 1', 'new line 2']
+
+
+def test_skipped_lines_are_reported(tmp_path):
+    path = tmp_path / 'app.log'
+    _write(path, ['start'])
+    cursor = tail_lines(str(path), 10)
+
+    _write(path, [f'line {i}' for i in range(5)])
+    result = tail_lines(str(path), 2, cursor['next_offset'], include_partial=False, inode=cursor['inode'])
+    assert result['lines'] == ['line 3', 'line 4'] and result['truncated']
+
+    result = tail_lines(str(path), 5, cursor['next_offset'], include_partial=False, inode=cursor['inode'])
+    assert len(result['lines']) == 5 and not result['truncated']
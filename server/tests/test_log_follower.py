@@ -0,0 +1,42 @@
+from services.log_follower import _FollowedFile
+
+
+def _append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_resumes_at_offset_after_read_error(tmp_path):
+    path = tmp_path / 'app.log'
+    _append(path, 'one\ntwo\n')
+    followed = _FollowedFile(str(path), from_end=False)
+    assert followed.read_new() == [b'one', b'two']
+
+    # The follower closes a file after an OSError
+    followed.close()
+    _append(path, 'three\n')
+    assert followed.read_new() == [b'three']
+    assert followed.rotations == 0
+
+
+def test_reads_from_start_when_file_shrank_while_closed(tmp_path):
+    path = tmp_path / 'app.log'
+    _append(path, 'one\ntwo\n')
+    followed = _FollowedFile(str(path), from_end=False)
+    followed.read_new()
+    followed.close()
+
+    path.write_text('new\n', encoding='utf-8')
+    assert followed.read_new() == [b'new']
+
+
+def test_reads_new_file_from_start_after_rotation(tmp_path):
+    path = tmp_path / 'app.log'
+    _append(path, 'old\n')
+    followed = _FollowedFile(str(path), from_end=False)
+    followed.read_new()
+    followed.close()
+
+    path.rename(tmp_path / 'app.log.1')
+    _append(path, 'fresh\n')
+    assert followed.read_new() == [b'fresh']
@@ -0,0 +1,49 @@
+import asyncio
+import gzip
+import os
+import shutil
+
+from services import log_index as log_index_module
+from services.log_index import LogIndex
+
+
+def _write(path, hours):
+    with open(path, 'a', encoding='utf-8') as f:
+        for hour in hours:
+            f.write(f"2024-01-01 {hour:02d}:00:00 - INFO - sync step {hour}\n")
+
+
+def _hours(result):
+    return [int(entry['message'].rsplit(' ', 1)[1]) for entry in result['logs']]
+
+
+def test_search_after_rotation_and_compression(monkeypatch, tmp_path):
+    log_dir = tmp_path / 'logs'
+    log_dir.mkdir()
+    monkeypatch.setattr(log_index_module, 'get_log_dir', lambda: str(log_dir))
+    index = LogIndex(db_path=str(tmp_path / 'index.db'))
+    app_log = log_dir / 'app.log'
+
+    _write(app_log, [1, 2, 3])
+    index.update()
+
+    # app.log -> app.log.1, new lines go to a fresh app.log
+    os.rename(app_log, log_dir / 'app.log.1')
+    _write(app_log, [4, 5])
+    index.update()
+
+    # app.log.1 -> app.log.1.gz: a new inode, indexed after everything else
+    with open(log_dir / 'app.log.1', 'rb') as src, gzip.open(log_dir / 'app.log.1.gz', 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(log_dir / 'app.log.1')
+
+    async def search(**kwargs):
+        return await index.search(**kwargs)
+
+    everything = asyncio.run(search(limit=10))
+    assert _hours(everything) == [5, 4, 3, 2, 1]
+    assert [entry['file'] for entry in everything['logs']][-1] == 'app.log.1.gz'
+
+    matched = asyncio.run(search(text='sync', limit=2))
+    assert _hours(matched) == [5, 4] and matched['has_more']
+    assert _hours(asyncio.run(search(text='sync', limit=2, offset=2))) == [3, 2]
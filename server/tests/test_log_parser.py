@@ -0,0 +1,18 @@
+from services.log_parser import extract_emoji, parse_lines
+
+
+def test_extract_emoji_prefers_marker_priority_over_position():
+    # ❌ appears first in the line, but ✅ comes first in EMOJI_MARKERS
+    assert extract_emoji('❌ retry failed, then ✅ recovered') == '✅'
+    assert extract_emoji('🔄 sync ⏳ waiting') == '⏳'
+
+
+def test_extract_emoji_keeps_variation_selector_and_falls_back():
+    assert extract_emoji('⚠️ slow response') == '⚠️'
+    assert extract_emoji('📊 report ready') == '📊'
+    assert extract_emoji('plain ascii line') == ''
+
+
+def test_parse_lines_bracketed():
+    entry = parse_lines(['[2024-12-08 14:30:45] ERROR: ❌ Connection refused'])[0]
+    assert (entry['timestamp'], entry['level'], entry['emoji']) == ('2024-12-08 14:30:45', 'ERROR', '❌')
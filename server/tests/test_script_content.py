@@ -0,0 +1,100 @@
+import asyncio
+
+from services import google_service as google_service_module
+from services.async_google import AsyncGoogleService
+from services.google_service import GoogleService
+from services.script_content import MANIFEST_NAME, ScriptHashStore
+
+MANIFEST = {'name': MANIFEST_NAME, 'type': 'JSON', 'source': '{"timeZone":"Europe/Moscow"}'}
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class FakeScriptService:
+    """
+    Apps Script projects keyed by script id; records getContent/updateContent calls.
+    """
+
+    def __init__(self, content: dict):
+        self.content = content
+        self.calls = []
+
+    def projects(self):
+        return self
+
+    def getContent(self, scriptId):
+        self.calls.append(('getContent', scriptId))
+        return FakeRequest({'scriptId': scriptId, 'files': list(self.content.get(scriptId, []))})
+
+    def updateContent(self, scriptId, body):
+        self.calls.append(('updateContent', scriptId))
+        self.content[scriptId] = body['files']
+        return FakeRequest({'scriptId': scriptId, 'files': body['files']})
+
+
+def _service(monkeypatch, tmp_path, content: dict):
+    fake = FakeScriptService(content)
+    service = GoogleService()
+    monkeypatch.setattr(service, 'get_script_service', lambda: fake)
+    monkeypatch.setattr(service, '_execute', lambda request, api, *args, **kwargs: request.execute())
+    monkeypatch.setattr(google_service_module, 'script_hashes', ScriptHashStore(str(tmp_path / 'hashes.json')))
+    return service, fake
+
+
+def _code(source: str) -> dict:
+    return {'name': 'Code', 'type': 'SERVER_JS', 'source': source}
+
+
+def test_unchanged_push_makes_no_api_calls(monkeypatch, tmp_path):
+    service, fake = _service(monkeypatch, tmp_path, {'s1': [MANIFEST, _code('old')]})
+    first = service.update_script_content('s1', code='new')
+    assert first == {'script_id': 's1', 'pushed': True, 'changed_files': ['Code']}
+    fake.calls.clear()
+
+    second = service.update_script_content('s1', code='new')
+    assert second == {'script_id': 's1', 'pushed': False, 'changed_files': []}
+    assert fake.calls == []
+
+
+def test_push_reports_only_the_changed_files(monkeypatch, tmp_path):
+    service, fake = _service(monkeypatch, tmp_path, {'s1': [MANIFEST, _code('a'), {**_code('b'), 'name': 'Util'}]})
+    result = service.update_script_content('s1', files={'Code': 'a', 'Util': 'c'})
+    assert result['changed_files'] == ['Util']
+    assert fake.calls == [('getContent', 's1'), ('updateContent', 's1')]
+
+
+def test_current_manifest_is_kept_unless_one_is_given(monkeypatch, tmp_path):
+    service, fake = _service(monkeypatch, tmp_path, {'s1': [MANIFEST, _code('a')]})
+    service.update_script_content('s1', code='b')
+    assert fake.content['s1'][0] == MANIFEST
+
+    manifest = '{"timeZone":"Etc/GMT"}'
+    result = service.update_script_content('s1', files={MANIFEST_NAME: manifest, 'Code': 'b'})
+    assert result['changed_files'] == [MANIFEST_NAME]
+    assert fake.content['s1'][0]['source'] == manifest
+
+
+def test_force_pushes_unchanged_content(monkeypatch, tmp_path):
+    service, fake = _service(monkeypatch, tmp_path, {'s1': [MANIFEST, _code('a')]})
+    # Matches the project as it is: no push
+    assert service.update_script_content('s1', code='a')['pushed'] is False
+    fake.calls.clear()
+
+    result = service.update_script_content('s1', code='a', force=True)
+    assert result == {'script_id': 's1', 'pushed': True, 'changed_files': []}
+    assert fake.calls == [('getContent', 's1'), ('updateContent', 's1')]
+
+
+def test_deploy_pushes_each_script_once(monkeypatch, tmp_path):
+    service, fake = _service(monkeypatch, tmp_path, {'s1': [MANIFEST], 's2': [MANIFEST]})
+    results = asyncio.run(AsyncGoogleService(service).deploy_scripts(['s1', 's2', 's1'], code='x'))
+    assert list(results) == ['s1', 's2']
+    assert all(result['pushed'] for result in results.values())
+    assert sorted(fake.calls) == [('getContent', 's1'), ('getContent', 's2'),
+                                  ('updateContent', 's1'), ('updateContent', 's2')]
@@ -0,0 +1,29 @@
+import asyncio
+
+from services import script_jobs as script_jobs_module
+from services.script_jobs import SUCCEEDED, ScriptJobs
+
+
+def test_concurrent_identical_submits_share_one_run(monkeypatch, tmp_path):
+    runs = []
+
+    async def execute_script(script_id, function_name, parameters):
+        runs.append((script_id, function_name))
+        await asyncio.sleep(0.01)
+        return 'done', 'executed'
+
+    monkeypatch.setattr(script_jobs_module, 'execute_script', execute_script)
+    monkeypatch.setattr(script_jobs_module, 'invalidate_after_run', lambda *args: None)
+    jobs = ScriptJobs(db_path=str(tmp_path / 'jobs.db'))
+
+    async def run():
+        submitted = await asyncio.gather(*(jobs.submit('sk', 'script-1', 'syncStock', {'full': True})
+                                           for _ in range(3)))
+        await asyncio.gather(*list(jobs._tasks))
+        await jobs.stop()
+        return submitted
+
+    first, second, third = asyncio.run(run())
+    assert first is second is third
+    assert runs == [('script-1', 'syncStock')]
+    assert first['status'] == SUCCEEDED
@@ -0,0 +1,101 @@
+import asyncio
+import io
+import json
+import re
+
+import pytest
+
+from services import sheet_export as sheet_export_module
+from services.sheet_export import export_sheet, iter_row_batches, stream_export
+
+RANGE = re.compile(r"!A(\d+):([A-Z]+)(\d+)$")
+
+
+class FakeSheets:
+    """
+    A sheet grid of `values` (rows may be wider than the header), read like values.batchGet.
+    """
+
+    def __init__(self, values, columns):
+        self.values = values
+        self.columns = columns
+        self.ranges = []
+
+    async def get_sheet_grid_size(self, spreadsheet_id, sheet_name):
+        return len(self.values), self.columns
+
+    async def batch_get_values(self, spreadsheet_id, ranges, value_render_option):
+        self.ranges.extend(ranges)
+        chunks = []
+        for range_name in ranges:
+            start, _, end = RANGE.search(range_name).groups()
+            chunks.append([row[:self.columns] for row in self.values[int(start) - 1:int(end)]])
+        return chunks
+
+
+async def _batches(*batches):
+    for rows in batches:
+        yield rows
+
+
+def _export(export_format, *batches) -> bytes:
+    async def run():
+        return b''.join([chunk async for chunk in stream_export(_batches(*batches), export_format)])
+    return asyncio.run(run())
+
+
+def test_ndjson_keeps_cells_beyond_the_header():
+    rows = [['sku', '', 'sku'], ['A-1', 3, 'x', 'note'], ['A-2']]
+    lines = _export('ndjson', rows).decode('utf-8').splitlines()
+    assert json.loads(lines[0]) == {'sku': 'A-1', 'B': 3, 'sku (C)': 'x', 'D': 'note'}
+    assert json.loads(lines[1]) == {'sku': 'A-2', 'B': '', 'sku (C)': '', 'D': ''}
+
+
+def test_ndjson_with_a_blank_header_row():
+    lines = _export('ndjson', [[], ['a', 'b']], [['c']]).decode('utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [{'A': 'a', 'B': 'b'}, {'A': 'c', 'B': ''}]
+
+
+def test_later_wider_batch_keeps_every_column(monkeypatch):
+    fake = FakeSheets([['a', 'b'], ['1', '2'], ['3', '4', '5', '6']], columns=4)
+    monkeypatch.setattr(sheet_export_module, 'async_google_service', fake)
+    monkeypatch.setattr(sheet_export_module, 'EXPORT_RANGES_PER_REQUEST', 1)
+
+    async def run():
+        batches = iter_row_batches('sid', 'Stock', chunk_rows=2, grid_size=(3, 4))
+        return b''.join([chunk async for chunk in stream_export(batches, 'ndjson', column_count=4)])
+
+    lines = asyncio.run(run()).decode('utf-8').splitlines()
+    assert fake.ranges == ["'Stock'!A1:D2", "'Stock'!A3:D3"]
+    assert json.loads(lines[1]) == {'a': '3', 'b': '4', 'C': '5', 'D': '6'}
+
+
+def test_export_sheet_uses_the_grid_width(monkeypatch):
+    fake = FakeSheets([['a'], ['1', '2', '3']], columns=3)
+    monkeypatch.setattr(sheet_export_module, 'async_google_service', fake)
+
+    async def run():
+        body = await export_sheet('sid', 'Stock', 'ndjson')
+        return b''.join([chunk async for chunk in body])
+
+    assert json.loads(asyncio.run(run())) == {'a': '1', 'B': '2', 'C': '3'}
+
+
+def test_parquet_export_round_trips():
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+
+    data = _export('parquet', [['sku', 'qty'], ['A-1', 3]], [['A-2', 4, 'extra']])
+    table = pyarrow.parquet.read_table(io.BytesIO(data))
+    assert table.column_names == ['sku', 'qty']
+    assert table.column('sku').to_pylist() == ['A-1', 'A-2']
+
+
+def test_arrow_export_round_trips():
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+
+    data = _export('arrow', [['sku', ''], ['A-1', 3]], [['A-2']])
+    table = pyarrow.ipc.open_stream(data).read_all()
+    assert table.column_names == ['sku', 'B']
+    assert table.column('B').to_pylist() == ['3', '']
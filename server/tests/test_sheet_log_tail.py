@@ -0,0 +1,82 @@
+import asyncio
+import re
+
+from services import sheet_log_tail as sheet_log_tail_module
+from services.sheet_log_tail import SheetLogTail
+
+RANGE = re.compile(r"!([A-Z]+)(\d+):([A-Z]+)(\d*)")
+
+
+class FakeSheets:
+    """
+    A log sheet with a header and `rows` data rows, served like the Sheets API
+    (ranges past the data are trimmed).
+    """
+
+    def __init__(self, rows: int, grid_rows: int = None):
+        self.values = [['ts', 'level', 'message']] + [[f'2024-01-01 {i}', 'INFO', f'line {i}'] for i in range(2, rows + 2)]
+        self.grid_rows = grid_rows or rows + 100
+        self.ranges = []
+
+    def _get(self, range_name):
+        self.ranges.append(range_name)
+        first_col, start, last_col, end = RANGE.search(range_name).groups()
+        end = int(end) if end else len(self.values)
+        rows = self.values[int(start) - 1:end]
+        return [row[:1] for row in rows] if first_col == last_col else rows
+
+    async def get_sheet_row_count(self, spreadsheet_id, sheet):
+        return self.grid_rows
+
+    async def get_sheet_values(self, spreadsheet_id, range_name):
+        return self._get(range_name)
+
+    async def batch_get_values(self, spreadsheet_id, ranges):
+        return [self._get(range_name) for range_name in ranges]
+
+
+def _tail(monkeypatch, rows, buffer_rows=50, max_sheets=64):
+    fake = FakeSheets(rows)
+    monkeypatch.setattr(sheet_log_tail_module, 'LOG_SHEET_MAX_SHEETS', max_sheets)
+    monkeypatch.setattr(sheet_log_tail_module, 'async_google_service', fake)
+    monkeypatch.setattr(sheet_log_tail_module, 'LOG_SHEET_BUFFER_ROWS', buffer_rows)
+    tail = SheetLogTail(lambda row, number: {'row': number, 'message': row[2] if len(row) > 2 else ''})
+    return tail, fake
+
+
+def test_large_tail_does_not_grow_the_buffer(monkeypatch):
+    tail, _ = _tail(monkeypatch, rows=300)
+    entries, last_row, _ = asyncio.run(tail.read('sid', 'Log', 20))
+    assert last_row == 301 and len(entries) == 20
+
+    entries, _, _ = asyncio.run(tail.read('sid', 'Log', 200))
+    assert [entry['row'] for entry in entries] == list(range(102, 302))
+    state = tail._sheets.get(('sid', 'Log'))
+    assert state.buffer.maxlen == 50
+    assert len(state.buffer) == 50
+
+
+def test_tail_is_capped(monkeypatch):
+    monkeypatch.setattr(sheet_log_tail_module, 'LOG_MAX_TAIL', 100)
+    tail, _ = _tail(monkeypatch, rows=300)
+    entries, _, _ = asyncio.run(tail.read('sid', 'Log', 10_000))
+    assert len(entries) == 100
+
+
+def test_small_backfill_is_kept(monkeypatch):
+    tail, fake = _tail(monkeypatch, rows=300, buffer_rows=500)
+    asyncio.run(tail.read('sid', 'Log', 20))
+    asyncio.run(tail.read('sid', 'Log', 250))
+    calls = len(fake.ranges)
+    entries, _, _ = asyncio.run(tail.read('sid', 'Log', 250))
+    assert len(entries) == 250
+    # Only the poll for new rows, no second backfill
+    assert len(fake.ranges) == calls + 2
+
+
+def test_buffered_sheets_are_bounded(monkeypatch):
+    tail, fake = _tail(monkeypatch, rows=30, max_sheets=2)
+    for sheet_id in ('s1', 's2', 's1', 's3'):
+        asyncio.run(tail.read(sheet_id, 'Log', 10))
+    # s2 was the least recently read
+    assert sorted(tail.stats()) == ['s1/Log', 's3/Log']
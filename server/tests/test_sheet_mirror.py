@@ -0,0 +1,79 @@
+import asyncio
+
+from services import sheet_mirror as sheet_mirror_module
+from services.sheet_mirror import SheetMirror, parse_written_range
+
+
+class FakeSheets:
+    """
+    A 'Stock' sheet with a header and 40 data rows; records the ranges read.
+    """
+
+    def __init__(self):
+        self.values = [['sku', 'qty']] + [[f'SKU-{i}', i] for i in range(2, 42)]
+        self.reads = []
+
+    async def get_sheet_row_count(self, spreadsheet_id, sheet_name):
+        return len(self.values)
+
+    async def batch_get_values(self, spreadsheet_id, ranges, value_render_option='FORMATTED_VALUE'):
+        self.reads.append(list(ranges))
+        result = []
+        for range_name in ranges:
+            first, last = range_name.split('!')[1].split(':')
+            result.append(self.values[int(first) - 1:int(last)])
+        return result
+
+
+def _mirror(monkeypatch, tmp_path):
+    fake = FakeSheets()
+    monkeypatch.setattr(sheet_mirror_module, 'async_google_service', fake)
+    monkeypatch.setattr(sheet_mirror_module, 'SHEET_MIRROR_BLOCK_ROWS', 10)
+    mirror = SheetMirror(db_path=str(tmp_path / 'mirror.db'), sheets={'sid': ['Stock', 'Prices']})
+    return mirror, fake
+
+
+def test_written_ranges_are_parsed_to_rows():
+    assert parse_written_range("'Stock'!B7") == ('Stock', (7, 7))
+    assert parse_written_range("'It''s'!A2:C15") == ("It's", (2, 15))
+    assert parse_written_range('Stock!3:4') == ('Stock', (3, 4))
+    assert parse_written_range("'Stock'!A:C") == ('Stock', None)
+    assert parse_written_range("'Stock'!A2:C") == ('Stock', None)
+    assert parse_written_range('A1:B2') == (None, None)
+
+
+def test_own_write_rereads_only_the_touched_block(monkeypatch, tmp_path):
+    mirror, fake = _mirror(monkeypatch, tmp_path)
+    asyncio.run(mirror.sync('sid', 'Stock'))
+    # Header plus the four blocks of rows 2-41
+    assert sum(len(ranges) for ranges in fake.reads) == 5
+    fake.reads.clear()
+
+    fake.values[24][1] = 999
+    mirror.mark_dirty('sid', ["'Stock'!B25"])
+    [result] = asyncio.run(mirror.sync_spreadsheet('sid'))
+    assert fake.reads == [["'Stock'!22:31"]]
+    assert result['read_blocks'] == 1 and result['changed_blocks'] == 1
+    assert not mirror.is_dirty('sid')
+
+    query = asyncio.run(mirror.query('sid', 'Stock', where=['sku:eq:SKU-25']))
+    assert query['rows'][0]['qty'] == 999
+
+
+def test_unknown_changes_rescan_every_block(monkeypatch, tmp_path):
+    mirror, fake = _mirror(monkeypatch, tmp_path)
+    asyncio.run(mirror.sync('sid', 'Stock'))
+    asyncio.run(mirror.sync('sid', 'Prices'))
+    fake.reads.clear()
+
+    mirror.mark_dirty('sid', ["'Stock'!B25"])
+    # A Drive change or script run doesn't say what changed
+    mirror.mark_dirty('sid')
+    results = asyncio.run(mirror.sync_spreadsheet('sid'))
+    assert [result['read_blocks'] for result in results] == [4, 4]
+
+
+def test_writes_to_unmirrored_sheets_are_ignored(monkeypatch, tmp_path):
+    mirror, _ = _mirror(monkeypatch, tmp_path)
+    mirror.mark_dirty('sid', ["'Orders'!A2:C2"])
+    assert not mirror.is_dirty('sid')
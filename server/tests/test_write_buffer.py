@@ -0,0 +1,106 @@
+import asyncio
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from services import async_google as async_google_module
+from services import write_buffer as write_buffer_module
+from services.agent_actions import execute_actions
+from services.async_google import async_google_service
+from services.write_buffer import WriteBuffer
+
+
+class FakeSheets:
+    """
+    Records the write requests that reach the Sheets API.
+    """
+
+    def __init__(self):
+        self.updates = []
+        self.appends = []
+
+    def batch_update_values(self, spreadsheet_id, data):
+        self.updates.append(data)
+        if any('!ZZZ' in entry['range'] for entry in data):
+            raise HttpError(httplib2.Response({'status': 400}), b'Unable to parse range')
+        return {'spreadsheetId': spreadsheet_id,
+                'responses': [{'updatedRange': entry['range'], 'updatedCells': 1} for entry in data]}
+
+    def append_rows(self, spreadsheet_id, range_name, rows):
+        self.appends.append((range_name, rows))
+        return {'updates': {'updatedRange': f"{range_name}!A2:B{len(rows) + 1}"}}
+
+
+def _buffer(monkeypatch):
+    fake = FakeSheets()
+    monkeypatch.setattr(write_buffer_module, 'google_service', fake)
+    monkeypatch.setattr(async_google_module, 'write_buffer', WriteBuffer(window=0.01, enabled=True))
+    return fake
+
+
+def test_concurrent_agent_updates_are_merged(monkeypatch):
+    fake = _buffer(monkeypatch)
+    first = [{'action': 'UPDATE_CELL', 'params': {'cell': 'B2', 'value': 5}}]
+    second = [{'action': 'UPDATE_CELL', 'params': {'cell': 'C3', 'value': 7}},
+              {'action': 'UPDATE_RANGE', 'params': {'range': 'D1:D2', 'values': [1, 2]}}]
+
+    async def run():
+        return await asyncio.gather(execute_actions('sid', 'Stock', first),
+                                    execute_actions('sid', 'Stock', second))
+
+    (first_results, _), (second_results, _) = asyncio.run(run())
+    assert len(fake.updates) == 1
+    assert [entry['range'] for entry in fake.updates[0]] == ["'Stock'!B2", "'Stock'!C3", "'Stock'!D1:D2"]
+    # Each caller sees only its own part of the merged response
+    assert [result['range'] for result in first_results] == ["'Stock'!B2"]
+    assert [result['range'] for result in second_results] == ["'Stock'!C3", "'Stock'!D1:D2"]
+
+
+def test_concurrent_agent_appends_are_merged(monkeypatch):
+    fake = _buffer(monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            execute_actions('sid', 'Orders', [{'action': 'ADD_ROW', 'params': {'values': ['a', 1]}}]),
+            execute_actions('sid', 'Orders', [{'action': 'ADD_ROW', 'params': {'values': ['b', 2]}}]),
+        )
+
+    results = asyncio.run(run())
+    assert fake.appends == [("'Orders'", [['a', 1], ['b', 2]])]
+    assert all(result[0][0]['status'] == 'success' for result in results)
+
+
+def test_single_row_and_cell_writes_are_buffered(monkeypatch):
+    fake = _buffer(monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            async_google_service.update_cell('sid', "'Stock'!B2", 5),
+            async_google_service.update_cell('sid', "'Stock'!B3", 6),
+            async_google_service.append_row('sid', "'Log'", ['a']),
+            async_google_service.append_row('sid', "'Log'", ['b']),
+        )
+
+    first, second, _, _ = asyncio.run(run())
+    assert len(fake.updates) == 1 and len(fake.appends) == 1
+    assert fake.appends[0][1] == [['a'], ['b']]
+    assert first['updatedRange'] == "'Stock'!B2" and second['updatedRange'] == "'Stock'!B3"
+
+
+def test_rejected_merged_update_fails_only_the_faulty_caller(monkeypatch):
+    fake = _buffer(monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            async_google_service.batch_update_values('sid', [{'range': "'Stock'!B2", 'values': [[1]]}]),
+            async_google_service.batch_update_values('sid', [{'range': "'Stock'!ZZZ0", 'values': [[2]]}]),
+            async_google_service.batch_update_values('sid', [{'range': "'Stock'!B4", 'values': [[3]]}]),
+            return_exceptions=True,
+        )
+
+    good, bad, other = asyncio.run(run())
+    assert isinstance(bad, HttpError)
+    assert good['responses'][0]['updatedRange'] == "'Stock'!B2"
+    assert other['responses'][0]['updatedRange'] == "'Stock'!B4"
+    # The merged request, then each write on its own
+    assert [len(data) for data in fake.updates] == [3, 1, 1, 1]